@@ -3,107 +3,744 @@
 
 This file is used to define all the domain classes for basic and complex entities that will be used in the optimization.
 The entities are defined as classes and the data is stored in dictionaries for O(1) time access and manipulation.
+Flights and pairings are stored in columnar NumPy tables (FlightTable and PairingTable), with stable integer ids, and
+the Flight and Pairing objects are thin views of their rows with the same attributes as before.
 """
 from datetime import datetime, timedelta
-from collections import defaultdict
-from typing import Any, Set, Self
+from collections.abc import Mapping, MutableMapping
+from typing import Any, Iterable, List, Sequence, Self
 
+import numpy as np
 
 
-def get_leaves(struct) -> Set[Any]:
-    """This is an useful function to flatten dictionaries into a list. It is used to iterate over the values of the
-     dictionary without using nested loops in the keys.
+WILDCARD = '*'
 
-    :param struct: DictionaryData: The structure to be flattened.
+
+class TupleDictionary(MutableMapping):
+    """Flat dictionary of the model variables, constraints and parameters, keyed by tuples (e.g. (pilot, flight) or
+    (pilot, flight1, flight2)). The lookup of a key is O(1), a missing key raises KeyError (nothing is created by a
+    mistyped lookup), and the iteration follows the insertion order. The values of a partial key are selected with
+    wildcards, select(pilot, '*'), from secondary indexes: the index of each pattern of fixed positions is built on its
+    first select, and it is kept up to date by the next insertions and deletions.
 
     """
-    # Ref: https://stackoverflow.com/a/59832362/
-    values = set()
-    if isinstance(struct, dict):
-        for sub_struct in struct.values():
-            values.update(get_leaves(sub_struct))
-    elif isinstance(struct, list):
-        for sub_struct in struct:
-            values.update(get_leaves(sub_struct))
-    elif struct is not None:
-        values.add(struct)
-    return values
 
+    def __init__(self, items: Iterable[tuple[tuple, Any]] = ()):
+        """
+        :param items: Iterable[tuple[tuple, Any]]: Initial (key, value) items.
+
+        """
+        self._data = {}
+        self._indexes = {}  # fixed positions -> {values of the positions -> [keys]}
+        for key, value in items:
+            self[key] = value
+
+    def __getitem__(self, key: tuple):
+        return self._data[key]
+
+    def __setitem__(self, key: tuple, value) -> None:
+        if key not in self._data:
+            for positions, index in self._indexes.items():
+                index.setdefault(tuple(key[i] for i in positions), []).append(key)
+        self._data[key] = value
+
+    def __delitem__(self, key: tuple) -> None:
+        del self._data[key]
+        for positions, index in self._indexes.items():
+            index[tuple(key[i] for i in positions)].remove(key)
+
+    def __contains__(self, key) -> bool:
+        return key in self._data
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return f'{type(self).__name__}({len(self)} items)'
+
+    def pop(self, key: tuple, *default):
+        """Removes the key and returns its value (or the default when the key is missing).
+
+        :param key: tuple: The key.
+        :param default: Value returned for a missing key.
+
+        """
+        if key in self._data:
+            value = self._data[key]
+            del self[key]
+            return value
+        if default:
+            return default[0]
+        raise KeyError(key)
+
+    def get(self, key: tuple, default=None):
+        """Value of the key, or the default when the key is missing (the key is never created).
+
+        :param key: tuple: The key.
+        :param default: Value returned for a missing key.
+
+        """
+        return self._data.get(key, default)
+
+    def keys(self):
+        """ """
+        return self._data.keys()
+
+    def values(self):
+        """ """
+        return self._data.values()
+
+    def items(self):
+        """ """
+        return self._data.items()
+
+    def _select_keys(self, pattern: tuple) -> List[tuple]:
+        """Keys that match the pattern, in the insertion order."""
+        positions = tuple(i for i, p in enumerate(pattern) if p != WILDCARD)
+        if len(positions) == len(pattern):
+            return [pattern] if pattern in self._data else []
+        if not positions:
+            return list(self._data)
+
+        index = self._indexes.get(positions)
+        if index is None:
+            index = {}
+            for key in self._data:
+                index.setdefault(tuple(key[i] for i in positions), []).append(key)
+            self._indexes[positions] = index
+        return index.get(tuple(pattern[i] for i in positions), [])
 
-def rec_dd():
-    """Useful function to create a recursive dictionary. This is useful to avoid key errors when accessing."""
-    return defaultdict(rec_dd)
+    def select(self, *pattern) -> List[Any]:
+        """Values of the keys that match the pattern, where '*' matches any value (e.g. select(pilot, '*') returns
+        the values of all the flights of the pilot).
 
+        :param pattern: One element (or '*') for each position of the keys.
 
-class DataDictionary:
-    """All the dictionaries in the project are stores in this class. It provides the values() method that
-    returns a flatten list of the dictionary. The flatten list can be used to direct iteration
-    instead of using nested loops.
+        """
+        return [self._data[key] for key in self._select_keys(pattern)]
+
+    def select_items(self, *pattern) -> List[tuple[tuple, Any]]:
+        """(key, value) items of the keys that match the pattern (see select).
+
+        :param pattern: One element (or '*') for each position of the keys.
+
+        """
+        return [(key, self._data[key]) for key in self._select_keys(pattern)]
+
+    def get_vars(self, *pattern) -> list:
+        """Gurobi variables of the values (Variable objects) that match the pattern (all the values when no pattern is
+        given), in a list that can be passed at once to the model (e.g. model.getAttr('X', vars)).
+
+        :param pattern: One element (or '*') for each position of the keys.
+
+        """
+        values = self.select(*pattern) if pattern else self._data.values()
+        return [value.variable for value in values]
+
+
+class IncidenceTable:
+    """Sparse 0/1 table between two lists of entities (e.g. pairings x flights). Only the ones are stored, as integer
+    indexes in CSR (row -> columns) and CSC (column -> rows) arrays, so both directions are available in O(1) slicing.
+    The data attribute gives the access of nested dictionaries: table.data[row][column] returns 1 or 0.
 
     """
 
-    def __init__(self):
-        self.data = rec_dd()  # data is still visible for O(1) access
+    def __init__(self, rows: Sequence[Any], columns: Sequence[Any], members: Sequence[Iterable[Any]]):
+        """
+        :param rows: Sequence: Row entities (e.g. pairings).
+        :param columns: Sequence: Column entities (e.g. flights).
+        :param members: Sequence: For each row, the column entities that are set to 1 in that row.
+
+        """
+        self.rows = list(rows)
+        self.columns = list(columns)
+        self.row_index = {r: i for i, r in enumerate(self.rows)}
+        self.column_index = {c: j for j, c in enumerate(self.columns)}
+
+        members = [tuple(m) for m in members]
+        lengths = np.fromiter(map(len, members), dtype=np.int64, count=len(self.rows))
+
+        # CSR arrays, built in a single pass over the members
+        self.indptr = np.zeros(len(self.rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=self.indptr[1:])
+        self.indices = np.fromiter((self.column_index[c] for m in members for c in m), dtype=np.int64,
+                                   count=int(self.indptr[-1]))
+
+        # CSC arrays are the CSR arrays sorted by column
+        order = np.argsort(self.indices, kind='stable')
+        self.column_indptr = np.zeros(len(self.columns) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.indices, minlength=len(self.columns)), out=self.column_indptr[1:])
+        self.row_indices = np.repeat(np.arange(len(self.rows), dtype=np.int64), lengths)[order]
+
+    def relabel(self, rows: Sequence[Any], columns: Sequence[Any]) -> Self:
+        """Table with the same ones between other entities, in the same order (e.g. the copies of the entities of a
+        variant of the instance). The arrays are shared, only the indexes of the entities are built.
+
+        :param rows: Sequence: Row entities, one for each row of this table.
+        :param columns: Sequence: Column entities, one for each column of this table.
+
+        """
+        table = IncidenceTable.__new__(IncidenceTable)
+        table.rows = list(rows)
+        table.columns = list(columns)
+        if (len(table.rows), len(table.columns)) != self.shape:
+            raise ValueError(f'The relabeled table must have the shape {self.shape}')
+        table.row_index = {r: i for i, r in enumerate(table.rows)}
+        table.column_index = {c: j for j, c in enumerate(table.columns)}
+        table.indptr, table.indices = self.indptr, self.indices
+        table.column_indptr, table.row_indices = self.column_indptr, self.row_indices
+        return table
+
+    @property
+    def shape(self) -> tuple[int, int]:
+        """ """
+        return len(self.rows), len(self.columns)
+
+    @property
+    def nnz(self) -> int:
+        """Number of ones stored in the table."""
+        return len(self.indices)
+
+    @property
+    def data(self) -> Mapping:
+        """Dict-like view with the access of nested dictionaries: data[row][column]."""
+        return _IncidenceView(self)
+
+    def row_columns(self, i: int) -> np.ndarray:
+        """Indexes of the columns set to 1 in the row i.
 
-    def values(self) -> Set[Any]:
+        :param i: int: Row index.
+
+        """
+        return self.indices[self.indptr[i]:self.indptr[i + 1]]
+
+    def column_rows(self, j: int) -> np.ndarray:
+        """Indexes of the rows set to 1 in the column j.
+
+        :param j: int: Column index.
+
+        """
+        return self.row_indices[self.column_indptr[j]:self.column_indptr[j + 1]]
+
+    def row(self, row) -> List[Any]:
+        """Column entities set to 1 in the row (e.g. flights of a pairing).
+
+        :param row: Row entity.
+
+        """
+        return [self.columns[j] for j in self.row_columns(self.row_index[row])]
+
+    def column(self, column) -> List[Any]:
+        """Row entities set to 1 in the column (e.g. pairings of a flight).
+
+        :param column: Column entity.
+
+        """
+        return [self.rows[i] for i in self.column_rows(self.column_index[column])]
+
+    def get(self, row, column) -> int:
+        """Value of the cell, 1 or 0.
+
+        :param row: Row entity.
+        :param column: Column entity.
+
+        """
+        j = self.column_index[column]
+        return int(j in self.row_columns(self.row_index[row]))
+
+
+class _IncidenceView(Mapping):
+    """Rows of an IncidenceTable seen as a dictionary."""
+
+    def __init__(self, table: IncidenceTable):
+        self.table = table
+
+    def __getitem__(self, row):
+        if row not in self.table.row_index:
+            raise KeyError(row)
+        return _IncidenceRowView(self.table, row)
+
+    def __iter__(self):
+        return iter(self.table.rows)
+
+    def __len__(self):
+        return len(self.table.rows)
+
+
+class _IncidenceRowView(Mapping):
+    """One row of an IncidenceTable seen as a dictionary column -> 1 or 0."""
+
+    def __init__(self, table: IncidenceTable, row):
+        self.table = table
+        self.row = row
+
+    def __getitem__(self, column):
+        return self.table.get(self.row, column)
+
+    def __iter__(self):
+        return iter(self.table.columns)
+
+    def __len__(self):
+        return len(self.table.columns)
+
+
+class Column:
+    """Growable NumPy array, with amortized O(1) appends (the buffer doubles when it is full). The values property is a
+    view of the first len items of the buffer, so a view taken before an append can miss the new items.
+    A column can share its buffer with copies (see share), and the buffer is copied on the first change.
+
+    """
+    __slots__ = ('_data', '_size', '_shared')
+
+    def __init__(self, dtype=np.int64, capacity: int = 16):
+        """
+        :param dtype: The type of the values.
+        :param capacity: int: Initial size of the buffer.
+
+        """
+        self._data = np.empty(max(capacity, 1), dtype=dtype)
+        self._size = 0
+        self._shared = False
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index):
+        return self._data[:self._size][index]
+
+    def __setitem__(self, index, value):
+        self._own()
+        self._data[:self._size][index] = value
+
+    @property
+    def values(self) -> np.ndarray:
         """ """
-        return get_leaves(self.data)  # Flattening available to avoid huge nested loops
+        return self._data[:self._size]
+
+    def share(self) -> Self:
+        """Copy of the column that shares the buffer with this column until one of them is changed (copy on write).
+        The values of a shared column must not be changed in place, only through the column."""
+        column = Column.__new__(Column)
+        column._data, column._size = self._data, self._size
+        column._shared = self._shared = True
+        return column
+
+    def _own(self) -> None:
+        """Copies the shared buffer before the first change."""
+        if self._shared:
+            self._data = self._data.copy()
+            self._shared = False
+
+    def _reserve(self, size: int) -> None:
+        self._own()
+        if size > len(self._data):
+            data = np.empty(max(size, 2 * len(self._data)), dtype=self._data.dtype)
+            data[:self._size] = self._data[:self._size]
+            self._data = data
+
+    def append(self, value) -> int:
+        """Appends the value and returns its index.
+
+        :param value: The value.
+
+        """
+        self._reserve(self._size + 1)
+        self._data[self._size] = value
+        self._size += 1
+        return self._size - 1
+
+    def extend(self, values) -> int:
+        """Appends the values and returns the index of the first one.
+
+        :param values: Sequence or np.ndarray: The values.
+
+        """
+        values = np.asarray(values, dtype=self._data.dtype)
+        first = self._size
+        self._reserve(first + len(values))
+        self._data[first:first + len(values)] = values
+        self._size += len(values)
+        return first
+
+
+def to_minutes(value: datetime) -> int:
+    """Minutes since EPOCH of a date and time (NO_TIME for None). Seconds are truncated.
+
+    :param value: datetime: The date and time.
+
+    """
+    return NO_TIME if value is None else (value - EPOCH) // timedelta(minutes=1)
+
+
+def from_minutes(minutes: int) -> datetime:
+    """Date and time of the minutes since EPOCH (None for NO_TIME).
+
+    :param minutes: int: The minutes.
+
+    """
+    return None if minutes == NO_TIME else EPOCH + timedelta(minutes=int(minutes))
+
+
+# Times are int64 minutes since the Unix epoch, the same integers of np.datetime64 values in minutes, and a flight
+# without a start has NO_TIME (the integer of NaT)
+EPOCH = datetime(1970, 1, 1)
+NO_TIME = np.iinfo(np.int64).min
+
+
+class FlightTable:
+    """Columnar storage of the flights. The id of a flight is its row in the table, and the times are int64 columns
+    (start, duration and end, in minutes), so the preprocessing can work on whole arrays. The Flight objects are thin
+    views of the rows, one per row, so they keep their identity as dictionary keys.
+    Each table has the table of the pairings of its flights.
+
+    """
+
+    def __init__(self):
+        self.names = []
+        self.bases = []
+        self.flights = []  # Flight views, by id
+        self._start = Column(np.int64)
+        self._duration = Column(np.int64)
+        self._end = Column(np.int64)
+        self.pairings = PairingTable(self)
+
+    def __len__(self):
+        return len(self.flights)
+
+    @property
+    def start(self) -> np.ndarray:
+        """Departures, in minutes since EPOCH (NO_TIME when the flight has no start)."""
+        return self._start.values
+
+    @property
+    def duration(self) -> np.ndarray:
+        """Durations, in minutes."""
+        return self._duration.values
+
+    @property
+    def end(self) -> np.ndarray:
+        """Arrivals, in minutes since EPOCH (NO_TIME when the flight has no start)."""
+        return self._end.values
+
+    def add(self, name, duration: float, base=None, start: datetime = None) -> int:
+        """Adds a row and returns its id. The view of the row is created by Flight.
+
+        :param name: Name of the flight.
+        :param duration: float: Duration, in hours.
+        :param base: Base of the flight.
+        :param start: datetime: Departure.
+
+        """
+        self.names.append(name)
+        self.bases.append(base)
+        start = to_minutes(start)
+        duration = round(duration * 60)
+        self._start.append(start)
+        self._duration.append(duration)
+        return self._end.append(NO_TIME if start == NO_TIME else start + duration)
+
+    def extend(self, names: Sequence[Any], start: np.ndarray, duration: np.ndarray,
+               bases: Sequence[Any] = None) -> List['Flight']:
+        """Adds the rows of whole columns at once and returns their views.
+
+        :param names: Sequence: Names of the flights.
+        :param start: np.ndarray: Departures, in minutes since EPOCH (NO_TIME for no start).
+        :param duration: np.ndarray: Durations, in minutes.
+        :param bases: Sequence: Bases of the flights (None for no bases).
+
+        """
+        start = np.asarray(start, dtype=np.int64)
+        duration = np.asarray(duration, dtype=np.int64)
+        first = len(self)
+        self.names.extend(names)
+        self.bases.extend(bases if bases is not None else [None] * len(names))
+        self._start.extend(start)
+        self._duration.extend(duration)
+        self._end.extend(np.where(start == NO_TIME, NO_TIME, start + duration))
+        for i in range(first, len(self.names)):
+            self.flights.append(Flight.view(self, i))
+        return self.flights[first:]
+
+    def derive(self) -> Self:
+        """Copy of the table for a variant of the instance (e.g. a disruption scenario). The columns are shared until
+        one of the tables changes them (see Column.share), so a delay copies only the start and end columns. The copy
+        has its own views of the flights, and its own table of the pairings (see PairingTable.derive).
+
+        """
+        table = FlightTable.__new__(FlightTable)
+        table.names = list(self.names)
+        table.bases = list(self.bases)
+        table._start = self._start.share()
+        table._duration = self._duration.share()
+        table._end = self._end.share()
+        table.flights = [Flight.view(table, i) for i in range(len(self))]
+        table.pairings = self.pairings.derive(table)
+        return table
+
+    def set_start(self, i: int, start: datetime) -> None:
+        """Moves the flight i (the end follows the start).
+
+        :param i: int: Id of the flight.
+        :param start: datetime: New departure (None for no start).
+
+        """
+        start = to_minutes(start)
+        self._start[i] = start
+        self._end[i] = NO_TIME if start == NO_TIME else start + self._duration[i]
+
+
+class PairingTable:
+    """Columnar storage of the pairings of a FlightTable. The flights of the pairing i are the flight ids
+    flight_ids[offsets[i]:offsets[i] + lengths[i]], in the order of the duty. The Pairing objects are thin views of the
+    rows.
+
+    """
+
+    def __init__(self, flight_table: FlightTable):
+        """
+        :param flight_table: FlightTable: The table of the flights of the pairings.
+
+        """
+        self.flight_table = flight_table
+        self.names = []
+        self.original_pilots = []
+        self.pairings = []  # Pairing views, by id
+        self._offsets = Column(np.int64)
+        self._lengths = Column(np.int64)
+        self._flight_ids = Column(np.int64)
+
+    def __len__(self):
+        return len(self.pairings)
+
+    @property
+    def offsets(self) -> np.ndarray:
+        """First position of the flights of each pairing in flight_ids."""
+        return self._offsets.values
+
+    @property
+    def lengths(self) -> np.ndarray:
+        """Number of flights of each pairing."""
+        return self._lengths.values
+
+    @property
+    def flight_ids(self) -> np.ndarray:
+        """Ids of the flights of all the pairings."""
+        return self._flight_ids.values
+
+    def add(self, name, flights: Iterable['Flight']) -> int:
+        """Adds a row and returns its id. The view of the row is created by Pairing.
+
+        :param name: Name of the pairing.
+        :param flights: Iterable[Flight]: Flights of the pairing, in the order of the duty.
+
+        """
+        self.names.append(name)
+        self.original_pilots.append(None)
+        self._offsets.append(len(self._flight_ids))
+        self._lengths.append(0)
+        i = len(self.names) - 1
+        self.set_flights(i, flights)
+        return i
+
+    def set_flights(self, i: int, flights: Iterable['Flight']) -> None:
+        """Changes the flights of the pairing i. The new flights are appended to flight_ids, unless they fit in the
+        positions of the old ones.
+
+        :param i: int: Id of the pairing.
+        :param flights: Iterable[Flight]: Flights of the pairing, in the order of the duty.
+
+        """
+        flights = tuple(flights or ())
+        if any(f.table is not self.flight_table for f in flights):
+            raise ValueError(f'The flights of the pairing {self.names[i]} are not in the same flight table')
+        ids = [f.id for f in flights]
+        if len(ids) <= self._lengths[i]:
+            offset = self._offsets[i]
+            self._flight_ids[offset:offset + len(ids)] = ids
+        else:
+            self._offsets[i] = self._flight_ids.extend(ids)
+        self._lengths[i] = len(ids)
+
+    def derive(self, flight_table: FlightTable) -> Self:
+        """Copy of the table for the derived flight table, with shared columns (copy on write) and its own views of the
+        pairings. The original pilots are not copied, they are set by the pilots of the variant.
+
+        :param flight_table: FlightTable: The derived table of the flights.
+
+        """
+        table = PairingTable.__new__(PairingTable)
+        table.flight_table = flight_table
+        table.names = list(self.names)
+        table.original_pilots = [None] * len(self)
+        table._offsets = self._offsets.share()
+        table._lengths = self._lengths.share()
+        table._flight_ids = self._flight_ids.share()
+        table.pairings = [Pairing.view(table, i) for i in range(len(self))]
+        return table
+
+    def get_flight_ids(self, i: int) -> np.ndarray:
+        """Ids of the flights of the pairing i.
+
+        :param i: int: Id of the pairing.
+
+        """
+        offset = self._offsets[i]
+        return self._flight_ids[offset:offset + self._lengths[i]]
+
+    def get_duration(self) -> np.ndarray:
+        """Total flight time of each pairing, in minutes."""
+        positions = np.repeat(self.offsets - np.cumsum(self.lengths) + self.lengths, self.lengths)
+        positions += np.arange(len(positions))
+        return np.bincount(np.repeat(np.arange(len(self)), self.lengths),
+                           weights=self.flight_table.duration[self.flight_ids[positions]],
+                           minlength=len(self)).astype(np.int64)
 
 
 class Pilot:
-    def __init__(self, name):
+    """A pilot of an instance. The id is given by the instance (e.g. the position of the pilot in its input), so the
+    ids of different instances do not depend on each other."""
+    __slots__ = ('id', 'name', 'base', 'original_pairing')
+
+    def __init__(self, name, id: int, base=None):
+        self.id = id
         self.name = name
+        self.base = base
         self.original_pairing = None
 
     def __repr__(self):
         return f"Pilot({self.name})"
 
+    def can_fly(self, flight):
+        """A pilot can fly the flights of its own base. Pilots or flights without a base are compatible with all."""
+        return self.base is None or flight.base is None or self.base == flight.base
+
     def assign_pairing(self, pairing):
         self.original_pairing = pairing
         pairing.original_pilot = self
 
 
 class Flight:
-    def __init__(self, name, duration):
-        self.name = name
-        self.duration = duration
+    """View of a row of a FlightTable. A new flight is added to the table of its instance."""
+    __slots__ = ('id', '_table')
+
+    def __init__(self, name, duration, base=None, *, table: FlightTable):
+        self._table = table
+        self.id = self._table.add(name, duration, base)
+        self._table.flights.append(self)
 
-        self._start = None
-        self._end = None
+    @classmethod
+    def view(cls, table: FlightTable, i: int) -> Self:
+        """View of a row that is already in the table.
+
+        :param table: FlightTable: The table.
+        :param i: int: Id of the flight.
+
+        """
+        flight = cls.__new__(cls)
+        flight._table = table
+        flight.id = i
+        return flight
 
     def __repr__(self):
         return f"Flight({self.name})"
 
     @property
-    def start(self):
-        return self._start
+    def table(self) -> FlightTable:
+        return self._table
+
+    @property
+    def name(self):
+        return self._table.names[self.id]
+
+    @property
+    def base(self):
+        return self._table.bases[self.id]
+
+    @property
+    def duration(self) -> float:
+        """Duration, in hours."""
+        return int(self._table.duration[self.id]) / 60
+
+    @property
+    def start(self) -> datetime:
+        return from_minutes(self._table.start[self.id])
 
     @start.setter
     def start(self, value):
-        self._start = value
+        self._table.set_start(self.id, value)
 
     @property
-    def end(self):
-        return self._start + timedelta(hours=self.duration)
+    def end(self) -> datetime:
+        return from_minutes(self._table.end[self.id])
 
 
 class Pairing:
-    def __init__(self, name, flights=None):
-        self.name = name
-        self._flights = flights
-        self.original_pilot = None
+    """View of a row of a PairingTable (the table of the flights of the pairing)."""
+    __slots__ = ('id', '_table')
+
+    def __init__(self, name, flights=None, table: PairingTable = None):
+        if table is None:
+            if not flights:
+                raise ValueError(f'The table of the pairing {name} is required when it has no flights')
+            table = flights[0].table.pairings
+        self._table = table
+        self.id = table.add(name, flights)
+        table.pairings.append(self)
+
+    @classmethod
+    def view(cls, table: PairingTable, i: int) -> Self:
+        """View of a row that is already in the table.
 
-        duration = sum(x.duration for x in self.flights)
-        self.start = 0
-        self.end = self.start + duration
+        :param table: PairingTable: The table.
+        :param i: int: Id of the pairing.
+
+        """
+        pairing = cls.__new__(cls)
+        pairing._table = table
+        pairing.id = i
+        return pairing
 
     def __repr__(self):
         return f'Pairing({self.name})'
 
+    @property
+    def table(self) -> PairingTable:
+        return self._table
+
+    @property
+    def name(self):
+        return self._table.names[self.id]
+
+    @property
+    def original_pilot(self):
+        return self._table.original_pilots[self.id]
+
+    @original_pilot.setter
+    def original_pilot(self, value):
+        self._table.original_pilots[self.id] = value
+
     @property
     def flights(self):
-        return self._flights
+        views = self._table.flight_table.flights
+        return tuple(views[i] for i in self._table.get_flight_ids(self.id))
 
     @flights.setter
     def flights(self, value):
-        self._flights = value
+        self._table.set_flights(self.id, value)
+
+    @property
+    def duration(self) -> float:
+        """Total flight time, in hours."""
+        return int(self._table.flight_table.duration[self._table.get_flight_ids(self.id)].sum()) / 60
+
+    @property
+    def start(self):
+        return 0
+
+    @property
+    def end(self):
+        return self.start + self.duration
+
@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""Instrumentation
+
+This file is used to measure the phases of the optimization (instance load, pairing generation, each variable and
+constraint factory, solve and output) with named spans, and to follow the progress of the solver. When it is enabled,
+each span records its duration, the memory of the process (current and peak RSS) and the counts of the objects it
+created, and every record is written as a JSON line to the events file, with the incumbent, bound and gap of the MIP
+during the solve. When it is disabled (the default) a span only reads the clock, and no callback is added to the solver.
+"""
+import functools
+import json
+import os
+import resource
+import time
+from timeit import default_timer as timer
+
+from gurobipy import GRB
+
+
+def get_rss() -> tuple[float, float]:
+    """Current and peak resident set size of the process, in MB (the current one is only available on Linux)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    try:
+        with open('/proc/self/statm') as file:
+            current = int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+    except OSError:
+        current = None
+    return current, peak
+
+
+class Span:
+    """A named phase of the optimization. It is a context manager, and the counts of the objects created in the phase
+    can be set in the counts dictionary."""
+    __slots__ = ('name', 'counts', 'start', 'duration')
+
+    def __init__(self, name: str, **counts):
+        self.name = name
+        self.counts = counts
+        self.start = None
+        self.duration = None
+
+    def __enter__(self):
+        self.start = timer()
+        return self
+
+    def __exit__(self, *exc):
+        self.duration = timer() - self.start
+        if Instrumentation.ENABLED:
+            rss, peak_rss = get_rss()
+            Instrumentation.emit({'event': 'span', 'name': self.name, 'duration': self.duration, 'rss_mb': rss,
+                                  'peak_rss_mb': peak_rss, 'counts': self.counts, 'error': exc[0] is not None})
+        return False
+
+
+class Instrumentation:
+    """Static class with the configuration and the records of the instrumentation."""
+    ENABLED = False
+    EVENTS_FILE = 'output/events.jsonl'
+    # Minimum interval (seconds) between two progress events of the solver, besides the new incumbents
+    PROGRESS_INTERVAL = 1.0
+
+    records = []
+    _file = None
+
+    @staticmethod
+    def enable(events_file: str = None) -> None:
+        """Enables the instrumentation. The records start empty, and the events are appended to the events file.
+
+        :param events_file: str: The JSON lines file (EVENTS_FILE when None).
+
+        """
+        Instrumentation.disable()
+        if events_file is not None:
+            Instrumentation.EVENTS_FILE = events_file
+        Instrumentation.records = []
+        Instrumentation._file = open(Instrumentation.EVENTS_FILE, 'a')
+        Instrumentation.ENABLED = True
+
+    @staticmethod
+    def disable() -> None:
+        """ """
+        Instrumentation.ENABLED = False
+        if Instrumentation._file is not None:
+            Instrumentation._file.close()
+            Instrumentation._file = None
+
+    @staticmethod
+    def emit(record: dict) -> None:
+        """Keeps the record and writes it as a JSON line (flushed, so the monitoring reads it while the run goes on).
+
+        :param record: dict: The event.
+
+        """
+        record = {'timestamp': time.time(), **record}
+        Instrumentation.records.append(record)
+        if Instrumentation._file is not None:
+            Instrumentation._file.write(json.dumps(record, default=str) + '\n')
+            Instrumentation._file.flush()
+
+    @staticmethod
+    def span(name: str, **counts) -> Span:
+        """A new span (see Span).
+
+        :param name: str: Name of the phase.
+        :param counts: Counts of the objects of the phase.
+
+        """
+        return Span(name, **counts)
+
+    @staticmethod
+    def traced(prefix: str):
+        """Decorator of the factories: each call is a span named prefix.function, with the number of objects returned
+        by the factory. The objects are only counted when the instrumentation is enabled.
+
+        :param prefix: str: Prefix of the name of the span (e.g. 'variables').
+
+        """
+        def decorator(function):
+            name = f'{prefix}.{function.__name__}'
+
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not Instrumentation.ENABLED:
+                    return function(*args, **kwargs)
+                with Span(name) as span:
+                    result = function(*args, **kwargs)
+                    span.counts['objects'] = get_count(result)
+                return result
+
+            return wrapper
+
+        return decorator
+
+    @staticmethod
+    def callback(inner=None):
+        """Gurobi callback that emits the progress of the MIP (incumbent, bound and gap over time) and calls the inner
+        callback. When the instrumentation is disabled, the inner callback is returned as it is.
+
+        :param inner: Callable: Another Gurobi callback (model, where), or None.
+
+        """
+        if not Instrumentation.ENABLED:
+            return inner
+
+        def progress_callback(model, where):
+            if inner is not None:
+                inner(model, where)
+
+            if where == GRB.Callback.MIPSOL:
+                runtime = model.cbGet(GRB.Callback.RUNTIME)
+                incumbent = model.cbGet(GRB.Callback.MIPSOL_OBJ)
+                bound = model.cbGet(GRB.Callback.MIPSOL_OBJBND)
+                Instrumentation.emit(get_progress('incumbent', runtime, incumbent, bound,
+                                                  model.cbGet(GRB.Callback.MIPSOL_NODCNT)))
+            elif where == GRB.Callback.MIP:
+                runtime = model.cbGet(GRB.Callback.RUNTIME)
+                last_progress = getattr(model, '_last_progress', float('-inf'))
+                # The run time starts again at each optimize of the model (e.g. the re-optimizations of a session)
+                if last_progress <= runtime and runtime - last_progress < Instrumentation.PROGRESS_INTERVAL:
+                    return
+                model._last_progress = runtime
+                Instrumentation.emit(get_progress('progress', runtime, model.cbGet(GRB.Callback.MIP_OBJBST),
+                                                  model.cbGet(GRB.Callback.MIP_OBJBND),
+                                                  model.cbGet(GRB.Callback.MIP_NODCNT)))
+
+        return progress_callback
+
+
+def get_count(result) -> int:
+    """Number of objects returned by a factory (variables or constraints), None when it cannot be counted.
+
+    :param result: The return of the factory.
+
+    """
+    if hasattr(result, 'values'):
+        return len(result.values())
+    try:
+        return len(result)
+    except TypeError:
+        return None
+
+
+def get_progress(event: str, runtime: float, incumbent: float, bound: float, nodes: float) -> dict:
+    """Progress event of the solver. There is no incumbent before the first solution, and no gap without an incumbent
+    and a finite bound.
+
+    :param event: str: 'incumbent' (new solution) or 'progress'.
+    :param runtime: float: Run time of the solve, in seconds.
+    :param incumbent: float: Objective of the best solution.
+    :param bound: float: Best bound.
+    :param nodes: float: Explored nodes.
+
+    """
+    incumbent = incumbent if abs(incumbent) < GRB.INFINITY else None
+    bound = bound if abs(bound) < GRB.INFINITY else None
+    gap = None
+    if incumbent is not None and bound is not None:
+        gap = abs(bound - incumbent) / max(abs(incumbent), 1e-10)
+    return {'event': event, 'runtime': runtime, 'incumbent': incumbent, 'bound': bound, 'gap': gap, 'nodes': nodes}
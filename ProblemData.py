@@ -3,19 +3,92 @@
 
 This file is used to define all the domain classes for basic and complex entities that will be used in the optimization.
 The entities are defined as classes and the data is stored in dictionaries for O(1) time access and manipulation.
+The parameters of the problem are in the ProblemData static class, and the entities of each instance are in a
+ProblemInstance, so a process can solve many instances (and variants of an instance) one after the other, or at the
+same time, and the memory of an instance is released with it.
 """
 from datetime import datetime, timedelta
-from itertools import chain, combinations, permutations
-from collections import defaultdict
-from typing import Any, Set, Self
+from typing import Self
 
-from Domain import DataDictionary, Flight, Pilot, Pairing
+import numpy as np
+
+from Domain import IncidenceTable, Flight, FlightTable, Pilot, Pairing, NO_TIME, from_minutes
+from Instrumentation import Instrumentation
+from preprocessing.interval_index import FlightIntervalIndex
+from preprocessing.pairing_generator import generate_pairings
 
 days_per_week = 7
 
 
+class ProblemInstance(dict):
+    """Entities of one instance of the problem. It is the problem_data dictionary that the factories, the backends and
+    the writers receive: pilots, flights, pairings, pif_table, sic_table and initial_date (the day of the first
+    departure, the origin of the start times). The instance also keeps the table of its flights and the interval index of
+    the flights, so nothing of the instance is kept in the ProblemData static class.
+    Variants of the instance (e.g. disruption scenarios) are created with derive, copy on write.
+    """
+
+    def __init__(self, pilots, flights, pairings, pif_table, sic_table, initial_date: datetime,
+                 flight_table: FlightTable = None, flight_index: FlightIntervalIndex = None):
+        """
+        :param pilots: list[Pilot]: Pilots of the instance.
+        :param flights: list[Flight]: Flights of the instance.
+        :param pairings: list[Pairing]: Pairings of the instance.
+        :param pif_table: IncidenceTable: Pairings x flights.
+        :param sic_table: IncidenceTable: Pairings x pilots (the original pilot of each pairing).
+        :param initial_date: datetime: Origin of the start times.
+        :param flight_table: FlightTable: The table of the flights and pairings.
+        :param flight_index: FlightIntervalIndex: Interval index of the flights (built on the first access when None).
+
+        """
+        super().__init__(pilots=pilots, flights=flights, pairings=pairings, pif_table=pif_table, sic_table=sic_table,
+                         initial_date=initial_date)
+        self.flight_table = flight_table
+        self._flight_index = flight_index
+
+    @property
+    def flight_index(self) -> FlightIntervalIndex:
+        """Interval index of the flights (see FlightIntervalIndex)."""
+        if self._flight_index is None:
+            self._flight_index = FlightIntervalIndex(self['flights'])
+        return self._flight_index
+
+    def derive(self) -> Self:
+        """Variant of the instance that can be changed (e.g. delayed flights, removed pilots) without changing this
+        instance. The flight table is derived (see FlightTable.derive), so its columns are only copied when the variant
+        changes them, and the incidence tables share their arrays (see IncidenceTable.relabel). The variant has its own
+        views of the flights and pairings, and its own pilots, assigned to the same original pairings.
+
+        """
+        if self.flight_table is None:
+            raise ValueError('Only an instance with its flight table can be derived')
+        table = self.flight_table.derive()
+        flights, pairings = table.flights, table.pairings.pairings
+        pif_table, sic_table = self['pif_table'], self['sic_table']
+
+        pilots = {}
+        for pilot in [*self['pilots'], *(sic_table.columns if sic_table is not None else ())]:
+            if pilot in pilots:
+                continue
+            pilots[pilot] = Pilot(pilot.name, base=pilot.base, id=pilot.id)
+            if pilot.original_pairing is not None:
+                pilots[pilot].assign_pairing(pairings[pilot.original_pairing.id])
+
+        if pif_table is not None:
+            pif_table = pif_table.relabel([pairings[p.id] for p in pif_table.rows],
+                                          [flights[f.id] for f in pif_table.columns])
+        if sic_table is not None:
+            sic_table = sic_table.relabel([pairings[p.id] for p in sic_table.rows],
+                                          [pilots[p] for p in sic_table.columns])
+
+        return ProblemInstance([pilots[p] for p in self['pilots']], [flights[f.id] for f in self['flights']],
+                               [pairings[p.id] for p in self['pairings']], pif_table, sic_table, self['initial_date'],
+                               flight_table=table)
+
+
 class ProblemData:
-    """This class is used to store all the data of the problem. It is a static class, so it can be accessed anywhere"""
+    """This class is used to store the parameters of the problem. It is a static class, so it can be accessed anywhere.
+    The entities of an instance are not stored here, basic_process returns them in a ProblemInstance."""
     UNASSIGNED_FLIGHT = 2.2
     ASSIGNING_PAIRING = 3.3
     UNASSIGNING_PAIRING = 4.4
@@ -23,77 +96,155 @@ class ProblemData:
 
     BACKUP_PILOTS_PERCENT = .1
 
+    # Origin of the start times of the sample instance, and of the problems without an initial date
     INITIAL_DATE = datetime(2024, 1, 1)
 
-    crew = []
-    flights = []
-    pairings = []
-    pif_table = DataDictionary()
-    sic_table = DataDictionary()
+    # Pairing legality (hours) and limits of the pairing generator
+    MIN_CONNECTION_TIME = .5
+    MAX_DUTY_LENGTH = 12
+    MAX_PAIRING_FLIGHTS = 4
+    MAX_PAIRINGS = 100_000
 
-    demands = DataDictionary()
+    # Maximum delay of a flight (hours), used by the time windows of the model, and the penalty of each hour of delay in
+    # the Objective Function (an hour of delay costs much less than an uncovered flight, which costs 1)
+    MAX_FLIGHT_DELAY = 3
+    FLIGHT_DELAY_PENALTY = .01
+
+    # Lean build: no names for the variables and constraints of the model (Gurobi uses its index names, e.g. C12),
+    # and no model files (lp, sol, mps) are written, unless requested
+    LEAN_BUILD = False
 
     @staticmethod
-    def basic_process(input_data):
+    def get_initial_date(problem_data) -> datetime:
+        """Origin of the start times of the problem (INITIAL_DATE when the problem has no initial date, e.g. a
+        dictionary built by hand).
+
+        :param problem_data: the input of the problem (see ProblemInstance).
+
+        """
+        return problem_data.get('initial_date') or ProblemData.INITIAL_DATE
+
+    @staticmethod
+    def read_entities(input_data, table: FlightTable) -> tuple[list[Pilot], list[Flight], list[Pairing], datetime]:
+        """Creates the pilots, the flights and the original pairings of the tables of an instance (see load_instance).
+        The original pairings are assigned to their pilots. The initial date is the day of the first departure.
+
+        :param input_data: dict[str, pa.Table]: The pilots, flights and pairings tables.
+        :param table: FlightTable: The table of the flights and pairings.
+
+        """
+        pilots, flights, pairings = input_data['pilots'], input_data['flights'], input_data['pairings']
+
+        crew = [Pilot(name, base=base, id=i) for i, (name, base) in
+                enumerate(zip(pilots.column('Name').to_pylist(), pilots.column('Base').to_pylist()))]
+
+        # The columns go to the flight table as whole arrays (times in int64 minutes, NaT is NO_TIME)
+        starts = flights.column('Start').to_numpy().astype('datetime64[m]').astype(np.int64)
+        durations = np.rint(flights.column('Duration').to_numpy() * 60).astype(np.int64)
+        flight_list = table.extend(flights.column('Name').to_pylist(), starts, durations,
+                                   flights.column('Base').to_pylist())
+        initial_date = ProblemData.INITIAL_DATE
+        scheduled = starts[starts != NO_TIME]
+        if len(scheduled):
+            first = from_minutes(scheduled.min())
+            initial_date = datetime(first.year, first.month, first.day)
+
+        # Rows of the same pairing are the flights of the duty, in order
+        pilot_by_name = {p.name: p for p in crew}
+        flight_by_name = {f.name: f for f in flight_list}
+        duties = {}
+        for pairing, pilot, flight in zip(*(pairings.column(c).to_pylist() for c in ('Pairing', 'Pilot', 'Flight'))):
+            duties.setdefault(pairing, (pilot_by_name[pilot], []))[1].append(flight_by_name[flight])
+
+        originals = []
+        for name, (pilot, duty) in duties.items():
+            pairing = Pairing(name, tuple(duty), table=table.pairings)
+            pilot.assign_pairing(pairing)
+            originals.append(pairing)
+
+        return crew, flight_list, originals, initial_date
+
+    @staticmethod
+    def basic_process(input_data) -> ProblemInstance:
+        """Creates the entities of the problem. The instance is read from input_data (the tables of load_instance),
+        and the embedded sample instance is used when input_data is empty.
+
+        :param input_data: dict[str, pa.Table]: The tables of the instance (see load_instance).
+
+        """
         print()
 
+        # A new table for each instance, so the flights of an instance are released with it
+        table = FlightTable()
+        if input_data:
+            pilots, flights, originals, initial_date = ProblemData.read_entities(input_data, table)
+
+            # The original pairings come first, followed by the legal pairings that are not original ones
+            original_duties = {pairing.flights for pairing in originals}
+            flight_index = FlightIntervalIndex(flights)
+            with Instrumentation.span('process.pairings') as span:
+                generated = generate_pairings(flights, min_connection=ProblemData.MIN_CONNECTION_TIME,
+                                              max_duty=ProblemData.MAX_DUTY_LENGTH,
+                                              max_flights=ProblemData.MAX_PAIRING_FLIGHTS,
+                                              max_pairings=ProblemData.MAX_PAIRINGS, start_index=len(originals),
+                                              index=flight_index)
+                pairings = originals + [p for p in generated if p.flights not in original_duties]
+                span.counts['pairings'] = len(pairings)
+        else:
+            pilots, flights, pairings, initial_date, flight_index = ProblemData.sample_process(table)
+
+        pif_table = IncidenceTable(pairings, flights, [pairing.flights for pairing in pairings])
+        sic_table = IncidenceTable(pairings, pilots, [[p.original_pilot] if p.original_pilot else [] for p in pairings])
+
+        return ProblemInstance(pilots, flights, pairings, pif_table, sic_table, initial_date, flight_table=table,
+                               flight_index=flight_index)
+
+    @staticmethod
+    def sample_process(table: FlightTable) -> tuple[list[Pilot], list[Flight], list[Pairing], datetime,
+                                                    FlightIntervalIndex]:
+        """Creates the entities of the embedded sample instance (the same as instances/instance1).
+
+        :param table: FlightTable: The table of the flights and pairings.
+
+        """
+        initial_date = ProblemData.INITIAL_DATE
+
         '''Basic Entities'''
-        ProblemData.crew = [
-            Pilot('John'), Pilot('Albert'), Pilot('Mary'), Pilot('Kate'),
+        crew = [
+            Pilot('John', id=0), Pilot('Albert', id=1), Pilot('Mary', id=2), Pilot('Kate', id=3),
             # Pilot('Alice'),  Pilot('Bob'), Pilot('David'),
             # Pilot('Eve'), Pilot('Frank'), Pilot('George'),
         ]
-        ProblemData.crew.sort(key=lambda x: x.name)
+        crew.sort(key=lambda x: x.name)
 
-        ProblemData.flights = [
-            Flight('AZU123', 4), Flight('TAM123', 3), Flight('GLO123', 2),
-            Flight('DAE123', 2.5), Flight('QFA123', 1),
+        flights = [
+            Flight('AZU123', 4, table=table), Flight('TAM123', 3, table=table), Flight('GLO123', 2, table=table),
+            Flight('DAE123', 2.5, table=table), Flight('QFA123', 1, table=table),
             # Flight('AZU234', .5),Flight('TAM234', 4), Flight('GLO234', 3.5),
             # Flight('DAE234', 5.5), Flight('QFA234', 6),
         ]
-        for f in ProblemData.flights:
-            f.start = ProblemData.INITIAL_DATE
-
-        # # permutations of flights
-        # pairings = list(
-        #     chain(*map(lambda x: permutations(ProblemData.flights, x), range(2, len(ProblemData.flights) + 1))))
-
-        # combinations of flights: use this for smaller cases
-        pairings = list(
-            chain(*map(lambda x: combinations(ProblemData.flights, x), range(2, len(ProblemData.flights) + 1))))
-
-        for i, p in enumerate(pairings):
-            pp = Pairing(i, p)
-            ProblemData.pairings.append(pp)
-
-        for pairing in ProblemData.pairings:
-            for flight in ProblemData.flights:
-                if flight in pairing.flights:
-                    ProblemData.pif_table.data[pairing][flight] = 1
-                else:
-                    ProblemData.pif_table.data[pairing][flight] = 0
-
-        ProblemData.crew[0].assign_pairing(ProblemData.pairings[3])
-        ProblemData.crew[1].assign_pairing(ProblemData.pairings[11])
-        ProblemData.crew[2].assign_pairing(ProblemData.pairings[20])
-        ProblemData.crew[3].assign_pairing(ProblemData.pairings[9])
-        # ProblemData.crew[4].assign_pairing(ProblemData.pairings[17])
-        # ProblemData.crew[5].assign_pairing(ProblemData.pairings[15])
-        # ProblemData.crew[6].assign_pairing(ProblemData.pairings[0])
-        # ProblemData.crew[7].assign_pairing(ProblemData.pairings[13])
-        # ProblemData.crew[8].assign_pairing(ProblemData.pairings[22])
-        # ProblemData.crew[9].assign_pairing(ProblemData.pairings[25])
-
-        for pairing in ProblemData.pairings:
-            for pilot in ProblemData.crew:
-                if pairing.original_pilot == pilot:
-                    ProblemData.sic_table.data[pairing][pilot] = 1
-                else:
-                    ProblemData.sic_table.data[pairing][pilot] = 0
-
-        # Save all our data in the dictionary below. Since ProblemData is static,
-        # these values can be accessed by the class itself.
-        problem_data = {'pilots': ProblemData.crew, 'flights': ProblemData.flights, 'pairings': ProblemData.pairings,
-                        'pif_table': ProblemData.pif_table, 'sic_table': ProblemData.sic_table, }
-
-        return problem_data
+        departures = [6, 7, 11, 14, 17]  # hours after the initial date
+        for f, departure in zip(flights, departures):
+            f.start = initial_date + timedelta(hours=departure)
+
+        # Only legal pairings are generated, walking the flight connection graph
+        flight_index = FlightIntervalIndex(flights)
+        with Instrumentation.span('process.pairings') as span:
+            pairings = list(generate_pairings(flights, min_connection=ProblemData.MIN_CONNECTION_TIME,
+                                              max_duty=ProblemData.MAX_DUTY_LENGTH,
+                                              max_flights=ProblemData.MAX_PAIRING_FLIGHTS,
+                                              max_pairings=ProblemData.MAX_PAIRINGS, index=flight_index))
+            span.counts['pairings'] = len(pairings)
+
+        crew[0].assign_pairing(pairings[3])
+        crew[1].assign_pairing(pairings[11])
+        crew[2].assign_pairing(pairings[15])
+        crew[3].assign_pairing(pairings[9])
+        # crew[4].assign_pairing(pairings[17])
+        # crew[5].assign_pairing(pairings[15])
+        # crew[6].assign_pairing(pairings[0])
+        # crew[7].assign_pairing(pairings[13])
+        # crew[8].assign_pairing(pairings[22])
+        # crew[9].assign_pairing(pairings[25])
+
+        return crew, flights, pairings, initial_date, flight_index
@@ -0,0 +1,28 @@
+import os
+import sys
+from timeit import default_timer as timer
+
+from ProblemData import ProblemData
+from milp_model.scenarios import read_scenarios, run_scenarios
+from preprocessing.instance_loader import load_instance
+
+if not os.path.exists('output/'):
+    os.mkdir('output/')
+
+
+def main():
+    """ """
+    scenarios_file = sys.argv[1] if len(sys.argv) > 1 else 'instances/scenarios.json'
+    input_data = load_instance('instances/instance1')
+    problem_data = ProblemData.basic_process(input_data)
+
+    start = timer()
+
+    run_scenarios(problem_data, read_scenarios(scenarios_file))
+
+    end = timer()
+    print(f'\tBatch time: {end - start} seconds')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+import argparse
+import importlib.metadata
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from timeit import default_timer as timer
+
+import gurobipy
+
+from ProblemData import ProblemData
+from milp_model.solution import write_solution
+from milp_model.solver_backend import create_backend
+from preprocessing.instance_generator import generate_instance
+
+if not os.path.exists('output/'):
+    os.mkdir('output/')
+
+
+def get_peak_rss() -> float:
+    """Peak resident set size of the process, in MB."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_case(case: dict) -> dict:
+    """Runs the stages of the optimization for one instance size. It runs in its own process, so the peak RSS of each
+    stage is the peak of the case until the end of the stage.
+
+    :param case: dict: n_pilots, n_flights, n_days, n_bases, seed, backend, engine, formulation and time_limit (the
+        engine and the formulation are the options of the Gurobi backend).
+
+    """
+    result = dict(case, stages={})
+
+    def stage(name, start):
+        result['stages'][name] = {'time': timer() - start, 'peak_rss_mb': get_peak_rss()}
+
+    try:
+        start = timer()
+        tables = generate_instance(case['n_pilots'], case['n_flights'], n_days=case['n_days'],
+                                   n_bases=case['n_bases'], seed=case['seed'])
+        stage('generate', start)
+
+        start = timer()
+        problem_data = ProblemData.basic_process(tables)
+        result['pairings'] = len(problem_data['pairings'])
+        stage('process', start)
+
+        start = timer()
+        options = {}
+        if case['backend'] == 'gurobi':
+            options = dict(engine=case['engine'], formulation=case['formulation'], write_model_files=False,
+                           log_file=os.path.join(tempfile.gettempdir(), 'benchmark-gurobi.log'))
+        backend = create_backend(case['backend'], problem_data, time_limit=case['time_limit'], verbose=False,
+                                 **options)
+        backend.build()
+        stage('build', start)
+        if case['backend'] == 'gurobi':
+            result['stages']['build'].update(backend.model_build['times'])
+        result.update(backend.get_size())
+
+        start = timer()
+        backend.optimize()
+        stage('solve', start)
+        result.update({'status': backend.status, 'first_incumbent': backend.first_incumbent,
+                       'objective': backend.objective, 'bound': backend.bound, 'gap': backend.gap})
+
+        start = timer()
+        solution = backend.get_solution()
+        if solution is not None:
+            with tempfile.TemporaryDirectory() as directory:
+                write_solution(solution, os.path.join(directory, 'solution'))
+        stage('output', start)
+    except Exception as e:
+        # e.g. a model too large for the Gurobi license: the case is reported and the sweep goes on
+        result['error'] = f'{type(e).__name__}: {e}'
+
+    return result
+
+
+def get_version(package: str) -> str:
+    """Installed version of the package (None when it is not installed)."""
+    try:
+        return importlib.metadata.version(package)
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+
+def get_revision() -> str:
+    """Git revision of the code, to compare the benchmarks between versions."""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    """ """
+    parser = argparse.ArgumentParser(description='Scaling benchmark on synthetic instances, for each solver backend.')
+    parser.add_argument('--pilots', type=int, nargs='+', default=[4, 8, 16])
+    parser.add_argument('--flights', type=int, nargs='+', default=[10, 20, 40])
+    parser.add_argument('--days', type=int, default=1)
+    parser.add_argument('--bases', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--backends', nargs='+', default=['gurobi', 'cpsat'])
+    parser.add_argument('--engine', default='object')
+    parser.add_argument('--formulation', default='windows')
+    parser.add_argument('--time-limit', type=float, default=60)
+    parser.add_argument('--output', default='output/benchmark.json')
+    args = parser.parse_args()
+
+    cases = [{'n_pilots': p, 'n_flights': f, 'n_days': args.days, 'n_bases': args.bases, 'seed': args.seed,
+              'backend': b, 'engine': args.engine, 'formulation': args.formulation, 'time_limit': args.time_limit}
+             for p in args.pilots for f in args.flights for b in args.backends]
+
+    start = timer()
+    results = []
+    context = multiprocessing.get_context('spawn')
+    for case in cases:
+        # A new process for each case, so the peak RSS of a case does not include the previous ones
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            result = executor.submit(run_case, case).result()
+        results.append(result)
+
+        stages = result['stages']
+        print(f'\t{case["n_pilots"]:>5} pilots {case["n_flights"]:>5} flights {case["backend"]:>7}: '
+              + (result['error'] if 'error' in result else
+                 f'{result["vars"]} vars, {result["constrs"]} constrs, build {stages["build"]["time"]:.3f}s, '
+                 f'solve {stages["solve"]["time"]:.3f}s, objective {result["objective"]}, gap {result["gap"]}, '
+                 f'peak {max(s["peak_rss_mb"] for s in stages.values()):.1f} MB'))
+    end = timer()
+
+    report = {'revision': get_revision(), 'date': datetime.now().isoformat(timespec='seconds'),
+              'python': platform.python_version(), 'gurobi': '.'.join(map(str, gurobipy.gurobi.version())),
+              'ortools': get_version('ortools'), 'platform': platform.platform(), 'cases': results}
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(f'\tBenchmark of {len(cases)} cases in {end - start} seconds, written to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
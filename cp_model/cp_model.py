@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""Constraint Programming Model
+
+This file is used to create and optimize the crew scheduling model with the open-source OR-Tools CP-SAT solver. The
+sequencing of the flights of a pilot is a no-overlap scheduling problem, so instead of the start time and precedence
+variables and the big-M rows of the MILP model:
+- each flight has a start time variable, in minutes after the initial date, between its departure and the maximum delay;
+- each pilot x flight that the pilot can fly is an optional interval of the duration of the flight plus the minimum
+  connection (the time the pilot is busy with the flight), present when the flight is assigned to the pilot (the start
+  is shared by the intervals of the flight, because a flight is flown by one pilot at most);
+- the intervals of each pilot are in a NoOverlap constraint, and each flight has at most one present interval.
+The Objective Function is the same of the 'windows' formulation of the MILP model: the number of assigned flights less
+the delay penalty (ProblemData.FLIGHT_DELAY_PENALTY per hour). CP-SAT needs integer coefficients, so the objective is
+scaled: a minute of delay costs 1 and an assigned flight costs 60 / FLIGHT_DELAY_PENALTY. The assignments come back in
+the common Solution format, with the optimized start times.
+"""
+
+from ortools.sat.python import cp_model as cp
+
+from Domain import to_minutes
+from Instrumentation import Instrumentation, get_progress
+from ProblemData import ProblemData
+from milp_model.solution import Solution, print_roster
+from milp_model.solver_backend import SolverBackend, OPTIMAL, FEASIBLE, INFEASIBLE, NO_SOLUTION
+from preprocessing.interval_index import get_times
+
+STATUSES = {cp.OPTIMAL: OPTIMAL, cp.FEASIBLE: FEASIBLE, cp.INFEASIBLE: INFEASIBLE}
+
+
+class ProgressCallback(cp.CpSolverSolutionCallback):
+    """Keeps the time to the first incumbent, and emits the new incumbents when the instrumentation is enabled."""
+
+    def __init__(self):
+        super().__init__()
+        self.first_incumbent = None
+
+    def on_solution_callback(self):
+        """ """
+        if self.first_incumbent is None:
+            self.first_incumbent = self.WallTime()
+        if Instrumentation.ENABLED:
+            Instrumentation.emit(get_progress('incumbent', self.WallTime(), self.ObjectiveValue(),
+                                              self.BestObjectiveBound(), self.NumBranches()))
+
+
+class CPSatBackend(SolverBackend):
+    """Scheduling model with optional intervals, optimized by CP-SAT."""
+    NAME = 'cpsat'
+
+    def __init__(self, problem_data, max_delay: float = None, workers: int = 8, time_limit: float = 60 * 60,
+                 verbose: bool = True):
+        """
+        :param problem_data: the input of the problem, processed in the ProblemData static class.
+        :param max_delay: float: Maximum delay of a flight, in hours (ProblemData.MAX_FLIGHT_DELAY when None).
+        :param workers: int: Number of search workers of CP-SAT.
+        :param time_limit: float: Time limit of the solve, in seconds (no limit when None).
+        :param verbose: bool: Print the search log of CP-SAT and the roster of the solution.
+
+        """
+        super().__init__(problem_data, time_limit=time_limit, verbose=verbose)
+        self.max_delay = ProblemData.MAX_FLIGHT_DELAY if max_delay is None else max_delay
+        self.workers = workers
+
+        self.model = None
+        self.solver = None
+        self.start_vars = {}
+        self.assignment_vars = {}
+        self.earliest = {}
+        # Objective of an assigned flight, in minutes of delay
+        self.scale = round(60 / ProblemData.FLIGHT_DELAY_PENALTY)
+
+    def build(self) -> None:
+        """ """
+        pilots, flights = self.problem_data['pilots'], self.problem_data['flights']
+        with Instrumentation.span('build', backend=self.NAME) as span:
+            model = cp.CpModel()
+            lean = ProblemData.LEAN_BUILD
+
+            # Windows of all the flights, read from the columns of the flight table, and the time each flight keeps its
+            # pilot busy (the duration and the minimum connection)
+            start, end = get_times(flights)
+            earliest = start - to_minutes(ProblemData.get_initial_date(self.problem_data))
+            busy = end - start + round(ProblemData.MIN_CONNECTION_TIME * 60)
+            delay = round(self.max_delay * 60)
+            self.start_vars = {f: model.NewIntVar(int(e), int(e) + delay, '' if lean else f'StartTime_{f}')
+                               for f, e in zip(flights, earliest)}
+
+            intervals = {pilot: [] for pilot in pilots}
+            for pilot in pilots:
+                for flight, size in zip(flights, busy.tolist()):
+                    if not pilot.can_fly(flight):
+                        continue
+                    name = '' if lean else f'FlightPilotAssignment_{pilot}_{flight}'
+                    var = model.NewBoolVar(name)
+                    self.assignment_vars[pilot, flight] = var
+                    intervals[pilot].append(model.NewOptionalFixedSizeIntervalVar(self.start_vars[flight], size, var,
+                                                                                  name))
+
+            for pilot in pilots:
+                model.AddNoOverlap(intervals[pilot])
+            for flight in flights:
+                model.AddAtMostOne(self.assignment_vars[pilot, flight] for pilot in pilots
+                                   if (pilot, flight) in self.assignment_vars)
+            self.earliest = dict(zip(flights, earliest.tolist()))
+            # The start of a flight that is not assigned is free, so its delay is zero in the optimal solutions
+            delays = cp.LinearExpr.Sum(list(self.start_vars.values())) - int(earliest.sum())
+            model.Maximize(self.scale * cp.LinearExpr.Sum(list(self.assignment_vars.values())) - delays)
+
+            self.model = model
+            span.counts.update(self.get_size())
+        print(f'\tCP-SAT model creation time: {span.duration} seconds')
+
+    def get_size(self) -> dict:
+        """ """
+        proto = self.model.Proto()
+        return {'vars': len(proto.variables), 'constrs': len(proto.constraints),
+                'intervals': len(self.assignment_vars)}
+
+    def optimize(self) -> None:
+        """ """
+        self.solver = cp.CpSolver()
+        if self.time_limit is not None:
+            self.solver.parameters.max_time_in_seconds = self.time_limit
+        self.solver.parameters.num_workers = self.workers
+        self.solver.parameters.log_search_progress = self.verbose
+
+        callback = ProgressCallback()
+        with Instrumentation.span('solve', backend=self.NAME, **self.get_size()) as span:
+            status = self.solver.Solve(self.model, callback)
+            span.counts.update(status=self.solver.StatusName(status))
+        self.solve_time = span.duration
+        self.first_incumbent = callback.first_incumbent
+
+        self.status = STATUSES.get(status, NO_SOLUTION)
+        if self.status == INFEASIBLE:
+            print('\tModel infeasible')
+        if self.status not in (OPTIMAL, FEASIBLE):
+            print(f'\tNo solution found (status {self.solver.StatusName(status)})')
+            return
+
+        self.objective = self.get_objective()
+        self.bound = self.solver.BestObjectiveBound() / self.scale
+        if not self.verbose:
+            return
+
+        print(f'\n\n\tModel Objective Function: {self.objective:,.3f}')
+        print(f'\tTime to first incumbent: {self.first_incumbent} seconds')
+        print_roster(self.get_roster(), ProblemData.get_initial_date(self.problem_data))
+
+    def get_objective(self) -> float:
+        """Objective Function of the solution, in the units of the MILP model, computed from the roster: the starts of
+        the flights that are not assigned are not counted."""
+        assigned = [(start, flight) for flights in self.get_roster().values() for start, flight in flights]
+        delay = sum(start * 60 - self.earliest[flight] for start, flight in assigned)
+        return len(assigned) - delay / self.scale
+
+    def get_roster(self) -> dict:
+        """Flights of each pilot in the solution, as (start, flight), with the start in hours after the initial date."""
+        roster = {pilot: [] for pilot in self.problem_data['pilots']}
+        for (pilot, flight), var in self.assignment_vars.items():
+            if self.solver.BooleanValue(var):
+                roster[pilot].append((self.solver.Value(self.start_vars[flight]) / 60, flight))
+        return {pilot: sorted(flights, key=lambda x: x[0]) for pilot, flights in roster.items()}
+
+    def get_solution(self) -> Solution:
+        """ """
+        if self.objective is None:
+            return None
+        return Solution.from_roster(self.get_roster(), objective=self.objective,
+                                    initial_date=ProblemData.get_initial_date(self.problem_data))
@@ -0,0 +1,375 @@
+# -*- coding: utf-8 -*-
+"""Column Generation Script
+
+This file is used to solve the pilot-pairing assignment (set partitioning) model without enumerating all the pairings.
+The restricted master problem starts with the original pairings of the pilots plus a small pool of legal pairings.
+The LP relaxation is solved, and new pairings are priced with a resource-constrained longest path over the flight
+connection network (the resources are the number of flights and the duty length). A pilot only gets the pairings of
+flights it can fly, so the pricing runs once per base, on the network of the flights of the base. When no pairing
+improves the master, the restricted master is solved as a MIP to get the final roster. The generated pairings are kept
+in a scratch table of the flights, so the pairings of the instance are not changed.
+The column generation is also a solver backend, 'colgen' (see ColumnGenerationBackend). Its Objective Function is the
+one of the pilot-pairing model (kept and changed pairings, uncovered flights), not the one of the MILP model, and the
+monolithic reference of the same model, with all the legal pairings, is get_pairing_assignment.
+"""
+from itertools import count
+from timeit import default_timer as timer
+
+from gurobipy import Model, GRB, LinExpr, Column
+
+from Domain import Pairing, PairingTable
+from Instrumentation import Instrumentation
+from ProblemData import ProblemData
+from milp_model.solution import Solution
+from milp_model.solver_backend import SolverBackend, OPTIMAL, FEASIBLE, NO_SOLUTION
+from preprocessing.interval_index import FlightIntervalIndex
+from preprocessing.pairing_generator import build_connection_graph, generate_pairings
+
+EPSILON = 1e-6
+
+
+def get_pilot_pairing_objective(pilot, pairing) -> float:
+    """Objective coefficient of assigning the pairing to the pilot. It is the same coefficient used by
+    create_pilot_pairing_assignment_var: keeping the original pairing is rewarded, and changing the schedule of the
+    pilot is penalized.
+
+    :param pilot: Pilot: The pilot.
+    :param pairing: Pairing: The pairing.
+
+    """
+    if pilot.original_pairing is pairing:
+        return 1
+    return -ProblemData.PILOT_SCHEDULE_CHANGED
+
+
+def can_fly_pairing(pilot, pairing) -> bool:
+    """True if the pilot can fly all the flights of the pairing (see Pilot.can_fly).
+
+    :param pilot: Pilot: The pilot.
+    :param pairing: Pairing: The pairing.
+
+    """
+    return all(pilot.can_fly(flight) for flight in pairing.flights)
+
+
+def get_base_graphs(graph, pilots) -> list[tuple[list, dict]]:
+    """The flight connection graph restricted to the flights of each base: the pilots of the base (the pilots of a
+    base can fly the same flights) and the graph of the flights they can fly.
+
+    :param graph: dict: Flight connection graph (see build_connection_graph).
+    :param pilots: list[Pilot]: Pilots of the problem.
+
+    """
+    bases = {}
+    for pilot in pilots:
+        bases.setdefault(pilot.base, []).append(pilot)
+
+    base_graphs = []
+    for base_pilots in bases.values():
+        pilot = base_pilots[0]
+        base_graph = {flight: [f for f in successors if pilot.can_fly(f)]
+                      for flight, successors in graph.items() if pilot.can_fly(flight)}
+        base_graphs.append((base_pilots, base_graph))
+    return base_graphs
+
+
+def price_pairings(graph, weights, max_duty: float, max_flights: int = None) -> list[tuple[float, tuple]]:
+    """Resource-constrained longest path: for each first flight, the path with the largest sum of weights that respects
+    the maximum duty length and the maximum number of flights.
+
+    :param graph: dict: Flight connection graph (see build_connection_graph).
+    :param weights: dict: Weight of each flight (minus the dual value of its covering constraint).
+    :param max_duty: float: Maximum duty length, in hours.
+    :param max_flights: int: Maximum number of flights in a pairing (None for no limit).
+
+    """
+    ordered = sorted(graph, key=lambda x: x.start)
+    limit = max_flights or len(ordered)
+
+    paths = []
+    for i, first in enumerate(ordered):
+        # labels[flight][k]: best (value, predecessor) of a path from first to flight with k flights
+        labels = {first: {1: (weights[first], None)}}
+        best = (weights[first], first, 1)
+        for flight in ordered[i:]:
+            if flight not in labels:
+                continue
+            for k, (value, _) in labels[flight].items():
+                if k == limit:
+                    continue
+                for successor in graph[flight]:
+                    if (successor.end - first.start).total_seconds() > max_duty * 3600:
+                        continue
+                    candidate = value + weights[successor]
+                    successor_labels = labels.setdefault(successor, {})
+                    if candidate > successor_labels.get(k + 1, (float('-inf'),))[0]:
+                        successor_labels[k + 1] = (candidate, flight)
+                        if candidate > best[0]:
+                            best = (candidate, successor, k + 1)
+
+        value, flight, k = best
+        path = []
+        while flight is not None:
+            path.append(flight)
+            flight = labels[flight][k][1]
+            k -= 1
+        paths.append((value, tuple(reversed(path))))
+
+    return paths
+
+
+class PairingMaster:
+    """Set partitioning model of the pilot-pairing assignment over a pool of pairings: each flight is covered by one
+    pairing or it is uncovered (penalized by ProblemData.UNASSIGNED_FLIGHT), and each pilot flies one pairing at most.
+    The columns have no upper bound (the pilot row already bounds them), so a column at its bound never hides a positive
+    reduced cost from the pricing."""
+
+    def __init__(self, pilots, flights):
+        """
+        :param pilots: list[Pilot]: Pilots of the problem.
+        :param flights: list[Flight]: Flights of the problem.
+
+        """
+        self.pilots = list(pilots)
+        self.model = Model('Crew Pairing Master')
+        self.model.setAttr(attrname='ModelSense', arg1=GRB.MAXIMIZE)
+        self.model.setParam('OutputFlag', 0)
+
+        self.uncovered_vars = {f: self.model.addVar(obj=-ProblemData.UNASSIGNED_FLIGHT, ub=1.0, name=f'Uncovered_{f}')
+                               for f in flights}
+        self.model.update()
+        self.flight_constrs = {f: self.model.addConstr(LinExpr(self.uncovered_vars[f]) == 1, name=f'Flight_Cover_{f}')
+                               for f in flights}
+        self.pilot_constrs = {p: self.model.addConstr(LinExpr() <= 1, name=f'Pilot_Pairing_{p}') for p in pilots}
+        self.columns = {}
+
+    def add_column(self, pilot, pairing) -> None:
+        """Adds the assignment of the pairing to the pilot.
+
+        :param pilot: Pilot: The pilot.
+        :param pairing: Pairing: The pairing.
+
+        """
+        column = Column([1.0] * (len(pairing.flights) + 1),
+                        [self.pilot_constrs[pilot]] + [self.flight_constrs[f] for f in pairing.flights])
+        name = f'PilotPairingAssignment_{pilot}_{pairing}'
+        self.columns[pilot, pairing] = self.model.addVar(obj=get_pilot_pairing_objective(pilot, pairing), column=column,
+                                                         name=name)
+
+    def add_pairing(self, pairing) -> None:
+        """Adds the columns of the pairing for all the pilots that can fly it.
+
+        :param pairing: Pairing: The pairing.
+
+        """
+        for pilot in self.pilots:
+            if (pilot, pairing) not in self.columns and can_fly_pairing(pilot, pairing):
+                self.add_column(pilot, pairing)
+
+    def get_duals(self) -> tuple[dict, dict]:
+        """Dual values of the flight and of the pilot rows, read with one getAttr call each."""
+        return self.model.getAttr('Pi', self.flight_constrs), self.model.getAttr('Pi', self.pilot_constrs)
+
+    def set_binary(self) -> None:
+        """Turns the LP relaxation into the MIP of the pool."""
+        for var in self.columns.values():
+            var.VType = GRB.BINARY
+
+    def get_roster(self) -> tuple[dict, list]:
+        """Pairing of each pilot (None when the pilot flies nothing) and the uncovered flights of the solution."""
+        # The values of each family are read with one getAttr call
+        roster = {pilot: None for pilot in self.pilots}
+        for (pilot, pairing), value in self.model.getAttr('X', self.columns).items():
+            if value > .5:
+                roster[pilot] = pairing
+        uncovered = [f for f, value in self.model.getAttr('X', self.uncovered_vars).items() if value > .5]
+        return roster, uncovered
+
+
+def get_pairing_assignment(problem_data, time_limit: float = None) -> dict:
+    """Monolithic reference of the column generation: the MIP of the pilot-pairing model with all the legal pairings
+    (single flights included, as in the pricing) and the original pairings. The legal pairings are enumerated, so it is
+    only for small instances.
+
+    :param problem_data: the input of the problem, processed in the ProblemData static class.
+    :param time_limit: float: Time limit of the MIP, in seconds (no limit when None).
+
+    """
+    pilots, flights = problem_data['pilots'], problem_data['flights']
+    master = PairingMaster(pilots, flights)
+    pool = {tuple(p.original_pairing.flights): p.original_pairing for p in pilots if p.original_pairing is not None}
+    scratch = PairingTable(flights[0].table) if flights else None
+    for pairing in generate_pairings(flights, min_connection=ProblemData.MIN_CONNECTION_TIME,
+                                     max_duty=ProblemData.MAX_DUTY_LENGTH, max_flights=ProblemData.MAX_PAIRING_FLIGHTS,
+                                     min_flights=1, start_index=len(problem_data['pairings']), table=scratch):
+        pool.setdefault(tuple(pairing.flights), pairing)
+    for pairing in pool.values():
+        master.add_pairing(pairing)
+
+    master.set_binary()
+    if time_limit is not None:
+        master.model.setParam('TimeLimit', time_limit)
+    master.model.optimize()
+    roster, uncovered = master.get_roster()
+    return {'roster': roster, 'uncovered': uncovered, 'objective': master.model.ObjVal,
+            'bound': master.model.ObjBound, 'pairings': list(pool.values())}
+
+
+class ColumnGenerationBackend(SolverBackend):
+    """Pilot-pairing model solved by column generation and a MIP of the restricted master (see get_column_generation).
+    The start times of the flights are their scheduled departures."""
+    NAME = 'colgen'
+
+    def __init__(self, problem_data, pool_size: int = 50, max_iterations: int = 100, time_limit: float = None,
+                 verbose: bool = True):
+        """
+        :param problem_data: the input of the problem, processed in the ProblemData static class.
+        :param pool_size: int: Number of generated pairings in the initial restricted pool.
+        :param max_iterations: int: Maximum number of pricing iterations.
+        :param time_limit: float: Time limit of the MIP of the restricted master, in seconds (no limit when None).
+        :param verbose: bool: Print the iterations and the roster of the solution.
+
+        """
+        super().__init__(problem_data, time_limit=time_limit, verbose=verbose)
+        self.pool_size = pool_size
+        self.max_iterations = max_iterations
+
+        self.master = None
+        self.pool = {}
+        self.scratch = None
+        self.base_graphs = []
+        self.iterations = 0
+        self.roster = {}
+        self.uncovered = []
+
+    def build(self) -> None:
+        """Initial pool: the original pairings plus a restricted pool of legal pairings."""
+        pilots, flights = self.problem_data['pilots'], self.problem_data['flights']
+        with Instrumentation.span('build', backend=self.NAME) as span:
+            for pilot in pilots:
+                if pilot.original_pairing is not None:
+                    self.pool[tuple(pilot.original_pairing.flights)] = pilot.original_pairing
+            index = FlightIntervalIndex(flights)
+            self.scratch = PairingTable(flights[0].table) if flights else None
+            for pairing in generate_pairings(flights, min_connection=ProblemData.MIN_CONNECTION_TIME,
+                                             max_duty=ProblemData.MAX_DUTY_LENGTH,
+                                             max_flights=ProblemData.MAX_PAIRING_FLIGHTS, max_pairings=self.pool_size,
+                                             start_index=len(self.problem_data['pairings']), index=index,
+                                             table=self.scratch):
+                self.pool.setdefault(tuple(pairing.flights), pairing)
+            graph = build_connection_graph(flights, min_connection=ProblemData.MIN_CONNECTION_TIME,
+                                           max_duty=ProblemData.MAX_DUTY_LENGTH, index=index)
+            self.base_graphs = get_base_graphs(graph, pilots)
+
+            self.master = PairingMaster(pilots, flights)
+            for pairing in self.pool.values():
+                self.master.add_pairing(pairing)
+            self.master.model.update()
+            span.counts.update(self.get_size())
+
+    def get_size(self) -> dict:
+        """ """
+        model = self.master.model
+        return {'vars': model.NumVars, 'constrs': model.NumConstrs, 'pairings': len(self.pool)}
+
+    def price(self, names) -> int:
+        """Adds the columns with a positive reduced cost, priced on the network of each base. Returns the number of
+        added columns.
+
+        :param names: Iterator[int]: Names (indexes) of the new pairings.
+
+        """
+        flight_duals, pilot_duals = self.master.get_duals()
+        weights = {f: -dual for f, dual in flight_duals.items()}
+        added = 0
+        for base_pilots, base_graph in self.base_graphs:
+            for value, path in price_pairings(base_graph, weights, max_duty=ProblemData.MAX_DUTY_LENGTH,
+                                              max_flights=ProblemData.MAX_PAIRING_FLIGHTS):
+                pairing = self.pool.get(path)
+                if pairing is None:
+                    pairing = Pairing(next(names), path, table=self.scratch)
+                for pilot in base_pilots:
+                    if (pilot, pairing) in self.master.columns or not can_fly_pairing(pilot, pairing):
+                        continue
+                    reduced_cost = get_pilot_pairing_objective(pilot, pairing) + value - pilot_duals[pilot]
+                    if reduced_cost > EPSILON:
+                        self.pool[path] = pairing
+                        self.master.add_column(pilot, pairing)
+                        added += 1
+        return added
+
+    def optimize(self) -> None:
+        """ """
+        model = self.master.model
+        names = count(len(self.problem_data['pairings']) + len(self.pool))
+
+        with Instrumentation.span('solve', backend=self.NAME) as span:
+            start = timer()
+            added = 0
+            for self.iterations in range(1, self.max_iterations + 1):
+                model.optimize()
+                added = self.price(names)
+                if not added:
+                    break
+            # The LP of the restricted master is a bound of the problem only when no column prices out
+            self.bound = model.ObjVal if not added else None
+            pricing_time = timer() - start
+
+            start = timer()
+            self.master.set_binary()
+            if self.time_limit is not None:
+                model.setParam('TimeLimit', self.time_limit)
+            model.optimize()
+            mip_time = timer() - start
+            span.counts.update(iterations=self.iterations, columns=len(self.master.columns), status=model.Status)
+        self.solve_time = span.duration
+
+        if model.SolCount == 0:
+            print(f'\tNo solution found (status {model.Status})')
+            self.status = NO_SOLUTION
+            return
+        self.objective = model.ObjVal
+        self.status = OPTIMAL if self.bound is not None and self.bound - self.objective < EPSILON else FEASIBLE
+        self.roster, self.uncovered = self.master.get_roster()
+        if not self.verbose:
+            return
+
+        bound = (f'LP bound {self.bound:,.3f}' if self.bound is not None
+                 else 'no LP bound (stopped at the iteration limit)')
+        print(f'\tColumn generation: {self.iterations} iterations, {len(self.pool)} pairings, '
+              f'{len(self.master.columns)} columns, {bound} in {pricing_time} seconds')
+        gap = f' (gap to LP bound {self.bound - self.objective:,.3f})' if self.bound is not None else ''
+        print(f'\tRestricted master MIP: {self.objective:,.3f}{gap} in {mip_time} seconds')
+        for pilot, pairing in self.roster.items():
+            changed = '' if pairing is pilot.original_pairing else ' (changed)'
+            print(f'{pilot}: {pairing} {pairing.flights if pairing else ()}{changed}')
+        print(f'Uncovered flights: {self.uncovered}')
+
+    def get_roster(self) -> dict:
+        """Flights of each pilot in the solution, as (start, flight), with the start in hours after the initial date."""
+        initial_date = ProblemData.get_initial_date(self.problem_data)
+        return {pilot: [((flight.start - initial_date).total_seconds() / 3600, flight)
+                        for flight in sorted(pairing.flights if pairing else (), key=lambda x: x.start)]
+                for pilot, pairing in self.roster.items()}
+
+    def get_solution(self) -> Solution:
+        """ """
+        if self.objective is None:
+            return None
+        return Solution.from_roster(self.get_roster(), objective=self.objective,
+                                    initial_date=ProblemData.get_initial_date(self.problem_data))
+
+
+def get_column_generation(problem_data, pool_size: int = 50, max_iterations: int = 100) -> dict:
+    """This function is used to solve the pilot-pairing assignment with column generation.
+
+    :param problem_data: the input of the problem, processed in the ProblemData static class.
+    :param pool_size: int: Number of generated pairings in the initial restricted pool.
+    :param max_iterations: int: Maximum number of pricing iterations.
+
+    """
+    backend = ColumnGenerationBackend(problem_data, pool_size=pool_size, max_iterations=max_iterations)
+    backend.build()
+    backend.optimize()
+    return {'roster': backend.roster, 'uncovered': backend.uncovered, 'objective': backend.objective,
+            'lp_bound': backend.bound, 'pairings': list(backend.pool.values())}
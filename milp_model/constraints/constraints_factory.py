@@ -5,38 +5,78 @@ This file is used to define and implement the constraints used in the optimizati
 """
 import math
 
+import numpy as np
+import scipy.sparse as sp
 from gurobipy import LinExpr, Model
 
+from Domain import TupleDictionary
+from Instrumentation import Instrumentation
+from ProblemData import ProblemData
+from preprocessing.time_windows import DISJUNCTIVE, FORCED, INCOMPATIBLE
 
+
+def get_constraint_name(template: str, *args) -> str:
+    """Formats the name of a constraint. In the lean build the name is left empty (Gurobi uses its compact index name,
+    e.g. R12), so the reprs of the entities are never formatted."""
+    if ProblemData.LEAN_BUILD:
+        return ''
+    return template.format(*args)
+
+
+@Instrumentation.traced('constraints')
 def create_idle_pilots_constraint(model: Model, pilots, flight_pilot_assignment_vars) -> None:
     idle_pilots_number = math.floor(4 * len(pilots) / 5)
 
-    _sum = LinExpr()
-    for assignment in flight_pilot_assignment_vars.values():
-        _sum += assignment.variable
-    name = 'Idle_Pilots_Constraint'
+    gurobi_vars = flight_pilot_assignment_vars.get_vars()
+    _sum = LinExpr([1.0] * len(gurobi_vars), gurobi_vars)
+    name = get_constraint_name('Idle_Pilots_Constraint')
     model.addConstr(_sum <= idle_pilots_number, name=name)
 
 
-def create_flight_pilot_assignment_constraint(model: Model, pilots, flights, flight_pilot_assignment_vars) -> None:
+@Instrumentation.traced('constraints')
+def create_flight_pilot_assignment_constraint(model: Model, pilots, flights, flight_pilot_assignment_vars) -> dict:
+    constrs = {}
     for flight in flights:
         exp = LinExpr()
         for pilot in pilots:
-            exp += flight_pilot_assignment_vars.data[pilot][flight].variable
-        name = f'Flight_Pilot_Assignment_Const_{flight}'
-        model.addConstr(exp <= LinExpr(1), name=name)
+            exp += flight_pilot_assignment_vars[pilot, flight].variable
+        name = get_constraint_name('Flight_Pilot_Assignment_Const_{}', flight)
+        constrs[flight] = model.addConstr(exp <= LinExpr(1), name=name)
+    return constrs
+
+
+@Instrumentation.traced('constraints')
+def create_pilot_schedule_changed_constraint(model: Model, pilots, flights, flight_pilot_assignment_vars,
+                                             pilot_schedule_changed_vars) -> None:
+    """The schedule of the pilot changes when it flies a flight out of its original pairing, or when it does not fly a
+    flight of its original pairing. The flights of the original pairing that are not in the problem (e.g. cancelled)
+    are not a change."""
+    for pilot in pilots:
+        changed = pilot_schedule_changed_vars[pilot].variable
+        original = set(pilot.original_pairing.flights if pilot.original_pairing else ())
+        for flight in flights:
+            assigned = flight_pilot_assignment_vars[pilot, flight].variable
+            if flight in original:
+                model.addConstr(changed >= 1 - assigned,
+                                name=get_constraint_name('PilotScheduleChanged_({})_({})', pilot, flight))
+            elif pilot.can_fly(flight):
+                model.addConstr(changed >= assigned,
+                                name=get_constraint_name('PilotScheduleChanged_({})_({})', pilot, flight))
 
 
+@Instrumentation.traced('constraints')
 def create_precedence_integrity_constraint(model: Model, pilots, flights, precedence_vars) -> None:
     for pilot in pilots:
         for flight1 in flights:
             for flight2 in flights:
                 if flight1 != flight2:
-                    model.addConstr(precedence_vars.data[pilot][flight1][flight2].variable +
-                                    precedence_vars.data[pilot][flight2][flight1].variable == 1,
-                                    name=f'PrecedenceIntegrity_({pilot})_({flight1})_({flight2})')
+                    model.addConstr(precedence_vars[pilot, flight1, flight2].variable +
+                                    precedence_vars[pilot, flight2, flight1].variable == 1,
+                                    name=get_constraint_name('PrecedenceIntegrity_({})_({})_({})', pilot, flight1,
+                                                             flight2))
 
 
+@Instrumentation.traced('constraints')
 def create_precedence_constraint(model: Model, start_time_vars, precedence_vars, flights, pilots) -> None:
     big_m = sum([x.duration for x in flights])
 
@@ -44,13 +84,15 @@ def create_precedence_constraint(model: Model, start_time_vars, precedence_vars,
         for flight1 in flights:
             for flight2 in flights:
                 if flight1 != flight2:
-                    lhs1 = start_time_vars.data[pilot][flight1].variable + flight1.duration - start_time_vars.data[pilot][flight2].variable
-                    rhs1 = big_m * precedence_vars.data[pilot][flight1][flight2].variable
-                    model.addConstr(lhs1 <= rhs1, name=f'PrecedenceBigM_({pilot})_({flight1})_({flight2})')
+                    lhs1 = start_time_vars[pilot, flight1].variable + flight1.duration - start_time_vars[pilot, flight2].variable
+                    rhs1 = big_m * precedence_vars[pilot, flight1, flight2].variable
+                    model.addConstr(lhs1 <= rhs1,
+                                    name=get_constraint_name('PrecedenceBigM_({})_({})_({})', pilot, flight1, flight2))
 
-                    lhs2 = start_time_vars.data[pilot][flight2].variable + flight2.duration - start_time_vars.data[pilot][flight1].variable
-                    rhs2 = big_m * (1 - precedence_vars.data[pilot][flight1][flight2].variable)
-                    model.addConstr(lhs2 <= rhs2, name=f'PrecedenceBigM-1_({pilot})_({flight1})_({flight2})')
+                    lhs2 = start_time_vars[pilot, flight2].variable + flight2.duration - start_time_vars[pilot, flight1].variable
+                    rhs2 = big_m * (1 - precedence_vars[pilot, flight1, flight2].variable)
+                    model.addConstr(lhs2 <= rhs2, name=get_constraint_name('PrecedenceBigM-1_({})_({})_({})', pilot,
+                                                                           flight1, flight2))
 
 
     # for m in precedence_vars.keys():
@@ -63,3 +105,164 @@ def create_precedence_constraint(model: Model, start_time_vars, precedence_vars,
     #             lhs2 = start_time_vars[m][w2] + duration[m][w2] - start_time_vars[m][w1]
     #             rhs2 = big_m * (1 - precedence_vars[m][w1][w2])
     #             model.addConstr(lhs2 <= rhs2, name=f'PrecedenceBigM-1_M({m.name})_-_W1({w1.name})-_W2({w2.name})')
+
+
+@Instrumentation.traced('constraints')
+def create_flight_pilot_assignment_matrix_constraint(model: Model, flight_pilot_assignment_block) -> None:
+    """Matrix version of create_flight_pilot_assignment_constraint: one row per flight, added in a single call."""
+    n_pilots, n_flights = flight_pilot_assignment_block.variable.shape
+
+    # Row f has a 1 in the column of every (pilot, f) of the flattened (pilots, flights) block
+    columns = np.arange(n_pilots * n_flights)
+    rows = columns % n_flights
+    a = sp.csr_matrix((np.ones(len(columns)), (rows, columns)), shape=(n_flights, n_pilots * n_flights))
+
+    model.addMConstr(a, flight_pilot_assignment_block.variable.reshape(-1), '<', np.ones(n_flights),
+                     name=get_constraint_name('Flight_Pilot_Assignment_Const'))
+
+
+@Instrumentation.traced('constraints')
+def create_precedence_integrity_matrix_constraint(model: Model, precedence_block) -> None:
+    """Matrix version of create_precedence_integrity_constraint. The row of (flight1, flight2) is the same as the row of
+    (flight2, flight1), so it is added only once per unordered pair."""
+    n_pilots, n_pairs = precedence_block.variable.shape
+    first, second = precedence_block.first, precedence_block.second
+
+    ordered = np.flatnonzero(first < second)
+    reverse = precedence_block.pair_index(second[ordered], first[ordered])
+
+    n_rows = len(ordered)
+    offsets = np.repeat(np.arange(n_pilots) * n_pairs, n_rows)
+    rows = np.tile(np.arange(n_pilots * n_rows), 2)
+    columns = np.concatenate([offsets + np.tile(ordered, n_pilots), offsets + np.tile(reverse, n_pilots)])
+    a = sp.csr_matrix((np.ones(len(columns)), (rows, columns)), shape=(n_pilots * n_rows, n_pilots * n_pairs))
+
+    model.addMConstr(a, precedence_block.variable.reshape(-1), '=', np.ones(n_pilots * n_rows),
+                     name=get_constraint_name('PrecedenceIntegrity'))
+
+
+@Instrumentation.traced('constraints')
+def create_precedence_matrix_constraint(model: Model, start_time_block, precedence_block, flights) -> None:
+    """Matrix version of create_precedence_constraint: both big-M families are added with one sparse matrix each.
+
+    start[f1] + duration[f1] - start[f2] <= big_m * precedence[f1][f2]
+    start[f2] + duration[f2] - start[f1] <= big_m * (1 - precedence[f1][f2])
+    """
+    durations = np.array([x.duration for x in flights], dtype=float)
+    big_m = durations.sum()
+
+    n_pilots, n_flights = start_time_block.variable.shape
+    n_pairs = precedence_block.variable.shape[1]
+    first, second = precedence_block.first, precedence_block.second
+
+    n_rows = n_pilots * n_pairs
+    rows = np.arange(n_rows)
+    pilot_of_row = rows // n_pairs
+    start1 = pilot_of_row * n_flights + np.tile(first, n_pilots)
+    start2 = pilot_of_row * n_flights + np.tile(second, n_pilots)
+
+    ones = np.ones(n_rows)
+    a_start = sp.csr_matrix((np.concatenate([ones, -ones]), (np.tile(rows, 2), np.concatenate([start1, start2]))),
+                            shape=(n_rows, n_pilots * n_flights))
+    a_precedence = sp.csr_matrix((ones * big_m, (rows, rows)), shape=(n_rows, n_rows))
+
+    start = start_time_block.variable.reshape(-1)
+    precedence = precedence_block.variable.reshape(-1)
+
+    rhs1 = -np.tile(durations[first], n_pilots)
+    model.addConstr(a_start @ start - a_precedence @ precedence <= rhs1, name=get_constraint_name('PrecedenceBigM'))
+
+    rhs2 = big_m - np.tile(durations[second], n_pilots)
+    model.addConstr(-a_start @ start + a_precedence @ precedence <= rhs2, name=get_constraint_name('PrecedenceBigM-1'))
+
+
+@Instrumentation.traced('constraints')
+def create_incompatible_flights_constraint(model: Model, pilots, time_windows, flight_pilot_assignment_vars,
+                                           pairs=None) -> TupleDictionary:
+    """A pilot cannot fly two flights whose time windows do not allow any order.
+
+    The windowed factories receive the classified pairs of TimeWindows (all pairs when None) and return the rows they
+    created as constrs[pilot, flight1, flight2] = [rows], so the rows of a pair can be replaced later.
+    """
+    constrs = TupleDictionary()
+    for kind, flight1, flight2 in time_windows.pairs() if pairs is None else pairs:
+        if kind != INCOMPATIBLE:
+            continue
+        for pilot in pilots:
+            constrs[pilot, flight1, flight2] = [
+                model.addConstr(flight_pilot_assignment_vars[pilot, flight1].variable +
+                                flight_pilot_assignment_vars[pilot, flight2].variable <= 1,
+                                name=get_constraint_name('IncompatibleFlights_({})_({})_({})', pilot, flight1,
+                                                         flight2))]
+    return constrs
+
+
+@Instrumentation.traced('constraints')
+def create_windowed_precedence_integrity_constraint(model: Model, pilots, time_windows, precedence_vars,
+                                                    flight_pilot_assignment_vars, pairs=None) -> TupleDictionary:
+    """When the pilot flies both flights of a DISJUNCTIVE pair, exactly one order is chosen."""
+    constrs = TupleDictionary()
+    for kind, flight1, flight2 in time_windows.pairs() if pairs is None else pairs:
+        if kind != DISJUNCTIVE:
+            continue
+        for pilot in pilots:
+            order = (precedence_vars[pilot, flight1, flight2].variable +
+                     precedence_vars[pilot, flight2, flight1].variable)
+            both = (flight_pilot_assignment_vars[pilot, flight1].variable +
+                    flight_pilot_assignment_vars[pilot, flight2].variable)
+            constrs[pilot, flight1, flight2] = [
+                model.addConstr(order <= 1, name=get_constraint_name('PrecedenceIntegrity_({})_({})_({})', pilot,
+                                                                     flight1, flight2)),
+                model.addConstr(order >= both - 1, name=get_constraint_name('PrecedenceIntegrity-1_({})_({})_({})',
+                                                                            pilot, flight1, flight2))]
+    return constrs
+
+
+@Instrumentation.traced('constraints')
+def create_windowed_precedence_constraint(model: Model, start_time_vars, precedence_vars, pilots, time_windows,
+                                          flight_pilot_assignment_vars, pairs=None) -> TupleDictionary:
+    """Big-M rows only for FORCED and DISJUNCTIVE pairs, each one with the big-M of its own pair. The second flight
+    starts after the first one ends plus the minimum connection (see TimeWindows.get_ready_time). The rows are relaxed
+    when the pilot does not fly both flights (FORCED) or when the order is not chosen (DISJUNCTIVE)."""
+    constrs = TupleDictionary()
+    for kind, flight1, flight2 in time_windows.pairs() if pairs is None else pairs:
+        if kind not in (FORCED, DISJUNCTIVE):
+            continue
+        for pilot in pilots:
+            start1 = start_time_vars[pilot, flight1].variable
+            start2 = start_time_vars[pilot, flight2].variable
+            big_m = time_windows.big_m(flight1, flight2)
+            if kind == FORCED:
+                both = (flight_pilot_assignment_vars[pilot, flight1].variable +
+                        flight_pilot_assignment_vars[pilot, flight2].variable)
+                constrs[pilot, flight1, flight2] = [
+                    model.addConstr(time_windows.get_ready_time(flight1, start1) - start2 <= big_m * (2 - both),
+                                    name=get_constraint_name('PrecedenceForced_({})_({})_({})', pilot, flight1,
+                                                             flight2))]
+                continue
+
+            row1 = model.addConstr(time_windows.get_ready_time(flight1, start1) - start2 <=
+                                   big_m * (1 - precedence_vars[pilot, flight1, flight2].variable),
+                                   name=get_constraint_name('PrecedenceBigM_({})_({})_({})', pilot, flight1, flight2))
+            big_m = time_windows.big_m(flight2, flight1)
+            row2 = model.addConstr(time_windows.get_ready_time(flight2, start2) - start1 <=
+                                   big_m * (1 - precedence_vars[pilot, flight2, flight1].variable),
+                                   name=get_constraint_name('PrecedenceBigM-1_({})_({})_({})', pilot, flight1, flight2))
+            constrs[pilot, flight1, flight2] = [row1, row2]
+    return constrs
+
+
+@Instrumentation.traced('constraints')
+def create_pilot_availability_constraint(model: Model, availability: dict, time_windows, start_time_vars,
+                                         flight_pilot_assignment_vars) -> TupleDictionary:
+    """The pilot cannot start the flight before it is available (hours). The row only binds when the pilot flies the
+    flight, so the start times of the flights the pilot does not fly stay free, and only the assigned flights pay the
+    delay penalty of the wait."""
+    constrs = TupleDictionary()
+    for (pilot, flight), available in availability.items():
+        earliest = time_windows.earliest[flight]
+        assignment = flight_pilot_assignment_vars[pilot, flight].variable
+        constrs[pilot, flight] = model.addConstr(
+            start_time_vars[pilot, flight].variable >= earliest + (available - earliest) * assignment,
+            name=get_constraint_name('PilotAvailability_({})_({})', pilot, flight))
+    return constrs
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""Decomposition Script
+
+This file is used to split the problem into independent sub-problems. Pilots and flights are the nodes of the
+compatibility graph, and there is an edge between a pilot and each flight it can fly (same base). Sub-problems in
+different connected components share no pilot and no flight, so each component is built and optimized as its own model
+in a process pool, with the Gurobi threads split among the workers. The rosters of the components are merged into one
+solution. When the graph has a single component, the problem is coupled and it is solved as one model.
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from timeit import default_timer as timer
+
+from Instrumentation import Instrumentation
+from ProblemData import ProblemData
+from milp_model.milp_model import build_model
+from milp_model.solution import Solution, SolutionValues, write_solution
+from milp_model.visualizer import visualize
+
+
+def get_components(pilots, flights) -> list[tuple[list, list]]:
+    """Connected components (pilots, flights) of the pilot-flight compatibility graph, with union-find.
+
+    :param pilots: list[Pilot]: Pilots of the problem.
+    :param flights: list[Flight]: Flights of the problem.
+
+    """
+    parent = {x: x for x in list(pilots) + list(flights)}
+
+    def find(x):
+        while parent[x] is not x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for pilot in pilots:
+        for flight in flights:
+            if pilot.can_fly(flight):
+                parent[find(flight)] = find(pilot)
+
+    components = {}
+    for pilot in pilots:
+        components.setdefault(find(pilot), ([], []))[0].append(pilot)
+    for flight in flights:
+        components.setdefault(find(flight), ([], []))[1].append(flight)
+
+    return list(components.values())
+
+
+def solve_component(problem_data, formulation: str, threads: int, log_file: str) -> dict:
+    """Builds and optimizes the model of one component. It runs in a worker process, so the roster is returned with
+    the indexes of the pilots and flights of the component instead of the objects.
+
+    :param problem_data: the input of the component.
+    :param formulation: str: formulation of the sequencing, 'bigm' or 'windows' (see build_model).
+    :param threads: int: Gurobi threads of the worker.
+    :param log_file: str: The Gurobi log file of the component.
+
+    """
+    start = timer()
+    build = build_model(problem_data, formulation=formulation, log_file=log_file)
+    model = build['model']
+    model.setParam('Threads', threads)
+    model.setParam('LogToConsole', 0)
+    model.optimize(Instrumentation.callback())
+
+    pilot_index = {p: i for i, p in enumerate(problem_data['pilots'])}
+    flight_index = {f: i for i, f in enumerate(problem_data['flights'])}
+    roster, objective = [], None
+    if model.SolCount > 0:
+        values = SolutionValues(build)
+        objective = values.get_objective()
+        for pilot, flight in values.get_assignments():
+            roster.append((pilot_index[pilot], flight_index[flight], values.get_start_time(pilot, flight)))
+
+    return {'roster': roster, 'objective': objective, 'status': model.Status, 'time': timer() - start}
+
+
+def get_decomposition(problem_data, formulation: str = 'windows', max_workers: int = None,
+                      write_output: bool = True) -> dict:
+    """This function is used to solve the independent components of the problem in parallel.
+
+    :param problem_data: the input of the problem, processed in the ProblemData static class.
+    :param formulation: str: formulation of the sequencing, 'bigm' or 'windows' (see build_model).
+    :param max_workers: int: Number of worker processes (the number of cores when None).
+    :param write_output: bool: Write the merged solution and the chart to the output directory.
+
+    """
+    start = timer()
+    components = get_components(problem_data['pilots'], problem_data['flights'])
+    # Flights without any compatible pilot cannot be covered, and pilots without flights stay idle
+    solvable = [(pilots, flights) for pilots, flights in components if pilots and flights]
+
+    cores = os.cpu_count() or 1
+    workers = max(1, min(len(solvable), max_workers or cores))
+    threads = max(1, cores // workers)
+    if len(solvable) > 1:
+        print(f'\tDecomposition: {len(solvable)} components, {workers} workers with {threads} threads each')
+    else:
+        print('\tDecomposition: the problem is coupled, solving a single model')
+
+    sub_problems = [dict(problem_data, pilots=pilots, flights=flights, pairings=[], pif_table=None, sic_table=None)
+                    for pilots, flights in solvable]
+    log_files = [f'output/model-gurobi-{i}.log' for i in range(len(sub_problems))]
+
+    if len(sub_problems) > 1:
+        # Spawned workers start with a clean Gurobi environment
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+            results = list(executor.map(solve_component, sub_problems, [formulation] * len(sub_problems),
+                                        [threads] * len(sub_problems), log_files))
+    else:
+        results = [solve_component(p, formulation, threads, f) for p, f in zip(sub_problems, log_files)]
+
+    '''Merge'''
+    roster = {pilot: [] for pilot in problem_data['pilots']}
+    objective = 0.0
+    for sub_problem, result in zip(sub_problems, results):
+        objective += result['objective'] or 0.0
+        for p, f, start_time in result['roster']:
+            roster[sub_problem['pilots'][p]].append((start_time, sub_problem['flights'][f]))
+    for pilot in roster:
+        roster[pilot].sort(key=lambda x: x[0])
+    end = timer()
+
+    print(f'\n\n\tModel Objective Function: {objective:,.3f}')
+    component_times = ', '.join(f'{r["time"]:.3f}' for r in results)
+    print(f'\tDecomposition time: {end - start} seconds (components: {component_times} seconds)')
+
+    if write_output:
+        solution = Solution.from_roster(roster, objective=objective,
+                                        initial_date=ProblemData.get_initial_date(problem_data))
+        write_solution(solution, 'output/solution')
+        visualize(solution, background=True)
+
+    return {'roster': roster, 'objective': objective, 'components': len(solvable), 'time': end - start}
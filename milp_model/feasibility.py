@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""Feasibility File
+
+This file is used to handle infeasible models after the optimization, only when the solver reports it. Two options
+are available:
+- the conflicts: an Irreducible Inconsistent Subsystem (IIS) of the constraints and bounds, written to an ilp file;
+- the elastic repair: every constraint gets an artificial slack with a unit penalty (Gurobi feasRelax), the model is
+  solved with the smallest total violation, and the violated constraints are reported, so an infeasible recovery still
+  returns a roster quickly, together with the rules it breaks.
+"""
+from timeit import default_timer as timer
+
+from gurobipy import GRB, Model
+
+INFEASIBLE_STATUSES = (GRB.INFEASIBLE, GRB.INF_OR_UNBD)
+
+
+def is_infeasible(model: Model) -> bool:
+    """True when the optimization proved that the model is infeasible.
+
+    :param model: Model: Optimized Gurobi model.
+
+    """
+    return model.Status in INFEASIBLE_STATUSES
+
+
+def compute_conflicts(model: Model, filename: str = None) -> list[str]:
+    """Computes an IIS of the infeasible model and returns the names of its constraints.
+
+    :param model: Model: Infeasible Gurobi model.
+    :param filename: str: The ilp file of the IIS (not written when None).
+
+    """
+    start = timer()
+    model.computeIIS()
+    conflicts = [c.ConstrName or f'R{c.index}' for c in model.getConstrs() if c.IISConstr]
+    if filename is not None:
+        model.write(filename)
+    print(f'\tIIS: {len(conflicts)} constraints in {timer() - start} seconds')
+
+    return conflicts
+
+
+def repair_feasibility(model: Model) -> list[tuple[str, float]]:
+    """Relaxes all the constraints of the infeasible model (the bounds are kept) with unit penalties, minimizes the
+    total violation and, among the minimal relaxations, optimizes the original Objective Function. The model is
+    changed in place, so the solution can be read from the original variables. Returns the violated constraints and
+    their violations, the largest first.
+
+    :param model: Model: Infeasible Gurobi model.
+
+    """
+    start = timer()
+    constrs = model.getConstrs()
+    names = [c.ConstrName or f'R{c.index}' for c in constrs]
+    n_vars = model.NumVars
+
+    model.feasRelax(relaxobjtype=0, minrelax=True, vars=None, lbpen=None, ubpen=None, constrs=constrs,
+                    rhspen=[1.0] * len(constrs))
+    model.optimize()
+    if model.SolCount == 0:
+        print('\tFeasibility repair: no solution found')
+        return []
+
+    # Each artificial variable appears only in the constraint it relaxes
+    violations = {}
+    for var in model.getVars()[n_vars:]:
+        if var.X > 1e-6:
+            row = model.getCol(var).getConstr(0).index
+            violations[names[row]] = violations.get(names[row], 0.0) + var.X
+    violations = sorted(violations.items(), key=lambda x: -x[1])
+
+    print(f'\tFeasibility repair: {len(violations)} violated constraints, total violation '
+          f'{sum(v for _, v in violations):,.3f} in {timer() - start} seconds')
+    for name, violation in violations:
+        print(f'\t\t{name}: {violation:,.3f}')
+
+    return violations
@@ -5,37 +5,62 @@ This file is used to create an MILP model. The parameters, values, variables, co
 are stored into the Model and optimized. After the optimization, the values of the variables are retrieved and
 used to compose the Schedule solution (Dispatch Decision).
 """
+import os
+import tempfile
+import tracemalloc
 from timeit import default_timer as timer
-from gurobipy import Model, GRB
+from gurobipy import Model, GRB, LinExpr
 
+from Instrumentation import Instrumentation
 from ProblemData import ProblemData
 from milp_model.variables.variables_factory import create_flight_pilot_assignment_var
 from milp_model.variables.variables_factory import create_pilot_pairing_assignment_var
 from milp_model.variables.variables_factory import create_start_time_var
 from milp_model.variables.variables_factory import create_precedence_var
+from milp_model.variables.variables_factory import create_flight_pilot_assignment_block
+from milp_model.variables.variables_factory import create_start_time_block
+from milp_model.variables.variables_factory import create_precedence_block
+from milp_model.variables.variables_factory import create_windowed_start_time_var
+from milp_model.variables.variables_factory import create_windowed_precedence_var
+from milp_model.variables.variables_factory import set_delay_offset
+from milp_model.variables.variables_factory import create_pilot_schedule_changed_var
 
 from milp_model.constraints.constraints_factory import create_flight_pilot_assignment_constraint
 # from milp_model.constraints.constraints_factory import create_pilot_pairing_assignment_constraint
 from milp_model.constraints.constraints_factory import create_idle_pilots_constraint
 from milp_model.constraints.constraints_factory import create_precedence_constraint
 from milp_model.constraints.constraints_factory import create_precedence_integrity_constraint
+from milp_model.constraints.constraints_factory import create_flight_pilot_assignment_matrix_constraint
+from milp_model.constraints.constraints_factory import create_precedence_integrity_matrix_constraint
+from milp_model.constraints.constraints_factory import create_precedence_matrix_constraint
+from milp_model.constraints.constraints_factory import create_incompatible_flights_constraint
+from milp_model.constraints.constraints_factory import create_windowed_precedence_integrity_constraint
+from milp_model.constraints.constraints_factory import create_windowed_precedence_constraint
+from milp_model.constraints.constraints_factory import create_pilot_schedule_changed_constraint
 
-from milp_model.solution import clean_model
-from milp_model.solution import write_solution
+from milp_model.solution import Solution, SolutionValues, print_roster, write_solution
 
 from milp_model.visualizer import visualize
+from milp_model.warm_start import set_warm_start, first_incumbent_callback
+from milp_model.recovery_heuristic import RecoveryHeuristic
+from milp_model.feasibility import is_infeasible, compute_conflicts, repair_feasibility
 
+from milp_model.solver_backend import SolverBackend, create_backend, OPTIMAL, FEASIBLE, INFEASIBLE, NO_SOLUTION
 
-def set_parameters(model: Model) -> None:
+from preprocessing.time_windows import TimeWindows, UniformTimeWindows
+
+
+def set_parameters(model: Model, log_file: str = 'output/model-gurobi.log') -> None:
     """This is used to set the parameters of the model. The parameters belong to the Gurobi Solver and are specified in
     the documentation.
 
     :param model: Model: The Gurobi model to be optimized.
+    :param log_file: str: The Gurobi log file.
 
     """
     # General parameters
     model.setParam('TimeLimit', 60 * 60)
-    model.setParam('LogFile', 'output/model-gurobi.log')
+    model.setParam('LogFile', log_file)
     model.setParam('DisplayInterval', 1)
 
     # Optimization Parameters
@@ -44,20 +69,38 @@ def set_parameters(model: Model) -> None:
     model.setParam('Heuristics', 0.8)
 
 
-def get_optimization(problem_data):
-    """This function is used to create the MILP model and optimize it.
-    First it creates the model, then the variables, constraints and Objective Function. And after that, it optimizes
-    and writes the output and results.
-    This function is used to load basic entities and some solver settings/parameters.
+def build_model(problem_data, engine: str = 'object', formulation: str = 'bigm',
+                log_file: str = 'output/model-gurobi.log') -> dict:
+    """This function is used to create the MILP model: variables, constraints and Objective Function.
+    Two build engines are available and both create the same model:
+    - 'object': one Variable object and one addConstr call per index (readable names, slow on large instances);
+    - 'matrix': one MVar per variable family and one sparse matrix per constraint family (Gurobi matrix API).
+    Three formulations of the sequencing are available:
+    - 'bigm': a precedence variable and two big-M rows for every pilot x pair of flights;
+    - 'windows': the time windows of the flights are preprocessed (see TimeWindows), so only the pairs with both orders
+      possible get precedence variables, and every row has the big-M of its own pair (only with the 'object' engine);
+    - 'bigm-windows': the same time windows, start time bounds and minimum connection of 'windows', but every pair of
+      flights gets precedence variables and all the rows have the same big-M (see UniformTimeWindows), the reference of
+      compare_formulations (only with the 'object' engine).
 
     :param problem_data: the input of the problem, processed in the ProblemData static class.
+    :param engine: str: 'object' or 'matrix'.
+    :param formulation: str: 'bigm', 'windows' or 'bigm-windows'.
+    :param log_file: str: The Gurobi log file.
 
     """
+    if engine not in ('object', 'matrix'):
+        raise ValueError(f'Unknown build engine: {engine}')
+    if formulation not in ('bigm', 'windows', 'bigm-windows'):
+        raise ValueError(f'Unknown formulation: {formulation}')
+    if engine == 'matrix' and formulation != 'bigm':
+        raise ValueError(f'The {formulation} formulation is only available with the object engine')
+
     model = Model('Crew Scheduling')
     model.setAttr(attrname='ModelSense', arg1=GRB.MAXIMIZE)
 
     """Parameters"""
-    set_parameters(model)
+    set_parameters(model, log_file=log_file)
 
     '''Basic Entities (lists)'''
     pilots = problem_data['pilots']
@@ -67,55 +110,377 @@ def get_optimization(problem_data):
     sic_table = problem_data['sic_table']
 
     '''Dictionaries'''
+    initial_date = ProblemData.get_initial_date(problem_data)
+    time_windows, pairs = None, None
+    if formulation != 'bigm':
+        windows = TimeWindows if formulation == 'windows' else UniformTimeWindows
+        time_windows = windows(flights, origin=initial_date, max_delay=ProblemData.MAX_FLIGHT_DELAY,
+                               min_connection=ProblemData.MIN_CONNECTION_TIME)
+        pairs = list(time_windows.pairs())
 
     """variables Section"""
-    start = timer()
-    flight_pilot_assignment_vars = create_flight_pilot_assignment_var(model=model, flights=flights, pilots=pilots)
-    # pilot_pairing_assignment_vars = create_pilot_pairing_assignment_var(model=model, pilots=pilots, pairings=pairings,
-    #                                                                     sic_table=sic_table)
+    with Instrumentation.span('build.variables', engine=engine, formulation=formulation) as variables_span:
+        if time_windows is not None:
+            flight_pilot_assignment_vars = create_flight_pilot_assignment_var(model=model, flights=flights,
+                                                                              pilots=pilots)
+            start_time_vars = create_windowed_start_time_var(model, flights=flights, pilots=pilots,
+                                                             time_windows=time_windows)
+            precedence_vars = create_windowed_precedence_var(model, pilots=pilots, time_windows=time_windows,
+                                                             pairs=pairs)
+        elif engine == 'matrix':
+            flight_pilot_assignment_vars = create_flight_pilot_assignment_block(model=model, flights=flights, pilots=pilots)
+            start_time_vars = create_start_time_block(model, flights=flights, pilots=pilots)
+            precedence_vars = create_precedence_block(model, flights=flights, pilots=pilots)
+        else:
+            flight_pilot_assignment_vars = create_flight_pilot_assignment_var(model=model, flights=flights,
+                                                                              pilots=pilots)
+            # pilot_pairing_assignment_vars = create_pilot_pairing_assignment_var(model=model, pilots=pilots, pairings=pairings,
+            #                                                                     sic_table=sic_table)
 
-    start_time_vars = create_start_time_var(model, flights=flights, pilots=pilots)
-    precedence_vars = create_precedence_var(model, flights=flights, pilots=pilots)
-    end = timer()
-    print(f'\tvariables creation time: {end - start} seconds')
+            start_time_vars = create_start_time_var(model, flights=flights, pilots=pilots)
+            precedence_vars = create_precedence_var(model, flights=flights, pilots=pilots)
+    print(f'\tvariables creation time: {variables_span.duration} seconds')
 
     """Constraints Section"""
-    start = timer()
-    # create_idle_pilots_constraint(model=model, pilots=pilots, flight_pilot_assignment_vars=flight_pilot_assignment_vars)
-    create_flight_pilot_assignment_constraint(model=model, flights=flights, pilots=pilots, flight_pilot_assignment_vars=flight_pilot_assignment_vars)
-    # create_pilot_pairing_assignment_constraint(model=model, pilots=pilots, pairings=pairings, pilot_pairing_assignment_vars=pilot_pairing_assignment_vars)
+    with Instrumentation.span('build.constraints', engine=engine, formulation=formulation) as constraints_span:
+        constraints = {}
+        if time_windows is not None:
+            constraints['flight_pilot_assignment'] = create_flight_pilot_assignment_constraint(
+                model=model, flights=flights, pilots=pilots, flight_pilot_assignment_vars=flight_pilot_assignment_vars)
+            constraints['incompatible_flights'] = create_incompatible_flights_constraint(
+                model, pilots=pilots, time_windows=time_windows,
+                flight_pilot_assignment_vars=flight_pilot_assignment_vars, pairs=pairs)
+            constraints['precedence_integrity'] = create_windowed_precedence_integrity_constraint(
+                model, pilots=pilots, time_windows=time_windows, precedence_vars=precedence_vars,
+                flight_pilot_assignment_vars=flight_pilot_assignment_vars, pairs=pairs)
+            constraints['precedence'] = create_windowed_precedence_constraint(
+                model, start_time_vars=start_time_vars, precedence_vars=precedence_vars, pilots=pilots,
+                time_windows=time_windows, flight_pilot_assignment_vars=flight_pilot_assignment_vars, pairs=pairs)
+        elif engine == 'matrix':
+            create_flight_pilot_assignment_matrix_constraint(model,
+                                                             flight_pilot_assignment_block=flight_pilot_assignment_vars)
+            create_precedence_integrity_matrix_constraint(model, precedence_block=precedence_vars)
+            create_precedence_matrix_constraint(model, start_time_block=start_time_vars,
+                                                precedence_block=precedence_vars, flights=flights)
+        else:
+            # create_idle_pilots_constraint(model=model, pilots=pilots, flight_pilot_assignment_vars=flight_pilot_assignment_vars)
+            create_flight_pilot_assignment_constraint(model=model, flights=flights, pilots=pilots, flight_pilot_assignment_vars=flight_pilot_assignment_vars)
+            # create_pilot_pairing_assignment_constraint(model=model, pilots=pilots, pairings=pairings, pilot_pairing_assignment_vars=pilot_pairing_assignment_vars)
 
-    create_precedence_integrity_constraint(model, pilots=pilots, flights=flights, precedence_vars=precedence_vars)
-    create_precedence_constraint(model, start_time_vars=start_time_vars, precedence_vars=precedence_vars, pilots=pilots, flights=flights)
+            create_precedence_integrity_constraint(model, pilots=pilots, flights=flights,
+                                                   precedence_vars=precedence_vars)
+            create_precedence_constraint(model, start_time_vars=start_time_vars, precedence_vars=precedence_vars, pilots=pilots, flights=flights)
 
-    end = timer()
-    print(f'\tConstraints creation time: {end - start} seconds')
+    print(f'\tConstraints creation time: {constraints_span.duration} seconds')
 
-    '''Optimization'''
-    clean_model(model)
-    model.write('output/model.lp')
-    try:
-        # If model is infeasible, let's find the conflicts.
-        model.computeIIS()
-        model.write("output/model.ilp")
-    except:
-        print('\tModel feasible')
+    with Instrumentation.span('build.update') as update_span:
+        if time_windows is not None:
+            set_delay_offset(model, start_time_vars=start_time_vars, time_windows=time_windows)
+        model.update()
+
+    return {'model': model, 'engine': engine, 'formulation': formulation, 'initial_date': initial_date,
+            'time_windows': time_windows,
+            'flight_pilot_assignment_vars': flight_pilot_assignment_vars, 'start_time_vars': start_time_vars,
+            'precedence_vars': precedence_vars, 'constraints': constraints,
+            'times': {'variables': variables_span.duration, 'constraints': constraints_span.duration,
+                      'update': update_span.duration}}
+
+
+def add_schedule_change_objective(build, problem_data) -> dict:
+    """Splits the Objective Function of build_model in hierarchical objectives, in the order of their priority:
+    - the covered flights (the coefficients of the assignment variables);
+    - the pilots whose schedule changed, each one penalized by ProblemData.PILOT_SCHEDULE_CHANGED;
+    - the delays of the flights (only in the windows formulations, see set_delay_offset).
+    The covered flights are integer, so their tolerance loses no flight, and the delays are the last objective: the
+    solver never leaves a flight uncovered to change fewer pilots, nor changes a pilot to delay fewer flights. The value
+    of the model is split between the objectives, so the Objective Function of the solution is computed from the roster
+    (see SolutionValues.get_objective).
+
+    :param build: dict: The model and the variables created by build_model.
+    :param problem_data: the input of the problem, processed in the ProblemData static class.
+
+    """
+    model = build['model']
+    pilots, flights = problem_data['pilots'], problem_data['flights']
+
+    pilot_schedule_changed_vars = create_pilot_schedule_changed_var(model, pilots=pilots)
+    create_pilot_schedule_changed_constraint(model, pilots=pilots, flights=flights,
+                                             flight_pilot_assignment_vars=build['flight_pilot_assignment_vars'],
+                                             pilot_schedule_changed_vars=pilot_schedule_changed_vars)
+
+    assignment_vars = build['flight_pilot_assignment_vars'].get_vars()
+    model.setObjectiveN(LinExpr(model.getAttr('Obj', assignment_vars), assignment_vars), index=0, priority=2,
+                        abstol=.5, name='CoveredFlights')
+    gurobi_vars = [var.variable for var in pilot_schedule_changed_vars.values()]
+    model.setObjectiveN(LinExpr([-ProblemData.PILOT_SCHEDULE_CHANGED] * len(gurobi_vars), gurobi_vars), index=1,
+                        priority=1, name='PilotScheduleChanged')
+    time_windows = build['time_windows']
+    if time_windows is not None:
+        start_time_vars = build['start_time_vars']
+        earliest = sum(time_windows.earliest[flight] for _, flight in start_time_vars.keys())
+        gurobi_vars = start_time_vars.get_vars()
+        delays = LinExpr([-ProblemData.FLIGHT_DELAY_PENALTY] * len(gurobi_vars), gurobi_vars)
+        model.setObjectiveN(delays + ProblemData.FLIGHT_DELAY_PENALTY * earliest, index=2, priority=0,
+                            name='FlightDelay')
+
+    build['pilot_schedule_changed_vars'] = pilot_schedule_changed_vars
+    return pilot_schedule_changed_vars
+
+
+def compare_build_engines(problem_data) -> dict:
+    """Builds the same model with both engines (without optimizing) and prints the build times side by side.
 
+    :param problem_data: the input of the problem, processed in the ProblemData static class.
+
+    """
+    builds = {engine: build_model(problem_data, engine=engine) for engine in ('object', 'matrix')}
+
+    print(f'\n\t{"Engine":<10}{"Vars":>10}{"Constrs":>10}{"Variables":>12}{"Constraints":>12}{"Update":>12}{"Total":>12}')
+    for engine, build in builds.items():
+        model, times = build['model'], build['times']
+        print(f'\t{engine:<10}{model.NumVars:>10}{model.NumConstrs:>10}{times["variables"]:>12.4f}'
+              f'{times["constraints"]:>12.4f}{times["update"]:>12.4f}{sum(times.values()):>12.4f}')
+
+    return {engine: build['times'] for engine, build in builds.items()}
+
+
+def compare_formulations(problem_data) -> dict:
+    """Builds the time windows problem with the preprocessed pairs ('windows') and with the uniform big-M of every pair
+    ('bigm-windows', the same start time bounds, so both models have the same optimum), and prints the model size and
+    the root bound of each one: the bound of the LP relaxation and the bound after the root node (with the cuts of the
+    solver).
+
+    :param problem_data: the input of the problem, processed in the ProblemData static class.
+
+    """
+    report = {}
+    for formulation in ('bigm-windows', 'windows'):
+        model = build_model(problem_data, formulation=formulation)['model']
+
+        relaxed = model.relax()
+        relaxed.setParam('OutputFlag', 0)
+        relaxed.optimize()
+
+        model.setParam('OutputFlag', 0)
+        model.setParam('NodeLimit', 1)
         model.optimize()
-        print(f'\n\n\tModel Objective Function: {model.getObjective().getValue():,.3f}')
-        model.write('output/model.sol')
-        model.write('output/model.mps')
-
-        for pilot in pilots:
-            print(f'{pilot}:')
-            last_end = ProblemData.INITIAL_DATE
-            for flight in flights:
-                var = flight_pilot_assignment_vars.data[pilot][flight]
-                var.flight.start = last_end
-                last_end = var.flight.end
-                if var.variable.X > 0:
-                    print(f'\t{var.flight} - {var.flight.start} - {var.flight.end}')
-            print()
-
-        write_solution(flight_pilot_assignment_vars, 'output/solution.xlsx')
-        visualize('output/solution.xlsx')
+
+        report[formulation] = {'vars': model.NumVars, 'binaries': model.NumBinVars, 'constrs': model.NumConstrs,
+                               'lp_bound': relaxed.ObjVal, 'root_bound': model.ObjBound}
+
+    print(f'\n\t{"Formulation":<14}{"Vars":>10}{"Binaries":>10}{"Constrs":>10}{"LP bound":>12}{"Root bound":>12}')
+    for formulation, row in report.items():
+        print(f'\t{formulation:<14}{row["vars"]:>10}{row["binaries"]:>10}{row["constrs"]:>10}'
+              f'{row["lp_bound"]:>12.3f}{row["root_bound"]:>12.3f}')
+
+    return report
+
+
+def compare_build_modes(problem_data, engine: str = 'object') -> dict:
+    """Builds the same model in the default and in the lean build (see ProblemData.LEAN_BUILD), writes the lp and mps
+    files of each one to a temporary directory, and prints the build time, the write time and the memory peak.
+    With the 'object' engine the build time is dominated by the expressions of the rows, not by the names, so the lean
+    build saves mostly in the write of the files.
+
+    :param problem_data: the input of the problem, processed in the ProblemData static class.
+    :param engine: str: build engine of the model, 'object' or 'matrix' (see build_model).
+
+    """
+    lean_build = ProblemData.LEAN_BUILD
+    report = {}
+    try:
+        for mode, lean in (('default', False), ('lean', True)):
+            ProblemData.LEAN_BUILD = lean
+            start = timer()
+            model = build_model(problem_data, engine=engine)['model']
+            build_time = timer() - start
+
+            with tempfile.TemporaryDirectory() as directory:
+                start = timer()
+                model.write(os.path.join(directory, 'model.lp'))
+                model.write(os.path.join(directory, 'model.mps'))
+                write_time = timer() - start
+
+            report[mode] = {'vars': model.NumVars, 'constrs': model.NumConstrs, 'build': build_time,
+                            'write': write_time}
+            model.dispose()
+
+            # The memory peak is measured in a second build, because tracemalloc slows the build down several times
+            tracemalloc.start()
+            build_model(problem_data, engine=engine)['model'].dispose()
+            report[mode]['peak_mb'] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+            tracemalloc.stop()
+    finally:
+        ProblemData.LEAN_BUILD = lean_build
+
+    print(f'\n\t{"Mode":<10}{"Vars":>10}{"Constrs":>10}{"Build":>12}{"Write":>12}{"Peak (MB)":>12}')
+    for mode, row in report.items():
+        print(f'\t{mode:<10}{row["vars"]:>10}{row["constrs"]:>10}{row["build"]:>12.4f}{row["write"]:>12.4f}'
+              f'{row["peak_mb"]:>12.2f}')
+
+    return report
+
+
+class GurobiBackend(SolverBackend):
+    """MILP model of build_model, optimized by Gurobi."""
+    NAME = 'gurobi'
+
+    def __init__(self, problem_data, engine: str = 'object', formulation: str = 'bigm', warm_start: bool = False,
+                 warm_start_hints: bool = False, write_model_files: bool = None, repair: bool = False,
+                 time_limit: float = None, log_file: str = 'output/model-gurobi.log', verbose: bool = True,
+                 heuristic: bool = False, heuristic_time_limit: float = None):
+        """
+        :param problem_data: the input of the problem, processed in the ProblemData static class.
+        :param engine: str: build engine of the model, 'object' or 'matrix' (see build_model).
+        :param formulation: str: formulation of the sequencing, 'bigm' or 'windows' (see build_model).
+        :param warm_start: bool: seed the solver with the original roster of the pilots (see set_warm_start).
+        :param warm_start_hints: bool: give the original roster as hints instead of a MIP start.
+        :param write_model_files: bool: write the lp, sol and mps files (by default, only when it is not a lean build).
+        :param repair: bool: when the model is infeasible, repair it with the smallest constraint violations (see
+            repair_feasibility) instead of computing the conflicts (IIS).
+        :param time_limit: float: Time limit of the solve, in seconds (the one of set_parameters when None).
+        :param log_file: str: The Gurobi log file.
+        :param verbose: bool: Print the log of Gurobi and the roster of the solution.
+        :param heuristic: bool: seed the solver with the roster of the RecoveryHeuristic instead of the original one.
+        :param heuristic_time_limit: float: Time limit of the heuristic, in seconds (a local optimum when None).
+
+        """
+        super().__init__(problem_data, time_limit=time_limit, verbose=verbose)
+        self.engine = engine
+        self.formulation = formulation
+        self.warm_start = warm_start
+        self.warm_start_hints = warm_start_hints
+        self.write_model_files = not ProblemData.LEAN_BUILD if write_model_files is None else write_model_files
+        self.repair = repair
+        self.log_file = log_file
+        self.heuristic = heuristic
+        self.heuristic_time_limit = heuristic_time_limit
+
+        self.model_build = None
+        self.model = None
+        self.values = None
+
+    def build(self) -> None:
+        """ """
+        self.model_build = build_model(self.problem_data, engine=self.engine, formulation=self.formulation,
+                                       log_file=self.log_file)
+        self.model = self.model_build['model']
+        if self.time_limit is not None:
+            self.model.setParam('TimeLimit', self.time_limit)
+        if not self.verbose:
+            self.model.setParam('LogToConsole', 0)
+
+    def get_size(self) -> dict:
+        """ """
+        model = self.model
+        return {'vars': model.NumVars, 'binaries': model.NumBinVars, 'constrs': model.NumConstrs,
+                'nonzeros': model.NumNZs}
+
+    def optimize(self) -> None:
+        """ """
+        model = self.model
+        if self.heuristic:
+            with Instrumentation.span('heuristic', backend=self.NAME) as span:
+                heuristic = RecoveryHeuristic(self.problem_data, time_windows=self.model_build['time_windows'])
+                roster = heuristic.solve(self.heuristic_time_limit)
+                span.counts.update(assigned=len(heuristic.assigned), moves=heuristic.moves)
+            set_warm_start(self.model_build, self.problem_data, hints=self.warm_start_hints, roster=roster)
+        elif self.warm_start:
+            set_warm_start(self.model_build, self.problem_data, hints=self.warm_start_hints)
+        if self.write_model_files:
+            model.write('output/model.lp')
+
+        # The IIS is computed only when the solver proves that the model is infeasible
+        self.values = None
+        model._first_incumbent = None
+        with Instrumentation.span('solve', backend=self.NAME, vars=model.NumVars, constrs=model.NumConstrs) as span:
+            model.optimize(Instrumentation.callback(first_incumbent_callback))
+            span.counts.update(status=model.Status, solutions=model.SolCount)
+        self.solve_time = span.duration
+        self.first_incumbent = model._first_incumbent
+        if is_infeasible(model):
+            print('\tModel infeasible')
+            with Instrumentation.span('feasibility', repair=self.repair):
+                if not self.repair:
+                    compute_conflicts(model, 'output/model.ilp' if self.write_model_files else None)
+                    self.status = INFEASIBLE
+                    return
+                repair_feasibility(model)
+        if model.SolCount == 0:
+            print(f'\tNo solution found (status {model.Status})')
+            self.status = NO_SOLUTION
+            return
+
+        self.status = OPTIMAL if model.Status == GRB.OPTIMAL else FEASIBLE
+        self.objective = model.ObjVal
+        self.bound = model.ObjBound if abs(model.ObjBound) < GRB.INFINITY else None
+        if self.write_model_files:
+            model.write('output/model.sol')
+            model.write('output/model.mps')
+        if not self.verbose:
+            return
+
+        print(f'\n\n\tModel Objective Function: {model.ObjVal:,.3f}')
+        print(f'\tTime to first incumbent: {model._first_incumbent} seconds')
+
+        print_roster(self.get_values().get_roster(), self.model_build['initial_date'])
+
+    def get_solution(self) -> Solution:
+        """ """
+        if self.objective is None:
+            return None
+        return Solution.from_values(self.get_values(), objective=self.objective)
+
+    def get_values(self) -> SolutionValues:
+        """Values of the optimized model, read once and shared by the printed roster and the solution."""
+        if self.values is None:
+            self.values = SolutionValues(self.model_build)
+        return self.values
+
+
+def get_optimization(problem_data, engine: str = 'object', formulation: str = 'bigm', warm_start: bool = False,
+                     warm_start_hints: bool = False, write_model_files: bool = None, repair: bool = False,
+                     excel: bool = False, backend: str = 'gurobi', time_limit: float = None,
+                     heuristic: bool = False, heuristic_time_limit: float = None) -> Solution:
+    """This function is used to create the model and optimize it, with the solver backend (see SolverBackend).
+    First it creates the model, then the variables, constraints and Objective Function. And after that, it optimizes
+    and writes the output and results.
+    This function is used to load basic entities and some solver settings/parameters.
+
+    :param problem_data: the input of the problem, processed in the ProblemData static class.
+    :param engine: str: build engine of the model, 'object' or 'matrix' (see build_model).
+    :param formulation: str: formulation of the sequencing, 'bigm' or 'windows' (see build_model).
+    :param warm_start: bool: seed the solver with the original roster of the pilots (see set_warm_start).
+    :param warm_start_hints: bool: give the original roster as hints instead of a MIP start.
+    :param write_model_files: bool: write the lp, sol and mps files (by default, only when it is not a lean build).
+    :param repair: bool: when the model is infeasible, repair it with the smallest constraint violations (see
+        repair_feasibility) instead of computing the conflicts (IIS).
+    :param excel: bool: also write the solution to xlsx (see write_solution).
+    :param backend: str: solver backend, 'gurobi', 'cpsat' or 'colgen' (the Gurobi options are only used by 'gurobi').
+    :param time_limit: float: time limit of the solve, in seconds (the default of the backend when None).
+    :param heuristic: bool: seed the solver with the roster of the recovery heuristic (see RecoveryHeuristic).
+    :param heuristic_time_limit: float: time limit of the heuristic, in seconds (a local optimum when None).
+
+    """
+    options = {}
+    if backend == GurobiBackend.NAME:
+        options = dict(engine=engine, formulation=formulation, warm_start=warm_start,
+                       warm_start_hints=warm_start_hints, write_model_files=write_model_files, repair=repair,
+                       heuristic=heuristic, heuristic_time_limit=heuristic_time_limit)
+    if time_limit is not None:
+        # Otherwise the backend keeps its own default (None is no limit for some backends)
+        options['time_limit'] = time_limit
+    solver = create_backend(backend, problem_data, **options)
+
+    solver.build()
+    solver.optimize()
+    if solver.objective is None:
+        return None
+
+    with Instrumentation.span('output', backend=solver.NAME) as span:
+        solution = solver.get_solution()
+        write_solution(solution, 'output/solution', excel=excel)
+        visualize(solution, background=True)
+        span.counts['assignments'] = len(solution)
+
+    return solution
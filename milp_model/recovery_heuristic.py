@@ -0,0 +1,302 @@
+# -*- coding: utf-8 -*-
+"""Recovery Heuristic
+
+This file is used to find a good roster of the disrupted problem in milliseconds, before the MIP. The search starts
+from the original roster of the pilots, repaired to be feasible (see get_original_roster), and:
+- the greedy phase assigns the uncovered flights, in the order of the departures, each one to the pilot that can fly it
+  with the least disruption;
+- the local search improves the roster with insert moves (an uncovered flight is assigned to a pilot, moving one of
+  the flights of the pilot to another pilot when they do not fit together), relocate moves (a flight goes to another
+  pilot, e.g. back to its original pilot) and swap moves (two pilots exchange flights).
+A roster is better when it has fewer uncovered flights, then fewer pilots whose flights changed, then fewer flights
+added to or removed from the original pairings. The flights of each pilot must fit in their time windows, in the order
+of the earliest starts (see sequence_flights), so every move keeps the roster feasible and the search can stop at a
+deadline with the best roster found. The roster is given to the MIP as a MIP start (see set_warm_start).
+"""
+from timeit import default_timer as timer
+
+from ProblemData import ProblemData
+from milp_model.solution import Solution, write_solution
+from milp_model.visualizer import visualize
+from milp_model.warm_start import get_original_roster
+from preprocessing.time_windows import TimeWindows
+
+
+class RecoveryHeuristic:
+    """Roster of the pilots, improved by the greedy phase and the local search moves."""
+
+    def __init__(self, problem_data, time_windows: TimeWindows = None):
+        """
+        :param problem_data: the input of the problem, processed in the ProblemData static class.
+        :param time_windows: TimeWindows: Time windows of the flights (computed from the problem when None).
+
+        """
+        self.pilots = problem_data['pilots']
+        self.flights = problem_data['flights']
+        if time_windows is None:
+            time_windows = TimeWindows(self.flights, origin=ProblemData.get_initial_date(problem_data),
+                                       max_delay=ProblemData.MAX_FLIGHT_DELAY,
+                                       min_connection=ProblemData.MIN_CONNECTION_TIME)
+        self.time_windows = time_windows
+
+        self.original = {p: set(p.original_pairing.flights if p.original_pairing else ()) for p in self.pilots}
+        self.owners = {}
+        for pilot, flights in self.original.items():
+            for flight in flights:
+                self.owners.setdefault(flight, []).append(pilot)
+        # Time a flight keeps its pilot busy: the duration and the minimum connection to the next flight
+        self.busy = {f: f.duration + time_windows.min_connection for f in self.flights}
+        self.candidates = self._get_candidates()
+        self.roster = {}
+        self.costs = {}
+        self.assigned = {}
+        for pilot, flights in get_original_roster(self.pilots, self.flights, time_windows).items():
+            self._set(pilot, flights)
+        self.moves = 0
+
+    def get_uncovered(self) -> list:
+        """Flights without a pilot, in the order of the earliest starts."""
+        return sorted((f for f in self.flights if f not in self.assigned), key=lambda x: self.time_windows.earliest[x])
+
+    def get_cost(self) -> tuple[int, int, int]:
+        """Uncovered flights, pilots whose flights changed and flights added to or removed from the original pairings."""
+        return (len(self.flights) - len(self.assigned), sum(c[0] for c in self.costs.values()),
+                sum(c[1] for c in self.costs.values()))
+
+    def get_schedule(self) -> dict:
+        """Flights of each pilot, as (start, flight), with each flight starting as soon as possible, in hours after the
+        initial date (see Solution.from_roster)."""
+        schedule = {}
+        for pilot, flights in self.roster.items():
+            schedule[pilot], last_end = [], float('-inf')
+            for flight in flights:
+                start = max(self.time_windows.earliest[flight], last_end)
+                schedule[pilot].append((start, flight))
+                last_end = start + self.busy[flight]
+        return schedule
+
+    def _cost(self, pilot, flights) -> tuple[int, int]:
+        """Disruption of the flights for the pilot: changed (0 or 1) and the flights added or removed."""
+        disruption = len(self.original[pilot].symmetric_difference(flights))
+        return int(disruption > 0), disruption
+
+    def _delta(self, *changes: tuple) -> tuple[int, int]:
+        """Change of the disruption when flights are removed from and added to some pilots, in O(1), so the moves that
+        do not reduce the disruption are discarded before their flights are sequenced.
+
+        :param changes: tuple: (pilot, removed flight, added flight) for each pilot, with None for no flight.
+
+        """
+        changed, disruption = 0, 0
+        for pilot, removed, added in changes:
+            original, (old_changed, old_disruption) = self.original[pilot], self.costs[pilot]
+            new_disruption = old_disruption
+            if removed is not None:
+                new_disruption += 1 if removed in original else -1
+            if added is not None:
+                new_disruption += -1 if added in original else 1
+            changed += int(new_disruption > 0) - old_changed
+            disruption += new_disruption - old_disruption
+        return changed, disruption
+
+    def _get_added(self) -> list:
+        """Assigned flights that are not in the original pairing of their pilot."""
+        return [f for f, pilot in self.assigned.items() if f not in self.original[pilot]]
+
+    def _get_candidates(self) -> dict:
+        """Pilots that can fly each flight (see Pilot.can_fly), grouped by base instead of testing every pair."""
+        bases = {}
+        for pilot in self.pilots:
+            bases.setdefault(pilot.base, []).append(pilot)
+        anywhere = bases.get(None, [])
+        candidates = {}
+        for flight in self.flights:
+            if flight.base is None:
+                candidates[flight] = self.pilots
+            else:
+                candidates[flight] = bases.get(flight.base, []) + anywhere
+        return candidates
+
+    def _sequence(self, flights) -> list:
+        """The flights in the order of the earliest starts, or None when they do not fit in their time windows (the
+        same test of sequence_flights, stopping at the first flight that does not fit)."""
+        earliest, latest, busy = self.time_windows.earliest, self.time_windows.latest, self.busy
+        flights = sorted(flights, key=earliest.__getitem__)
+        last_end = float('-inf')
+        for flight in flights:
+            start = max(earliest[flight], last_end)
+            if start > latest[flight]:
+                return None
+            last_end = start + busy[flight]
+        return flights
+
+    def _set(self, pilot, flights) -> None:
+        for flight in self.roster.get(pilot, ()):
+            self.assigned.pop(flight)
+        self.roster[pilot] = list(flights)
+        self.costs[pilot] = self._cost(pilot, flights)
+        for flight in flights:
+            self.assigned[flight] = pilot
+
+    def _apply(self, changes: dict) -> None:
+        for pilot in changes:
+            self._set(pilot, [])
+        for pilot, flights in changes.items():
+            self._set(pilot, flights)
+        self.moves += 1
+
+    def _assign(self, flight) -> bool:
+        """Assigns the uncovered flight to the pilot with the least increase of the disruption where it fits (ties go
+        to the pilot with fewer flights). Returns True when the flight was assigned."""
+        pilots = sorted(self.candidates[flight], key=lambda p: (*self._delta((p, None, flight)), len(self.roster[p])))
+        for pilot in pilots:
+            flights = self._sequence(self.roster[pilot] + [flight])
+            if flights is not None:
+                self._apply({pilot: flights})
+                return True
+        return False
+
+    def greedy(self, deadline: float = float('inf')) -> int:
+        """Assigns the uncovered flights, in the order of the departures (see _assign). Flights that do not fit in any
+        pilot stay uncovered. Returns the number of moves.
+
+        :param deadline: float: Time (timer) to stop.
+
+        """
+        moves = 0
+        for flight in self.get_uncovered():
+            if timer() > deadline:
+                break
+            moves += self._assign(flight)
+        return moves
+
+    def insert(self, deadline: float = float('inf')) -> int:
+        """Assigns the uncovered flights that fit in a pilot after one of its flights (one that overlaps the busy window
+        of the uncovered flight) is moved to another pilot. Returns the number of moves.
+
+        :param deadline: float: Time (timer) to stop.
+
+        """
+        moves = 0
+        for flight in self.get_uncovered():
+            if timer() > deadline:
+                break
+            if self._assign(flight):
+                moves += 1
+                continue
+            overlapping = set(self.time_windows.index.overlaps(flight))
+            moves += self._eject(flight, overlapping)
+        return moves
+
+    def _eject(self, flight, overlapping: set) -> bool:
+        for pilot in self.candidates[flight]:
+            for ejected in [f for f in self.roster[pilot] if f in overlapping]:
+                flights = self._sequence([f for f in self.roster[pilot] if f is not ejected] + [flight])
+                if flights is None:
+                    continue
+                for other in self.candidates[ejected]:
+                    other_flights = None if other is pilot else self._sequence(self.roster[other] + [ejected])
+                    if other_flights is not None:
+                        self._apply({pilot: flights, other: other_flights})
+                        return True
+        return False
+
+    def relocate(self, deadline: float = float('inf')) -> int:
+        """Moves flights to other pilots when it reduces the disruption: a flight out of the original pairing of its
+        pilot goes back to its original pilot or, when it is the only change of its pilot, to a pilot that is already
+        changed. Other relocations do not reduce the disruption. Returns the number of moves.
+
+        :param deadline: float: Time (timer) to stop.
+
+        """
+        moves = 0
+        for flight in self._get_added():
+            if timer() > deadline:
+                break
+            pilot = self.assigned[flight]
+            others = self.owners.get(flight, [])
+            if self.costs[pilot][1] == 1:
+                others = others + [p for p in self.candidates[flight] if self.costs[p][0]]
+            for other in others:
+                if other is pilot or self._delta((pilot, flight, None), (other, None, flight)) >= (0, 0):
+                    continue
+                other_flights = self._sequence(self.roster[other] + [flight])
+                if other_flights is not None:
+                    self._apply({pilot: [f for f in self.roster[pilot] if f is not flight], other: other_flights})
+                    moves += 1
+                    break
+        return moves
+
+    def swap(self, deadline: float = float('inf')) -> int:
+        """Exchanges flights of two pilots when it reduces the disruption. A swap reduces the disruption only when one
+        of the pilots gets back a flight of its original pairing, so a flight out of the original pairing of its pilot
+        is exchanged with the flights of its original pilot, or with the flights of the original pairing of its pilot.
+        Returns the number of moves.
+
+        :param deadline: float: Time (timer) to stop.
+
+        """
+        moves = 0
+        for flight1 in self._get_added():
+            if timer() > deadline:
+                break
+            pilot1 = self.assigned[flight1]
+            others = [f for p in self.owners.get(flight1, ()) for f in self.roster[p]]
+            for flight2 in others + [f for f in self.original[pilot1] if f in self.assigned]:
+                pilot2 = self.assigned[flight2]
+                if pilot1 is pilot2 or not pilot1.can_fly(flight2) or not pilot2.can_fly(flight1):
+                    continue
+                if self._delta((pilot1, flight1, flight2), (pilot2, flight2, flight1)) >= (0, 0):
+                    continue
+                flights1 = self._sequence([f for f in self.roster[pilot1] if f is not flight1] + [flight2])
+                flights2 = self._sequence([f for f in self.roster[pilot2] if f is not flight2] + [flight1])
+                if flights1 is not None and flights2 is not None:
+                    self._apply({pilot1: flights1, pilot2: flights2})
+                    moves += 1
+                    break
+        return moves
+
+    def solve(self, time_limit: float = None) -> dict:
+        """Runs the greedy phase and the passes of the local search until a pass makes no move or the time limit is
+        reached (anytime mode). Returns the flights of each pilot, the best roster found.
+
+        :param time_limit: float: Time limit, in seconds (the search runs to a local optimum when None).
+
+        """
+        start = timer()
+        deadline = float('inf') if time_limit is None else start + time_limit
+
+        self.greedy(deadline)
+        while timer() < deadline and self.insert(deadline) + self.relocate(deadline) + self.swap(deadline):
+            pass
+        end = timer()
+
+        uncovered, changed, disruption = self.get_cost()
+        print(f'\tRecovery heuristic: {len(self.flights) - uncovered} of {len(self.flights)} flights, {changed} changed '
+              f'pilots, {self.moves} moves in {end - start} seconds')
+        return self.roster
+
+
+def get_recovery_heuristic(problem_data, time_limit: float = None, write_output: bool = True) -> dict:
+    """This function is used to solve the problem with the recovery heuristic only, without the MIP.
+
+    :param problem_data: the input of the problem, processed in the ProblemData static class.
+    :param time_limit: float: Time limit of the search, in seconds (a local optimum when None).
+    :param write_output: bool: Write the solution and the chart to the output directory.
+
+    """
+    start = timer()
+    heuristic = RecoveryHeuristic(problem_data)
+    roster = heuristic.solve(time_limit)
+    end = timer()
+
+    uncovered, changed, disruption = heuristic.get_cost()
+    objective = len(heuristic.assigned)
+    if write_output:
+        solution = Solution.from_roster(heuristic.get_schedule(), objective=objective,
+                                        initial_date=ProblemData.get_initial_date(problem_data))
+        write_solution(solution, 'output/solution')
+        visualize(solution, background=True)
+
+    return {'roster': roster, 'objective': objective, 'uncovered': uncovered, 'changed': changed,
+            'disruption': disruption, 'moves': heuristic.moves, 'time': end - start}
@@ -0,0 +1,246 @@
+# -*- coding: utf-8 -*-
+"""Recovery Session
+
+This file is used to keep a recovery model alive between disruptions. The model is built once (with the time windows
+formulation) and the variables and constraints stay in memory. Each disruption event is applied to the model in place:
+- delay a flight: new bounds for the start times and new rows only for the pairs of the delayed flight;
+- cancel a flight: the assignment variables of the flight are fixed to zero;
+- remove a pilot: the assignment variables of the pilot are fixed to zero;
+- add a pilot: new columns for the pilot, linked to the existing assignment rows.
+After each event the model is re-optimized starting from the previous incumbent, so an event costs milliseconds
+instead of a full rebuild of the model. The session works on a variant of the instance (see ProblemInstance.derive), so
+the events never change the instance of the caller.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from timeit import default_timer as timer
+
+from Instrumentation import Instrumentation
+from milp_model.milp_model import build_model
+from milp_model.variables.variables_factory import create_flight_pilot_assignment_var
+from milp_model.variables.variables_factory import create_windowed_precedence_var
+from milp_model.variables.variables_factory import set_delay_offset
+from milp_model.constraints.constraints_factory import create_incompatible_flights_constraint
+from milp_model.constraints.constraints_factory import create_windowed_precedence_integrity_constraint
+from milp_model.constraints.constraints_factory import create_windowed_precedence_constraint
+
+
+class RecoverySession:
+    """Long-lived recovery model that receives disruption events."""
+
+    def __init__(self, problem_data):
+        """
+        :param problem_data: ProblemInstance: the input of the problem, processed in the ProblemData static class.
+
+        """
+        variant = problem_data.derive()
+        self.pilots = list(variant['pilots'])
+        self.flights = list(variant['flights'])
+        self.problem_data = dict(variant, pilots=self.pilots, flights=self.flights)
+        # The events can receive the entities of the original instance or of the session
+        self._pilots = dict(zip(problem_data['pilots'], self.pilots)) | {p: p for p in self.pilots}
+        self._flights = dict(zip(problem_data['flights'], self.flights)) | {f: f for f in self.flights}
+
+        build = build_model(self.problem_data, formulation='windows')
+        self.model = build['model']
+        self.model.setParam('LogToConsole', 0)
+        self.time_windows = build['time_windows']
+        self.flight_pilot_assignment_vars = build['flight_pilot_assignment_vars']
+        self.start_time_vars = build['start_time_vars']
+        self.precedence_vars = build['precedence_vars']
+        self.assignment_constrs = build['constraints']['flight_pilot_assignment']
+
+        self.cancelled = set()
+        self.removed = set()
+        # Values of the incumbent by Variable: a Gurobi variable is hashed by its index, which changes when variables
+        # are removed, while the Variable wrappers of the registries are stable between the events
+        self.incumbent = {}
+        self.events = []
+
+        # Rows of each pair of flights, to be replaced when one of the flights is delayed
+        self._pair_rows = defaultdict(list)
+        for family in ('incompatible_flights', 'precedence_integrity', 'precedence'):
+            self._register_rows(build['constraints'][family])
+
+    def _get_flight(self, flight):
+        """The flight of the session for a flight of the original instance."""
+        return self._flights[flight]
+
+    def _get_pilot(self, pilot):
+        """The pilot of the session for a pilot of the original instance (the pilot itself when it is a new pilot)."""
+        return self._pilots.get(pilot, pilot)
+
+    def _register_rows(self, constrs) -> None:
+        """ """
+        for (_, flight1, flight2), rows in constrs.items():
+            self._pair_rows[flight1, flight2].extend(rows)
+
+    def _add_pair_rows(self, pilots, pairs) -> None:
+        """Creates the precedence variables and the rows of the classified pairs for the pilots."""
+        create_windowed_precedence_var(self.model, pilots=pilots, time_windows=self.time_windows, pairs=pairs,
+                                       precedence_vars=self.precedence_vars)
+        self._register_rows(create_incompatible_flights_constraint(
+            self.model, pilots=pilots, time_windows=self.time_windows,
+            flight_pilot_assignment_vars=self.flight_pilot_assignment_vars, pairs=pairs))
+        self._register_rows(create_windowed_precedence_integrity_constraint(
+            self.model, pilots=pilots, time_windows=self.time_windows, precedence_vars=self.precedence_vars,
+            flight_pilot_assignment_vars=self.flight_pilot_assignment_vars, pairs=pairs))
+        self._register_rows(create_windowed_precedence_constraint(
+            self.model, start_time_vars=self.start_time_vars, precedence_vars=self.precedence_vars, pilots=pilots,
+            time_windows=self.time_windows, flight_pilot_assignment_vars=self.flight_pilot_assignment_vars,
+            pairs=pairs))
+
+    def _get_variables(self) -> list:
+        """Variables (the wrappers of the registries) that are in the model."""
+        return [*self.flight_pilot_assignment_vars.values(), *self.start_time_vars.values(),
+                *self.precedence_vars.values()]
+
+    def _log(self, event: str, start: float, reoptimize: bool) -> dict:
+        """ """
+        record = {'event': event, 'apply_ms': (timer() - start) * 1000}
+        if reoptimize:
+            record.update(self.reoptimize())
+        self.events.append(record)
+        return record
+
+    def optimize(self) -> dict:
+        """Optimizes the model and keeps the solution as the incumbent of the next events."""
+        start = timer()
+        # The events move windows and create start times, so the penalty of the earliest starts is given back again
+        set_delay_offset(self.model, start_time_vars=self.start_time_vars, time_windows=self.time_windows)
+        self.model.optimize(Instrumentation.callback())
+        solve_ms = (timer() - start) * 1000
+
+        objective = None
+        if self.model.SolCount > 0:
+            variables = self._get_variables()
+            self.incumbent = dict(zip(variables, self.model.getAttr('X', [var.variable for var in variables])))
+            objective = self.model.ObjVal
+        return {'objective': objective, 'status': self.model.Status, 'solve_ms': solve_ms}
+
+    def reoptimize(self) -> dict:
+        """Optimizes the model again, using the previous incumbent (clipped to the new bounds) as MIP start."""
+        self.model.update()
+        variables = list(self.incumbent)
+        if variables:
+            gurobi_vars = [var.variable for var in variables]
+            lower = self.model.getAttr('LB', gurobi_vars)
+            upper = self.model.getAttr('UB', gurobi_vars)
+            values = [min(max(self.incumbent[var], lb), ub) for var, lb, ub in zip(variables, lower, upper)]
+            self.model.setAttr('Start', gurobi_vars, values)
+        return self.optimize()
+
+    def delay_flight(self, flight, hours: float, reoptimize: bool = True) -> dict:
+        """Delays the flight: the time windows of the flight move, and the rows of its pairs are classified again.
+
+        :param flight: Flight: The delayed flight.
+        :param hours: float: The delay, in hours.
+        :param reoptimize: bool: Re-optimize the model after the event.
+
+        """
+        start = timer()
+        flight = self._get_flight(flight)
+        # Only the pairs with the flights swept by the delay can change
+        affected = self.time_windows.index.affected_by_delay(flight, hours)
+        flight.start = flight.start + timedelta(hours=hours)
+        self.time_windows.set_window(flight)
+        for pilot in self.pilots:
+            # Start times that are not created yet read the new window when they are created
+            var = self.start_time_vars.get((pilot, flight))
+            if var is not None:
+                var.variable.LB = self.time_windows.earliest[flight]
+                var.variable.UB = self.time_windows.latest[flight]
+
+        # Rows and precedence variables of the old pairs of the flight
+        old_pairs = [key for other in affected for key in ((flight, other), (other, flight)) if key in self._pair_rows]
+        self.model.remove([row for key in old_pairs for row in self._pair_rows.pop(key)])
+        for pilot in self.pilots:
+            keys = [key for other in affected for key in ((pilot, flight, other), (pilot, other, flight))]
+            removed = [self.precedence_vars.pop(key) for key in keys if key in self.precedence_vars]
+            for var in removed:
+                self.incumbent.pop(var, None)
+            self.model.remove([var.variable for var in removed])
+
+        self._add_pair_rows(self.pilots, list(self.time_windows.pairs_of(flight)))
+        return self._log(f'delay {flight} {hours:+}h', start, reoptimize)
+
+    def cancel_flight(self, flight, reoptimize: bool = True) -> dict:
+        """Cancels the flight: no pilot can be assigned to it.
+
+        :param flight: Flight: The cancelled flight.
+        :param reoptimize: bool: Re-optimize the model after the event.
+
+        """
+        start = timer()
+        flight = self._get_flight(flight)
+        self.cancelled.add(flight)
+        for pilot in self.pilots:
+            self.flight_pilot_assignment_vars[pilot, flight].variable.UB = 0
+        return self._log(f'cancel {flight}', start, reoptimize)
+
+    def remove_pilot(self, pilot, reoptimize: bool = True) -> dict:
+        """Removes the pilot (e.g. sick pilot): no flight can be assigned to the pilot.
+
+        :param pilot: Pilot: The removed pilot.
+        :param reoptimize: bool: Re-optimize the model after the event.
+
+        """
+        start = timer()
+        pilot = self._get_pilot(pilot)
+        self.removed.add(pilot)
+        for flight in self.flights:
+            self.flight_pilot_assignment_vars[pilot, flight].variable.UB = 0
+        return self._log(f'remove {pilot}', start, reoptimize)
+
+    def add_pilot(self, pilot, reoptimize: bool = True) -> dict:
+        """Adds a new pilot (e.g. reserve pilot) with its own variables and rows.
+
+        :param pilot: Pilot: The new pilot.
+        :param reoptimize: bool: Re-optimize the model after the event.
+
+        """
+        start = timer()
+        pilot = self._get_pilot(pilot)
+        if pilot in self.removed:
+            self.removed.discard(pilot)
+            for flight in self.flights:
+                if flight not in self.cancelled:
+                    self.flight_pilot_assignment_vars[pilot, flight].variable.UB = float(pilot.can_fly(flight))
+            return self._log(f'add {pilot}', start, reoptimize)
+
+        self.pilots.append(pilot)
+        self._pilots[pilot] = pilot
+        assignment_vars = create_flight_pilot_assignment_var(self.model, pilots=[pilot], flights=self.flights)
+        self.flight_pilot_assignment_vars.pilots.add(pilot)
+        self.flight_pilot_assignment_vars.update(assignment_vars)
+        self.start_time_vars.pilots.add(pilot)
+
+        self.model.update()
+        for flight in self.flights:
+            var = self.flight_pilot_assignment_vars[pilot, flight].variable
+            self.model.chgCoeff(self.assignment_constrs[flight], var, 1.0)
+            if flight in self.cancelled:
+                var.UB = 0
+
+        self._add_pair_rows([pilot], list(self.time_windows.pairs()))
+        return self._log(f'add {pilot}', start, reoptimize)
+
+    def get_roster(self) -> dict:
+        """Flights and start times (hours) of each pilot in the incumbent (the pilots and flights of the session)."""
+        roster = {}
+        for pilot in self.pilots:
+            flights = [f for f in self.flights
+                       if self.incumbent.get(self.flight_pilot_assignment_vars[pilot, f], 0) > .5]
+            starts = [self.start_time_vars.get((pilot, f)) for f in flights]
+            roster[pilot] = sorted(
+                (self.incumbent.get(var, 0.0) if var is not None else self.time_windows.earliest[f], f)
+                for var, f in zip(starts, flights))
+        return roster
+
+    def print_events(self) -> None:
+        """ """
+        print(f'\n\t{"Event":<30}{"Apply (ms)":>12}{"Solve (ms)":>12}{"Objective":>12}')
+        for record in self.events:
+            objective = record.get('objective')
+            print(f'\t{record["event"]:<30}{record["apply_ms"]:>12.2f}{record.get("solve_ms", 0):>12.2f}'
+                  f'{objective if objective is not None else float("nan"):>12.3f}')
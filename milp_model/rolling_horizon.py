@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""Rolling Horizon Script
+
+This file is used to solve the planning horizon in overlapping windows of days, instead of one monolithic MILP whose
+precedence block grows quadratically with the flights. Each window is built with the existing factories (time windows
+formulation) and optimized. The decisions of the first days of the window (the committed part) are fixed, and the end
+time of the last committed flight of each pilot is carried forward as the availability of the pilot in the next
+windows. The last days of the window (the overlap) are solved again in the next window. The committed parts are
+stitched into one schedule.
+"""
+from timeit import default_timer as timer
+
+from Instrumentation import Instrumentation
+from ProblemData import ProblemData
+from milp_model.milp_model import build_model
+from milp_model.solution import SolutionValues
+from milp_model.variables.variables_factory import set_delay_offset
+from milp_model.constraints.constraints_factory import create_pilot_availability_constraint
+
+
+def get_flight_day(flight, initial_date) -> int:
+    """Day of the scheduled departure of the flight, counted from the initial date.
+
+    :param flight: Flight: The flight.
+    :param initial_date: datetime: The initial date of the problem.
+
+    """
+    return (flight.start - initial_date).days
+
+
+def solve_window(problem_data, flights, availability: dict) -> dict:
+    """Builds and optimizes the model of a window. A pilot cannot start a flight before it is available, so the start
+    time of a flight flown by the pilot is bounded by its availability (see create_pilot_availability_constraint), and
+    flights that cannot start in time are forbidden.
+
+    :param problem_data: the input of the problem, processed in the ProblemData static class.
+    :param flights: list[Flight]: Flights of the window.
+    :param availability: dict: Time (hours) when each pilot is available again.
+
+    """
+    build = build_model(dict(problem_data, flights=flights), formulation='windows')
+    model = build['model']
+    model.setParam('LogToConsole', 0)
+    time_windows = build['time_windows']
+
+    waits = {}
+    for pilot in problem_data['pilots']:
+        available = availability.get(pilot, 0.0)
+        for flight in flights:
+            if available <= time_windows.earliest[flight]:
+                continue
+            if available > time_windows.latest[flight]:
+                build['flight_pilot_assignment_vars'][pilot, flight].variable.UB = 0
+            else:
+                waits[pilot, flight] = available
+    create_pilot_availability_constraint(model, availability=waits, time_windows=time_windows,
+                                         start_time_vars=build['start_time_vars'],
+                                         flight_pilot_assignment_vars=build['flight_pilot_assignment_vars'])
+    # The rows can create start times, so the penalty of their earliest starts is given back again
+    set_delay_offset(model, start_time_vars=build['start_time_vars'], time_windows=time_windows)
+
+    model.optimize(Instrumentation.callback())
+
+    assignments = {}
+    if model.SolCount > 0:
+        values = SolutionValues(build)
+        for pilot, flight in values.get_assignments():
+            assignments[flight] = (pilot, values.get_start_time(pilot, flight))
+    return assignments
+
+
+def get_rolling_horizon(problem_data, window_size: int = 2, overlap: int = 1, compare_monolithic: bool = False) -> dict:
+    """This function is used to solve the problem with a rolling horizon of windows of days.
+
+    :param problem_data: the input of the problem, processed in the ProblemData static class.
+    :param window_size: int: Number of days of each window.
+    :param overlap: int: Number of days of each window that are solved again in the next window.
+    :param compare_monolithic: bool: Solve the monolithic model too, and report the quality gap.
+
+    """
+    if not 0 <= overlap < window_size:
+        raise ValueError('The overlap must be smaller than the window size')
+
+    flights = problem_data['flights']
+    initial_date = ProblemData.get_initial_date(problem_data)
+    days = {f: get_flight_day(f, initial_date) for f in flights}
+    last_day = max(days.values(), default=0)
+    step = window_size - overlap
+
+    start = timer()
+    availability = {}
+    committed = {}
+    n_windows = 0
+    for first_day in range(min(days.values(), default=0), last_day + 1, step):
+        # The last window commits all its days
+        commit_until = first_day + step if first_day + window_size <= last_day else last_day + 1
+        window = [f for f in flights if first_day <= days[f] < first_day + window_size and f not in committed]
+        if not window:
+            continue
+
+        n_windows += 1
+        assignments = solve_window(problem_data, window, availability)
+        for flight in window:
+            if days[flight] >= commit_until:
+                continue
+            committed[flight] = assignments.get(flight)
+            if committed[flight] is not None:
+                pilot, flight_start = committed[flight]
+                ready = flight_start + flight.duration + ProblemData.MIN_CONNECTION_TIME
+                availability[pilot] = max(availability.get(pilot, 0.0), ready)
+        if commit_until > last_day:
+            break
+    end = timer()
+
+    roster = {pilot: [] for pilot in problem_data['pilots']}
+    for flight, assignment in committed.items():
+        if assignment is not None:
+            pilot, flight_start = assignment
+            roster[pilot].append((flight_start, flight))
+    for pilot in roster:
+        roster[pilot].sort(key=lambda x: x[0])
+
+    # The same Objective Function of the model: the assigned flights and the penalty of the delays
+    delays = sum(start - (flight.start - initial_date).total_seconds() / 3600
+                 for flights in roster.values() for start, flight in flights)
+    objective = sum(len(x) for x in roster.values()) - ProblemData.FLIGHT_DELAY_PENALTY * delays
+    print(f'\tRolling horizon: {n_windows} windows of {window_size} days ({overlap} overlap), '
+          f'objective {objective:,.3f} in {end - start} seconds')
+    result = {'roster': roster, 'objective': objective, 'windows': n_windows, 'time': end - start}
+
+    if compare_monolithic:
+        start = timer()
+        build = build_model(problem_data, formulation='windows')
+        build['model'].setParam('LogToConsole', 0)
+        build['model'].optimize(Instrumentation.callback())
+        end = timer()
+
+        monolithic = SolutionValues(build).get_objective()
+        gap = (monolithic - objective) / abs(monolithic) if monolithic else 0.0
+        print(f'\tMonolithic: objective {monolithic:,.3f} in {end - start} seconds, rolling horizon gap {gap:.2%}')
+        result.update({'monolithic_objective': monolithic, 'monolithic_time': end - start, 'gap': gap})
+
+    return result
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+"""Scenarios Script
+
+This file is used to answer what-if questions in batch. A scenario is a list of disruption events applied to a shared
+base instance (the base is processed only once):
+- {"type": "delay", "flight": "AZU123", "hours": 2}
+- {"type": "cancel", "flight": "AZU123"}
+- {"type": "sick", "pilot": "Mary"}
+Each scenario is solved in a worker process, covering the most flights with the fewest changed pilots and then the
+fewest delays, and the results are compared in a single table with the objective (computed from the roster), the
+pilots whose schedule changed, the uncovered flights and the solve time of each scenario. A pilot is changed when its
+flights are not the flights of its original pairing that are still in the scenario (a cancelled flight alone is not a
+change), and a sick pilot with flights is always changed.
+"""
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from timeit import default_timer as timer
+
+import pandas as pd
+
+from Instrumentation import Instrumentation
+from milp_model.milp_model import build_model, add_schedule_change_objective
+from milp_model.solution import SolutionValues
+
+_BASE = None
+
+
+def read_scenarios(filename: str) -> list[dict]:
+    """Reads the scenarios from a JSON file: a list of {"name": ..., "events": [...]}.
+
+    :param filename: str: The JSON file.
+
+    """
+    with open(filename) as file:
+        return json.load(file)
+
+
+def apply_scenario(problem_data, scenario: dict):
+    """Variant of the problem with the events of the scenario applied. The base problem is not changed, and the variant
+    is derived copy on write (see ProblemInstance.derive), so only the changed columns of the flights are copied.
+
+    :param problem_data: ProblemInstance: the input of the problem, processed in the ProblemData static class.
+    :param scenario: dict: The scenario.
+
+    """
+    problem_data = problem_data.derive()
+    flights = {f.name: f for f in problem_data['flights']}
+    pilots = {p.name: p for p in problem_data['pilots']}
+
+    for event in scenario['events']:
+        if event['type'] == 'delay':
+            flight = flights[event['flight']]
+            flight.start = flight.start + timedelta(hours=event['hours'])
+        elif event['type'] == 'cancel':
+            flights.pop(event['flight'])
+        elif event['type'] == 'sick':
+            pilots.pop(event['pilot'])
+        else:
+            raise ValueError(f'Unknown event type: {event["type"]}')
+
+    problem_data['flights'] = [f for f in problem_data['flights'] if f.name in flights]
+    problem_data['pilots'] = [p for p in problem_data['pilots'] if p.name in pilots]
+    return problem_data
+
+
+def _init_worker(problem_data) -> None:
+    """Receives the base instance once per worker process."""
+    global _BASE
+    _BASE = problem_data
+
+
+def solve_scenario(scenario: dict, threads: int = 1) -> dict:
+    """Builds and optimizes the model of a scenario over the base instance of the worker.
+
+    :param scenario: dict: The scenario.
+    :param threads: int: Gurobi threads of the worker.
+
+    """
+    problem_data = apply_scenario(_BASE, scenario)
+    name = scenario['name']
+
+    start = timer()
+    build = build_model(problem_data, formulation='windows', log_file=f'output/model-gurobi-{name}.log')
+    add_schedule_change_objective(build, problem_data)
+    model = build['model']
+    model.setParam('Threads', threads)
+    model.setParam('LogToConsole', 0)
+    model.optimize(Instrumentation.callback())
+    end = timer()
+
+    # By name, over the pilots of the base instance, so the sick pilots are compared too (with no flights)
+    assigned = {pilot.name: set() for pilot in _BASE['pilots']}
+    objective = None
+    if model.SolCount > 0:
+        values = SolutionValues(build)
+        objective = values.get_objective()
+        for pilot, flight in values.get_assignments():
+            assigned[pilot.name].add(flight.name)
+
+    remaining = {f.name for f in problem_data['flights']}
+    original = {p.name: remaining.intersection(f.name for f in (p.original_pairing.flights if p.original_pairing else ()))
+                for p in _BASE['pilots']}
+    changed = [name for name, flights in assigned.items() if flights != original[name]]
+    covered = set().union(*assigned.values())
+    uncovered = [f.name for f in problem_data['flights'] if f.name not in covered]
+
+    return {'Scenario': name, 'Objective': objective,
+            'Changed Pilots': len(changed), 'Uncovered Flights': len(uncovered),
+            'Changed': ', '.join(changed), 'Uncovered': ', '.join(uncovered), 'Solve Time': end - start}
+
+
+def run_scenarios(problem_data, scenarios: list[dict], max_workers: int = None,
+                  filename: str = 'output/scenarios.csv') -> pd.DataFrame:
+    """Solves all the scenarios in parallel and writes the comparative table.
+
+    :param problem_data: the base instance, processed in the ProblemData static class.
+    :param scenarios: list[dict]: The scenarios.
+    :param max_workers: int: Number of worker processes (the number of cores when None).
+    :param filename: str: The csv file of the table.
+
+    """
+    cores = os.cpu_count() or 1
+    workers = max(1, min(len(scenarios), max_workers or cores))
+    threads = max(1, cores // workers)
+
+    start = timer()
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                             initargs=(problem_data,)) as executor:
+        rows = list(executor.map(solve_scenario, scenarios, [threads] * len(scenarios)))
+    end = timer()
+
+    df = pd.DataFrame(rows)
+    df.to_csv(filename, index=False)
+    print(df.drop(columns=['Changed', 'Uncovered']).to_string(index=False))
+    print(f'\n\t{len(scenarios)} scenarios with {workers} workers in {end - start} seconds')
+
+    return df
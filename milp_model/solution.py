@@ -5,112 +5,219 @@ This file is used to create and define useful functions to help the analysis of
 functions to calculate statistics and write files.
 """
 
-from gurobipy import Model, GRB, Var, LinExpr
-import pandas as pd
-from openpyxl import load_workbook
-
-
-def clean_model(m: Model) -> None:
-    """From https://support.gurobi.com/hc/en-us/community/posts/360048150752-Remove-variables-with-0-coefficient-in-the-LP-file
-    This function removes variables that are not used in the model. It is useful to reduce the size of the model.
+from datetime import datetime, timedelta
+from typing import Self
 
-    :param m: Model: Gurobi model to have the unused variables removed.
+import numpy as np
+import pandas as pd
+from openpyxl.utils import get_column_letter
+
+from ProblemData import ProblemData
+
+
+class SolutionValues:
+    """Values of the variables of an optimized model. Each variable family (assignments and start times) is read with
+    one getAttr call into a NumPy array, instead of one attribute read for each variable, and the timeline of each pilot
+    is rebuilt from the optimized start times. The flights of the problem are not changed, so the same values are the
+    source of the printed roster, of the Solution and of the visualizer."""
+
+    def __init__(self, build: dict):
+        """
+        :param build: dict: The optimized model and the variables created by build_model.
+
+        """
+        self.model = build['model']
+        self.initial_date = build['initial_date']
+        self.time_windows = build['time_windows']
+
+        self.assignment_vars = build['flight_pilot_assignment_vars']
+        self.keys = list(self.assignment_vars.keys())
+        self.vars = self.assignment_vars.get_vars()
+        self.x = self.get_values(self.vars)
+        # Positions of the assignments that are set in the solution
+        self.assigned = np.flatnonzero(self.x > .5)
+
+        start_time_vars = build['start_time_vars']
+        self.start_times = dict(zip(start_time_vars.keys(), self.get_values(start_time_vars.get_vars()).tolist()))
+
+    def get_values(self, variables: list, attr: str = 'X') -> np.ndarray:
+        """Attribute of the variables, read at once.
+
+        :param variables: list[Var]: The Gurobi variables.
+        :param attr: str: The attribute (e.g. 'X', 'Obj', 'LB').
+
+        """
+        if not variables:
+            return np.zeros(0)
+        return np.asarray(self.model.getAttr(attr, variables), dtype=float)
+
+    def get_start_time(self, pilot, flight) -> float:
+        """Start time (hours after the initial date) of the flight for the pilot.
+
+        In the 'bigm' formulation (no time windows) the start time variables only order the flights of a pilot, they are
+        not bounded by the departures, so the flight starts at its scheduled departure. In the 'windows' formulation it
+        is the optimized start time. The start time variables are created on their first reference (see
+        VariableRegistry), so a flight that is not sequenced with any other flight of the pilot has no variable, and it
+        starts at the earliest start of its time window.
+
+        :param pilot: Pilot: The pilot.
+        :param flight: Flight: The flight.
+
+        """
+        if self.time_windows is None:
+            return (flight.start - self.initial_date).total_seconds() / 3600
+        start = self.start_times.get((pilot, flight))
+        if start is not None:
+            return start
+        return self.time_windows.earliest[flight]
+
+    def get_objective(self) -> float:
+        """Objective Function of the solution, computed from the roster: the coefficients of the assignments that are
+        set, less the delay penalty of the assigned flights. The start times of the pilots and flights that are not
+        assigned are free in the model, so their delays are not counted."""
+        objective = self.get_values([self.vars[i] for i in self.assigned.tolist()], 'Obj').sum()
+        if self.time_windows is None:
+            return float(objective)
+        delay = sum(self.get_start_time(pilot, flight) - self.time_windows.earliest[flight]
+                    for pilot, flight in self.get_assignments())
+        return float(objective - ProblemData.FLIGHT_DELAY_PENALTY * delay)
+
+    def get_assignments(self) -> list[tuple]:
+        """Assignments (pilot, flight) that are set in the solution."""
+        return [self.keys[i] for i in self.assigned.tolist()]
+
+    def get_roster(self) -> dict:
+        """Flights of each pilot in the solution, as (start, flight), with the start in hours after the initial date."""
+        roster = {pilot: [] for pilot, _ in self.keys}
+        for pilot, flight in self.get_assignments():
+            roster[pilot].append((self.get_start_time(pilot, flight), flight))
+        return {pilot: sorted(flights, key=lambda x: x[0]) for pilot, flights in roster.items()}
+
+
+def print_roster(roster: dict, initial_date: datetime = None) -> None:
+    """Prints the timeline of each pilot.
+
+    :param roster: dict: For each pilot, a list of (start, flight), with the start in hours after the initial date.
+    :param initial_date: datetime: Origin of the start times (ProblemData.INITIAL_DATE when None).
 
     """
-    m.update()
-
-    gcfuncs = {
-        GRB.GENCONSTR_MAX: m.getGenConstrMax,
-        GRB.GENCONSTR_MIN: m.getGenConstrMin,
-        GRB.GENCONSTR_ABS: m.getGenConstrAbs,
-        GRB.GENCONSTR_AND: m.getGenConstrAnd,
-        GRB.GENCONSTR_OR: m.getGenConstrOr,
-        GRB.GENCONSTR_NORM: m.getGenConstrNorm,
-        GRB.GENCONSTR_INDICATOR: m.getGenConstrIndicator,
-        GRB.GENCONSTR_PWL: m.getGenConstrPWL,
-        GRB.GENCONSTR_POLY: m.getGenConstrPoly,
-        GRB.GENCONSTR_EXP: m.getGenConstrExp,
-        GRB.GENCONSTR_EXPA: m.getGenConstrExpA,
-        GRB.GENCONSTR_LOG: m.getGenConstrLog,
-        GRB.GENCONSTR_LOGA: m.getGenConstrLogA,
-        GRB.GENCONSTR_LOGISTIC: m.getGenConstrLogistic,
-        GRB.GENCONSTR_POW: m.getGenConstrPow,
-        GRB.GENCONSTR_SIN: m.getGenConstrSin,
-        GRB.GENCONSTR_COS: m.getGenConstrCos,
-        GRB.GENCONSTR_TAN: m.getGenConstrTan,
-    }
-
-    # Indices of variables participating in general constraints
-    gcvars = set()
-
-    for gc in m.getGenConstrs():
-        retvals = gcfuncs[gc.GenConstrType](gc)
-
-        # Vars are found in return values of type Var, LinExpr, and List[Var]
-        for rv in retvals:
-            if isinstance(rv, Var):
-                gcvars.add(rv.index)
-            elif isinstance(rv, LinExpr):
-                for i in range(rv.size()):
-                    gcvars.add(rv.getVar(i).index)
-            elif isinstance(rv, list) and len(rv) > 0 and isinstance(rv[0], Var):
-                for v in rv:
-                    gcvars.add(v.index)
-
-    to_remove = [v for v in m.getVars() if not m.getCol(v).size() and not v.Obj and v.index not in gcvars]
-    m.remove(to_remove)
-    print(f"Removed {len(to_remove)} unused variables")
-
-
-def get_var_details(var: Var) -> list[object]:
-    """Returns the specified attributes of a variable object.
-
-    :param var: Var: Optimized variable.
+    initial_date = initial_date or ProblemData.INITIAL_DATE
+    for pilot, flights in roster.items():
+        print(f'{pilot}:')
+        for start, flight in flights:
+            start = initial_date + timedelta(hours=start)
+            print(f'\t{flight} - {start} - {start + timedelta(hours=flight.duration)}')
+        print()
+
+
+class Solution:
+    """Solution of the optimization kept in memory, with one row for each flight assigned to a pilot. The columns have
+    fixed types, so the writers and the visualizer receive the same DataFrame and nothing is read back from disk."""
+    COLUMNS = {'Flight': 'string', 'Pilot': 'category', 'Base': 'category', 'Duration': 'float64',
+               'Start': 'datetime64[ns]', 'End': 'datetime64[ns]'}
+    VAR_COLUMNS = {'Value': 'float64', 'ObjCoef': 'float64', 'VarName': 'string', 'LB': 'float64', 'UB': 'float64'}
+
+    def __init__(self, df: pd.DataFrame, objective: float = None):
+        """
+        :param df: pd.DataFrame: One row for each assignment, with the COLUMNS (and optionally the VAR_COLUMNS).
+        :param objective: float: Objective Function of the solution.
+
+        """
+        types = {c: t for c, t in (self.COLUMNS | self.VAR_COLUMNS).items() if c in df.columns}
+        self.df = df.astype(types).sort_values(['Pilot', 'Start'], ignore_index=True)
+        self.objective = objective
+
+    def __len__(self):
+        return len(self.df)
+
+    @classmethod
+    def from_values(cls, values: SolutionValues, objective: float = None) -> Self:
+        """Solution with the assignment variables that are set in the optimized model. The attributes of the set
+        variables are read with one getAttr call each, and the start and end come from the optimized start times.
+
+        :param values: SolutionValues: The values of the optimized model.
+        :param objective: float: Objective Function of the solution.
+
+        """
+        assignments = values.get_assignments()
+        variables = [values.vars[i] for i in values.assigned.tolist()]
+        if ProblemData.LEAN_BUILD:
+            # In the lean build the Gurobi variable has no name, so the readable name is formatted here, on demand
+            names = [values.assignment_vars[key].name for key in assignments]
+        else:
+            names = values.model.getAttr('VarName', variables) if variables else []
+
+        duration = np.array([flight.duration for _, flight in assignments], dtype=float)
+        start = np.array([values.get_start_time(pilot, flight) for pilot, flight in assignments], dtype=float)
+        start = (pd.Timestamp(values.initial_date) + pd.to_timedelta(start, unit='h')).round('s')
+        df = pd.DataFrame({
+            'Flight': [flight.name for _, flight in assignments],
+            'Pilot': [pilot.name for pilot, _ in assignments],
+            'Base': [pilot.base for pilot, _ in assignments],
+            'Duration': duration,
+            'Start': start,
+            'End': start + pd.to_timedelta(duration, unit='h'),
+            'Value': values.x[values.assigned],
+            'ObjCoef': values.get_values(variables, 'Obj'),
+            'VarName': names,
+            'LB': values.get_values(variables, 'LB'),
+            'UB': values.get_values(variables, 'UB'),
+        })
+
+        return cls(df, objective=objective)
+
+    @classmethod
+    def from_roster(cls, roster, objective: float = None, initial_date: datetime = None) -> Self:
+        """Solution of a roster that is not read from the variables of a model (e.g. merged from several models).
+
+        :param roster: dict: For each pilot, a list of (start, flight), with the start in hours after the initial date.
+        :param objective: float: Objective Function of the solution.
+        :param initial_date: datetime: Origin of the start times (ProblemData.INITIAL_DATE when None).
+
+        """
+        initial_date = initial_date or ProblemData.INITIAL_DATE
+        rows = []
+        for pilot, flights in roster.items():
+            for start, flight in flights:
+                start = initial_date + timedelta(hours=start)
+                rows.append([flight.name, pilot.name, pilot.base, flight.duration, start,
+                             start + timedelta(hours=flight.duration)])
+
+        return cls(pd.DataFrame(rows, columns=list(cls.COLUMNS)), objective=objective)
+
+
+def write_solution(solution: Solution, filename: str = 'output/solution', excel: bool = False) -> list[str]:
+    """Writes the solution to Parquet and CSV and, optionally, to xlsx. Returns the written files.
+
+    :param solution: Solution: The solution.
+    :param filename: str: Name of the files, without the extension.
+    :param excel: bool: Also write the xlsx file (slower, for the analysts).
 
     """
-    return [var.X, var.Obj, var.VarName, var.LB, var.UB]
-
+    files = [f'{filename}.parquet', f'{filename}.csv']
+    solution.df.to_parquet(files[0], index=False)
+    solution.df.to_csv(files[1], index=False)
+    if excel:
+        files.append(write_excel(solution.df, f'{filename}.xlsx'))
 
-def get_var_columns() -> list[str]:
-    """ """
-    return ['Value', 'ObjCoef', 'VarName', 'LB', 'UB']
+    return files
 
 
-def write_solution(flight_pilot_assignment_vars, filename):
-    rows = []
-    for value in flight_pilot_assignment_vars.values():
-        var = value.variable
-        if var.X == 0:
-            continue
-        rows.append(
-            [value.flight.name, value.pilot.name, value.flight.duration, value.flight.start, value.flight.end] +
-            get_var_details(var))
+def write_excel(df: pd.DataFrame, filename: str, sheet_name: str = 'Flights') -> str:
+    """Writes the DataFrame to xlsx, with filters and sized columns. The width of each column is computed from the
+    DataFrame (the longest value or header), without reading the cells of the workbook back.
 
-    df = pd.DataFrame(rows, columns=['Flight', 'Pilot', 'Duration', 'Start', 'End'] + get_var_columns())
+    :param df: pd.DataFrame: The table.
+    :param filename: str: Name of the xlsx file.
+    :param sheet_name: str: Name of the sheet.
 
-    with pd.ExcelWriter(filename) as writer:
-        df.to_excel(writer, sheet_name="Flights", index=False)
-
-    df.to_csv('output/solution.csv', index=False)
-
-    wb = load_workbook(filename)
-
-    for sheet_name in wb.sheetnames:
-        ws = wb[sheet_name]
+    """
+    with pd.ExcelWriter(filename, engine='openpyxl') as writer:
+        df.to_excel(writer, sheet_name=sheet_name, index=False)
+        ws = writer.sheets[sheet_name]
         ws.auto_filter.ref = ws.dimensions
-        for col in ws.columns:
-            max_length = 0
-            column = col[0].column_letter  # Get the column name
-            for cell in col:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(cell.value)
-                except:
-                    pass
-            adjusted_width = (max_length + 2)
-            ws.column_dimensions[column].width = adjusted_width
-
-    # Save the workbook
-    wb.save(filename)
-
-    return df
+        for i, column in enumerate(df.columns, start=1):
+            width = max(len(str(column)), df[column].astype(str).str.len().max() if len(df) else 0)
+            ws.column_dimensions[get_column_letter(i)].width = width + 2
+
+    return filename
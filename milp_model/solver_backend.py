@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+"""Solver Backend
+
+This file is used to define the interface between the optimization and the solver engines. A backend builds its own
+model of the problem, optimizes it and returns the assignments in the common Solution format, so get_optimization, the
+writers and the visualizer do not depend on the engine. The backends are registered by name in BACKENDS and imported
+only when they are created, so an engine whose package is not installed does not break the others:
+- 'gurobi': the MILP model of build_model, solved by Gurobi (see GurobiBackend);
+- 'cpsat': a scheduling model with optional interval variables and a NoOverlap constraint per pilot, solved by the
+  open-source OR-Tools CP-SAT solver (see CPSatBackend);
+- 'colgen': the pilot-pairing model, solved by column generation (see ColumnGenerationBackend). Its Objective Function
+  is the one of the pilot-pairing model, so it is not compared with the objectives of the other backends.
+"""
+import importlib
+from abc import ABC, abstractmethod
+
+# Module and class of each backend
+BACKENDS = {
+    'gurobi': ('milp_model.milp_model', 'GurobiBackend'),
+    'cpsat': ('cp_model.cp_model', 'CPSatBackend'),
+    'colgen': ('milp_model.column_generation', 'ColumnGenerationBackend'),
+}
+
+OPTIMAL = 'optimal'
+FEASIBLE = 'feasible'
+INFEASIBLE = 'infeasible'
+NO_SOLUTION = 'no solution'
+
+
+class SolverBackend(ABC):
+    """Main abstract class for the solver backends. After optimize, the status is one of OPTIMAL, FEASIBLE, INFEASIBLE
+    or NO_SOLUTION, and the objective, bound, time to the first incumbent and solve time are set."""
+    NAME = None
+
+    def __init__(self, problem_data, time_limit: float = None, verbose: bool = True):
+        """
+        :param problem_data: the input of the problem, processed in the ProblemData static class.
+        :param time_limit: float: Time limit of the solve, in seconds (the default of the engine when None).
+        :param verbose: bool: Print the log of the engine and the roster of the solution.
+
+        """
+        self.problem_data = problem_data
+        self.time_limit = time_limit
+        self.verbose = verbose
+
+        self.status = None
+        self.objective = None
+        self.bound = None
+        self.first_incumbent = None
+        self.solve_time = None
+
+    @property
+    def gap(self) -> float:
+        """Relative gap between the objective and the bound (None without a solution)."""
+        if self.objective is None or self.bound is None:
+            return None
+        return abs(self.bound - self.objective) / max(abs(self.objective), 1e-10)
+
+    @abstractmethod
+    def build(self) -> None:
+        """Creates the model of the problem."""
+        pass
+
+    @abstractmethod
+    def get_size(self) -> dict:
+        """Size of the built model: the number of variables and constraints, and other counts of the engine."""
+        pass
+
+    @abstractmethod
+    def optimize(self) -> None:
+        """Optimizes the built model and sets the status and the statistics of the solve."""
+        pass
+
+    @abstractmethod
+    def get_solution(self):
+        """Solution of the optimized model (None when no solution was found)."""
+        pass
+
+
+def create_backend(name: str, problem_data, **options) -> SolverBackend:
+    """Creates the backend of the name, with the options of its class.
+
+    :param name: str: Name of the backend (see BACKENDS).
+    :param problem_data: the input of the problem, processed in the ProblemData static class.
+    :param options: Options of the backend (e.g. time_limit).
+
+    """
+    if name not in BACKENDS:
+        raise ValueError(f'Unknown solver backend: {name}')
+    module, cls = BACKENDS[name]
+    return getattr(importlib.import_module(module), cls)(problem_data, **options)
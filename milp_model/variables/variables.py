@@ -8,6 +8,9 @@ and it also provides direct access to the variable indexes, to be used later wit
 
 from abc import ABC, abstractmethod
 from gurobipy import Model, GRB
+import numpy as np
+
+from Domain import TupleDictionary
 from ProblemData import ProblemData
 
 
@@ -32,15 +35,23 @@ class Variable(ABC):
         """ """
         return self.__repr__()
 
+    @property
+    def gurobi_name(self):
+        """Name given to the Gurobi variable. In the lean build the name is left empty, so Gurobi uses its compact
+        index name (e.g. C12) and the readable name is only formatted on demand, by the name property."""
+        return '' if ProblemData.LEAN_BUILD else self.name
+
 
 class StartTimeVar(Variable):
     """ """
 
-    def __init__(self, model, pilot, flight, objective=0):
+    def __init__(self, model, pilot, flight, objective=0, lb=0.0, ub=GRB.INFINITY):
         super().__init__(objective=objective)
         self.pilot = pilot
         self.flight = flight
         self.duration = self.flight.duration
+        self.lb = lb
+        self.ub = ub
 
         self.variable = self._add_variable(model=model)
 
@@ -50,7 +61,7 @@ class StartTimeVar(Variable):
         :param model: Model: Gurobi model.
 
         """
-        return model.addVar(name=self.name, vtype=GRB.CONTINUOUS, obj=self.objective)
+        return model.addVar(name=self.gurobi_name, vtype=GRB.CONTINUOUS, obj=self.objective, lb=self.lb, ub=self.ub)
 
     def __repr__(self):
         return f'StartTimeVar{self.pilot}_{self.flight}'
@@ -72,7 +83,7 @@ class PrecedenceVar(Variable):
         :param model: Model: Gurobi model.
 
         """
-        return model.addVar(name=self.name, vtype=GRB.BINARY, ub=1.0)
+        return model.addVar(name=self.gurobi_name, vtype=GRB.BINARY, ub=1.0)
 
     def __repr__(self):
         return f'PrecedenceVar_({self.pilot})_({self.flight1})_({self.flight2})'
@@ -81,10 +92,11 @@ class PrecedenceVar(Variable):
 class FlightPilotAssignmentVar(Variable):
     """ """
 
-    def __init__(self, model, pilot, flight, objective=0):
+    def __init__(self, model, pilot, flight, objective=0, ub=1.0):
         super().__init__(objective=objective)
         self.pilot = pilot
         self.flight = flight
+        self.ub = ub
 
         self.variable = self._add_variable(model=model)
 
@@ -94,7 +106,7 @@ class FlightPilotAssignmentVar(Variable):
         :param model: Model: Gurobi model.
 
         """
-        return model.addVar(name=self.name, vtype=GRB.BINARY, obj=self.objective)
+        return model.addVar(name=self.gurobi_name, vtype=GRB.BINARY, obj=self.objective, ub=self.ub)
 
     def __repr__(self):
         return f'FlightPilotAssignment_{self.pilot}_{self.flight}'
@@ -116,7 +128,205 @@ class PilotPairingAssignmentVar(Variable):
         :param model: Model: Gurobi model.
 
         """
-        return model.addVar(name=self.name, vtype=GRB.BINARY, obj=self.objective)
+        return model.addVar(name=self.gurobi_name, vtype=GRB.BINARY, obj=self.objective)
 
     def __repr__(self):
         return f'PilotPairingAssignment_{self.pilot}_{self.pairing}'
+
+
+class PilotScheduleChangedVar(Variable):
+    """Binary variable that is set when the flights of the pilot are not the flights of its original pairing."""
+
+    def __init__(self, model, pilot, objective=0):
+        super().__init__(objective=objective)
+        self.pilot = pilot
+
+        self.variable = self._add_variable(model=model)
+
+    def _add_variable(self, model: Model):
+        """This is the function that will invoke the Gurobi function to add the variable to the model.
+
+        :param model: Model: Gurobi model.
+
+        """
+        return model.addVar(name=self.gurobi_name, vtype=GRB.BINARY, obj=self.objective)
+
+    def __repr__(self):
+        return f'PilotScheduleChanged_{self.pilot}'
+
+
+class VariableRegistry(TupleDictionary):
+    """TupleDictionary of variables that are created on their first reference: vars[pilot, flight] (or
+    vars[pilot, flight1, flight2]) creates the Variable, and the Gurobi variable, when it does not exist yet. So the
+    variables that are not referenced by any constraint are never added to the model. The iteration, select and the
+    values() method return only the created variables, and vars.get(key) or key in vars do not create the variable.
+
+    """
+
+    def __init__(self, create, pilots, indexes):
+        """
+        :param create: Callable: Creates the Variable of an index, create(pilot, flight) or create(pilot, f1, f2).
+        :param pilots: Iterable[Pilot]: Pilots that have variables.
+        :param indexes: Iterable[tuple]: Indexes without the pilot, (flight,) or (flight1, flight2), that have variables.
+
+        """
+        super().__init__()
+        self.create = create
+        self.pilots = set(pilots)
+        self.indexes = set(indexes)
+
+    def __getitem__(self, key: tuple) -> Variable:
+        value = self._data.get(key)
+        if value is None:
+            if key[0] not in self.pilots or key[1:] not in self.indexes:
+                raise KeyError(key)
+            value = self[key] = self.create(*key)
+        return value
+
+
+def get_block_name(name: str) -> str | None:
+    """Name of a VariableBlock (the element names are name[i,j]). In the lean build there is no name, so Gurobi uses its
+    index names (e.g. C12): an empty name would give the same names, [i,j], to the elements of all the blocks."""
+    return None if ProblemData.LEAN_BUILD else name
+
+
+class BlockVar:
+    """A single variable of a VariableBlock, with the same attributes of the Variable classes (pilot, flight(s) and
+    the Gurobi variable), so the solution functions can read both build engines in the same way."""
+
+    def __init__(self, variable, pilot, flight=None, flight1=None, flight2=None):
+        self.variable = variable
+        self.pilot = pilot
+        self.flight = flight
+        self.flight1 = flight1
+        self.flight2 = flight2
+
+    @property
+    def name(self):
+        """ """
+        return self.variable.VarName
+
+
+class VariableBlock(TupleDictionary, ABC):
+    """Main abstract class for the variable blocks. A block creates a whole family of variables (pilots x flights) as a
+    single Gurobi MVar with one call of the matrix API, instead of one Variable object per index. The block is also the
+    TupleDictionary of its BlockVar, with the same keys of the registries of the object factories, and the BlockVar are
+    only created on the first access of the dictionary."""
+
+    def __init__(self, pilots, flights, objective=0):
+        self.pilots = list(pilots)
+        self.flights = list(flights)
+        self.objective = objective
+        self.variable = None
+        self._entries_data = None
+        self._indexes = {}
+
+    @abstractmethod
+    def _add_variable(self, model: Model):
+        """This is the function that will invoke the Gurobi function to add the MVar to the model.
+
+        :param model: Model: Gurobi model.
+
+        """
+        pass
+
+    @abstractmethod
+    def _entries(self) -> dict:
+        """Dictionary of BlockVar, with the same tuple keys of the registries created by the object factories."""
+        pass
+
+    @property
+    def _data(self) -> dict:
+        """ """
+        if self._entries_data is None:
+            self._entries_data = self._entries()
+        return self._entries_data
+
+
+class FlightPilotAssignmentBlock(VariableBlock):
+    """FlightPilotAssignmentVar for all pilots x flights, as a (pilots, flights) binary MVar."""
+
+    def __init__(self, model, pilots, flights, objective=0):
+        super().__init__(pilots=pilots, flights=flights, objective=objective)
+        self.variable = self._add_variable(model=model)
+
+    def _add_variable(self, model: Model):
+        """This is the function that will invoke the Gurobi function to add the MVar to the model.
+
+        :param model: Model: Gurobi model.
+
+        """
+        shape = (len(self.pilots), len(self.flights))
+        ub = np.array([[float(p.can_fly(f)) for f in self.flights] for p in self.pilots]).reshape(shape)
+        return model.addMVar(shape, name=get_block_name('FlightPilotAssignment'), vtype=GRB.BINARY,
+                             obj=self.objective, ub=ub)
+
+    def _entries(self) -> dict:
+        """ """
+        gurobi_vars = self.variable.tolist()
+        return {(pilot, flight): BlockVar(gurobi_vars[p][f], pilot=pilot, flight=flight)
+                for p, pilot in enumerate(self.pilots) for f, flight in enumerate(self.flights)}
+
+
+class StartTimeBlock(VariableBlock):
+    """StartTimeVar for all pilots x flights, as a (pilots, flights) continuous MVar."""
+
+    def __init__(self, model, pilots, flights, objective=0):
+        super().__init__(pilots=pilots, flights=flights, objective=objective)
+        self.variable = self._add_variable(model=model)
+
+    def _add_variable(self, model: Model):
+        """This is the function that will invoke the Gurobi function to add the MVar to the model.
+
+        :param model: Model: Gurobi model.
+
+        """
+        shape = (len(self.pilots), len(self.flights))
+        return model.addMVar(shape, name=get_block_name('StartTime'), vtype=GRB.CONTINUOUS, obj=self.objective)
+
+    def _entries(self) -> dict:
+        """ """
+        gurobi_vars = self.variable.tolist()
+        return {(pilot, flight): BlockVar(gurobi_vars[p][f], pilot=pilot, flight=flight)
+                for p, pilot in enumerate(self.pilots) for f, flight in enumerate(self.flights)}
+
+
+class PrecedenceBlock(VariableBlock):
+    """PrecedenceVar for all pilots x ordered pairs of different flights, as a (pilots, pairs) binary MVar. The pair k
+    is (first[k], second[k]), both as flight indexes."""
+
+    def __init__(self, model, pilots, flights, objective=0):
+        super().__init__(pilots=pilots, flights=flights, objective=objective)
+
+        n = len(self.flights)
+        first, second = np.divmod(np.arange(n * n), n)
+        different = first != second
+        self.first = first[different]
+        self.second = second[different]
+
+        self.variable = self._add_variable(model=model)
+
+    def pair_index(self, flight1: int, flight2: int) -> int:
+        """Column of the ordered pair (flight1, flight2) in the MVar.
+
+        :param flight1: int: Index of the first flight.
+        :param flight2: int: Index of the second flight.
+
+        """
+        return flight1 * (len(self.flights) - 1) + flight2 - (flight2 > flight1)
+
+    def _add_variable(self, model: Model):
+        """This is the function that will invoke the Gurobi function to add the MVar to the model.
+
+        :param model: Model: Gurobi model.
+
+        """
+        shape = (len(self.pilots), len(self.first))
+        return model.addMVar(shape, name=get_block_name('Precedence'), vtype=GRB.BINARY, ub=1.0, obj=self.objective)
+
+    def _entries(self) -> dict:
+        """ """
+        gurobi_vars = self.variable.tolist()
+        pairs = [(self.flights[f1], self.flights[f2]) for f1, f2 in zip(self.first.tolist(), self.second.tolist())]
+        return {(pilot, flight1, flight2): BlockVar(gurobi_vars[p][k], pilot=pilot, flight1=flight1, flight2=flight2)
+                for p, pilot in enumerate(self.pilots) for k, (flight1, flight2) in enumerate(pairs)}
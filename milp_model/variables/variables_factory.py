@@ -7,58 +7,136 @@ import itertools
 from collections import defaultdict
 from gurobipy import Model
 
-from ProblemData import ProblemData, DataDictionary, Pilot
+from Instrumentation import Instrumentation
+from Domain import TupleDictionary
+from ProblemData import ProblemData, Pilot
+from preprocessing.time_windows import DISJUNCTIVE
 from milp_model.variables.variables import FlightPilotAssignmentVar
 from milp_model.variables.variables import PilotPairingAssignmentVar
+from milp_model.variables.variables import PilotScheduleChangedVar
 from milp_model.variables.variables import StartTimeVar
 from milp_model.variables.variables import PrecedenceVar
+from milp_model.variables.variables import FlightPilotAssignmentBlock
+from milp_model.variables.variables import StartTimeBlock
+from milp_model.variables.variables import PrecedenceBlock
+from milp_model.variables.variables import VariableRegistry
 
 
-def create_flight_pilot_assignment_var(model: Model, pilots, flights) -> DataDictionary:
-    flight_pilot_assignment_vars = DataDictionary()
+@Instrumentation.traced('variables')
+def create_flight_pilot_assignment_var(model: Model, pilots, flights) -> VariableRegistry:
+    """The assignment variables have a coefficient in the Objective Function, so all of them are created here."""
+    def create(pilot, flight):
+        return FlightPilotAssignmentVar(model, pilot=pilot, flight=flight, objective=1, ub=float(pilot.can_fly(flight)))
+
+    flight_pilot_assignment_vars = VariableRegistry(create, pilots=pilots, indexes=[(f,) for f in flights])
 
     pairs = itertools.product(pilots, flights)
 
     for pilot, flight in pairs:
-        var = FlightPilotAssignmentVar(model, pilot=pilot, flight=flight, objective=1)
-        flight_pilot_assignment_vars.data[pilot][flight] = var
+        _ = flight_pilot_assignment_vars[pilot, flight]
 
     return flight_pilot_assignment_vars
 
 
-def create_precedence_var(model: Model, pilots, flights) -> DataDictionary:
-    precedence_vars = DataDictionary()
+@Instrumentation.traced('variables')
+def create_precedence_var(model: Model, pilots, flights) -> VariableRegistry:
+    def create(pilot, flight1, flight2):
+        return PrecedenceVar(model, pilot=pilot, flight1=flight1, flight2=flight2)
 
-    for pilot, flight1, flight2 in itertools.product(pilots, flights, flights):
-        if flight1 != flight2:
-            var = PrecedenceVar(model, pilot=pilot, flight1=flight1, flight2=flight2)
-            precedence_vars.data[pilot][flight1][flight2] = var
+    pairs = [(f1, f2) for f1, f2 in itertools.product(flights, flights) if f1 != f2]
 
-    return precedence_vars
+    return VariableRegistry(create, pilots=pilots, indexes=pairs)
 
 
-def create_start_time_var(model: Model, pilots, flights) -> DataDictionary:
-    star_time_vars = DataDictionary()
+@Instrumentation.traced('variables')
+def create_start_time_var(model: Model, pilots, flights) -> VariableRegistry:
+    def create(pilot, flight):
+        return StartTimeVar(model, pilot=pilot, flight=flight)
 
-    pairs = itertools.product(pilots, flights)
+    return VariableRegistry(create, pilots=pilots, indexes=[(f,) for f in flights])
 
-    for pilot, flight in pairs:
-        var = StartTimeVar(model, pilot=pilot, flight=flight)
-        star_time_vars.data[pilot][flight] = var
 
-    return star_time_vars
+@Instrumentation.traced('variables')
+def create_windowed_start_time_var(model: Model, pilots, flights, time_windows) -> VariableRegistry:
+    """The bounds are read from the time windows when the variable is created, so a flight delayed before the first
+    reference of its start time gets the new window. Each hour of the start time has the delay penalty in the Objective
+    Function, so the flights are not delayed without need (see set_delay_offset)."""
+    def create(pilot, flight):
+        return StartTimeVar(model, pilot=pilot, flight=flight, objective=-ProblemData.FLIGHT_DELAY_PENALTY,
+                            lb=time_windows.earliest[flight], ub=time_windows.latest[flight])
+
+    return VariableRegistry(create, pilots=pilots, indexes=[(f,) for f in flights])
+
 
+def set_delay_offset(model: Model, start_time_vars: VariableRegistry, time_windows) -> None:
+    """The penalty of the start times is on the whole start, so the constant of the Objective Function gives back the
+    penalty of the earliest starts, and only the delays are penalized. It must be set again after new start times are
+    created or after the windows change.
 
-def create_pilot_pairing_assignment_var(model: Model, pilots, pairings, sic_table) -> DataDictionary:
-    pilot_pairing_assignment_vars = DataDictionary()
+    :param model: Model: Gurobi model.
+    :param start_time_vars: VariableRegistry: The windowed start time variables.
+    :param time_windows: TimeWindows: Time windows of the flights.
+
+    """
+    earliest = sum(time_windows.earliest[flight] for _, flight in start_time_vars.keys())
+    model.ObjCon = ProblemData.FLIGHT_DELAY_PENALTY * earliest
+
+
+@Instrumentation.traced('variables')
+def create_windowed_precedence_var(model: Model, pilots, time_windows, pairs=None,
+                                   precedence_vars: VariableRegistry = None) -> VariableRegistry:
+    """Precedence variables only for the pairs where both orders are possible (see TimeWindows). The pairs are the
+    classified pairs of TimeWindows (all pairs when None), and the pilots and pairs can be added to an existing
+    registry (pairs that are no longer disjunctive are removed from it)."""
+    if precedence_vars is None:
+        def create(pilot, flight1, flight2):
+            return PrecedenceVar(model, pilot=pilot, flight1=flight1, flight2=flight2)
+
+        precedence_vars = VariableRegistry(create, pilots=(), indexes=())
+
+    precedence_vars.pilots.update(pilots)
+    pairs = time_windows.pairs() if pairs is None else pairs
+    for kind, flight1, flight2 in pairs:
+        if kind == DISJUNCTIVE:
+            precedence_vars.indexes.update([(flight1, flight2), (flight2, flight1)])
+        else:
+            precedence_vars.indexes.difference_update([(flight1, flight2), (flight2, flight1)])
+
+    return precedence_vars
+
+
+@Instrumentation.traced('variables')
+def create_pilot_pairing_assignment_var(model: Model, pilots, pairings, sic_table) -> TupleDictionary:
+    pilot_pairing_assignment_vars = TupleDictionary()
 
     pairs = itertools.product(pilots, pairings)
 
     for pilot, pairing in pairs:
         objective = 1
-        if sic_table.data[pairing][pilot] == 0:
+        if sic_table.get(pairing, pilot) == 0:
             objective = -ProblemData.PILOT_SCHEDULE_CHANGED
         var = PilotPairingAssignmentVar(model, pilot=pilot, pairing=pairing, objective=objective)
-        pilot_pairing_assignment_vars.data[pilot][pairing] = var
+        pilot_pairing_assignment_vars[pilot, pairing] = var
 
     return pilot_pairing_assignment_vars
+
+
+@Instrumentation.traced('variables')
+def create_pilot_schedule_changed_var(model: Model, pilots) -> dict:
+    """One variable per pilot, without a coefficient in the Objective Function (see add_schedule_change_objective)."""
+    return {pilot: PilotScheduleChangedVar(model, pilot=pilot) for pilot in pilots}
+
+
+@Instrumentation.traced('variables')
+def create_flight_pilot_assignment_block(model: Model, pilots, flights) -> FlightPilotAssignmentBlock:
+    return FlightPilotAssignmentBlock(model, pilots=pilots, flights=flights, objective=1)
+
+
+@Instrumentation.traced('variables')
+def create_start_time_block(model: Model, pilots, flights) -> StartTimeBlock:
+    return StartTimeBlock(model, pilots=pilots, flights=flights)
+
+
+@Instrumentation.traced('variables')
+def create_precedence_block(model: Model, pilots, flights) -> PrecedenceBlock:
+    return PrecedenceBlock(model, pilots=pilots, flights=flights)
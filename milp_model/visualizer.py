@@ -3,26 +3,82 @@
 
 This is a visualiser for the scheduling. It is a Gantt Chart made with Pandas and Plotly.
 This visualizer plots the results of the scheduling in a browser window and it saves the image to the output directory.
+The solution is received in memory (Solution or DataFrame), so no file is read back.
+The chart is exported as an interactive HTML file, with menus to page through the pilots, to filter a base and to zoom
+into a day. Large rosters (more than MAX_GANTT_PILOTS pilots) are summarized in a density view: the number of pilots
+flying in each hour, for each base. The rendering can run in a background thread, off the critical path of the solve,
+and the static image is only written when it is requested.
 """
 
 import os
+from concurrent.futures import ThreadPoolExecutor
+from timeit import default_timer as timer
+
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.io as pio
 
-if not os.path.exists('output/images'):
-    os.mkdir('output/images')
+os.makedirs('output/images', exist_ok=True)
 
 pio.renderers.default = 'browser'
 
+MAX_GANTT_PILOTS = 200
+PILOTS_PER_PAGE = 25
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='visualizer')
+
+
+def visualize(solution, background: bool = False, view: str = 'auto', image: bool = False,
+              filename: str = 'output/images/chart'):
+    """Draws the chart of the solution and writes it to HTML (and to PNG when requested).
+
+    :param solution: Solution | pd.DataFrame: The solution, or its DataFrame (Flight, Pilot, Start and End columns).
+    :param background: bool: Render in a background thread and return a Future, instead of waiting for the render.
+    :param view: str: 'gantt', 'density' or 'auto' (density when there are more than MAX_GANTT_PILOTS pilots).
+    :param image: bool: Also write the static PNG image (slow, it needs the kaleido package).
+    :param filename: str: Name of the chart files, without the extension.
+
+    """
+    df = solution if isinstance(solution, pd.DataFrame) else solution.df
+    if view not in ('auto', 'gantt', 'density'):
+        raise ValueError(f'Unknown view: {view}')
+    if view == 'auto':
+        view = 'density' if df['Pilot'].nunique() > MAX_GANTT_PILOTS else 'gantt'
+
+    if background:
+        return _executor.submit(render, df.copy(), view, image, filename)
+    return render(df, view, image, filename)
+
+
+def render(df: pd.DataFrame, view: str, image: bool, filename: str) -> float:
+    """Builds the figure of the view and writes the files. Returns the render time, in seconds.
+
+    :param df: pd.DataFrame: The solution.
+    :param view: str: 'gantt' or 'density'.
+    :param image: bool: Also write the static PNG image.
+    :param filename: str: Name of the chart files, without the extension.
+
+    """
+    start = timer()
+    fig = get_gantt(df) if view == 'gantt' else get_density(df)
+
+    fig.write_html(f'{filename}.html', include_plotlyjs='cdn')
+    if image:
+        fig.write_image(f'{filename}.png', width=1920, height=1080, scale=2)
+    # fig.show()
+
+    render_time = timer() - start
+    print(f'\t{view.capitalize()} chart of {df["Pilot"].nunique()} pilots rendered in {render_time} seconds')
+    return render_time
+
 
-def visualize(output_file: str) -> None:
-    df = pd.read_excel(output_file)
-    df = df.infer_objects()
-    # Convert Start and End to datetime
-    df['Start'] = pd.to_datetime(df['Start'])
-    df['End'] = pd.to_datetime(df['End'])
+def get_gantt(df: pd.DataFrame):
+    """Gantt chart with one row for each pilot, and menus for the pages of pilots, the bases and the days.
 
+    :param df: pd.DataFrame: The solution.
+
+    """
     # Create the Gantt chart
     fig = px.timeline(df, x_start="Start", x_end="End", y="Pilot", color="Pilot",
                       title='Gantt Chart for Flight Assignments', text="Flight")
@@ -44,5 +100,57 @@ def visualize(output_file: str) -> None:
     fig.update_yaxes(title_text='Pilots')
     fig.update_xaxes(title_text='Time')
 
-    fig.write_image('output/images/chart.png', width=1920, height=1080, scale=2)
-    # fig.show()
+    # There is one trace for each pilot, so the pages and the bases only change the visible traces
+    pilots = [trace.name for trace in fig.data]
+    base = df.drop_duplicates('Pilot').set_index('Pilot')['Base'].astype(object).to_dict() if 'Base' in df else {}
+
+    pages = [pilots[i:i + PILOTS_PER_PAGE] for i in range(0, len(pilots), PILOTS_PER_PAGE)]
+    page_buttons = [dict(label='All pilots', method='restyle', args=[{'visible': [True] * len(pilots)}])]
+    if len(pages) > 1:
+        page_buttons += [dict(label=f'Pilots {i * PILOTS_PER_PAGE + 1}-{i * PILOTS_PER_PAGE + len(page)}',
+                              method='restyle', args=[{'visible': [p in page for p in pilots]}])
+                         for i, page in enumerate(pages)]
+
+    bases = sorted({b for b in base.values() if b is not None and not pd.isna(b)})
+    base_buttons = [dict(label='All bases', method='restyle', args=[{'visible': [True] * len(pilots)}])]
+    base_buttons += [dict(label=b, method='restyle', args=[{'visible': [base.get(p) == b for p in pilots]}])
+                     for b in bases]
+
+    days = pd.to_datetime(df['Start']).dt.normalize().unique() if len(df) else []
+    day_buttons = [dict(label='All days', method='relayout', args=[{'xaxis.autorange': True}])]
+    day_buttons += [dict(label=f'{day:%Y-%m-%d}', method='relayout',
+                         args=[{'xaxis.range': [day, day + pd.Timedelta(days=1)]}]) for day in sorted(days)]
+
+    menus = [buttons for buttons in (page_buttons, base_buttons, day_buttons) if len(buttons) > 1]
+    fig.update_layout(updatemenus=[dict(buttons=buttons, x=i * .15, xanchor='left', y=1.12, yanchor='top')
+                                   for i, buttons in enumerate(menus)])
+
+    return fig
+
+
+def get_density(df: pd.DataFrame):
+    """Density view of a large roster: number of pilots flying in each hour, for each base.
+
+    :param df: pd.DataFrame: The solution.
+
+    """
+    bases = df['Base'].astype(object).where(df['Base'].notna(), 'All') if 'Base' in df else pd.Series('All', df.index)
+    start = pd.to_datetime(df['Start']).dt.floor('h')
+    end = pd.to_datetime(df['End']).dt.ceil('h')
+    hours = pd.date_range(start.min(), end.max(), freq='h')
+
+    # Each flight adds one pilot to the hours it covers: +1 at the start hour and -1 at the end hour
+    rows = {}
+    for base, index in bases.groupby(bases).groups.items():
+        events = np.zeros(len(hours) + 1, dtype=np.int64)
+        np.add.at(events, hours.get_indexer(start[index]), 1)
+        np.add.at(events, hours.get_indexer(end[index]), -1)
+        rows[base] = np.cumsum(events)[:-1]
+    density = pd.DataFrame(rows, index=hours).T
+
+    fig = px.imshow(density, aspect='auto', color_continuous_scale='Blues', labels=dict(color='Pilots flying'),
+                    title=f'Flight Assignments Density ({df["Pilot"].nunique()} pilots, {len(df)} flights)')
+    fig.update_layout(xaxis_title='Time', yaxis_title='Bases', xaxis=dict(tickformat='%Y-%m-%d %H:%M', tickangle=45))
+
+    return fig
+
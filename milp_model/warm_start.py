@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""Warm Start File
+
+This file is used to seed the solver with the original roster of the pilots. In the disruption recovery the new
+schedule is usually close to the planned one, so the original pairings are converted into Start (MIP start) or
+VarHintVal (hints) values for the assignment, start time and precedence variables. Whatever the disruption broke is
+repaired before: cancelled flights, removed pilots and flights of another base are ignored, a flight in more than one
+pairing stays with the first pilot, and flights that no longer fit in the time windows of the pilot are dropped.
+"""
+from gurobipy import GRB
+
+
+def get_original_roster(pilots, flights, time_windows=None) -> dict:
+    """Flights of the original pairing of each pilot, repaired to be a feasible assignment of the current problem.
+
+    :param pilots: list[Pilot]: Pilots of the problem.
+    :param flights: list[Flight]: Flights of the problem.
+    :param time_windows: TimeWindows: Time windows of the flights (None for the 'bigm' formulation).
+
+    """
+    available = set(flights)
+    roster = {}
+    for pilot in pilots:
+        pairing = pilot.original_pairing
+        planned = [f for f in (pairing.flights if pairing else ()) if f in available and pilot.can_fly(f)]
+        available.difference_update(planned)
+
+        if time_windows is not None:
+            planned, dropped = sequence_flights(planned, time_windows)
+            available.update(dropped)
+        roster[pilot] = planned
+
+    return roster
+
+
+def sequence_flights(flights, time_windows) -> tuple[list, list]:
+    """Flights sorted by the earliest start, each one starting as soon as possible after the previous flight and the
+    minimum connection. Flights that would start after the latest start of their window are dropped.
+
+    :param flights: list[Flight]: Flights of a pilot.
+    :param time_windows: TimeWindows: Time windows of the flights.
+
+    """
+    kept, dropped = [], []
+    last_end = float('-inf')
+    for flight in sorted(flights, key=lambda x: time_windows.earliest[x]):
+        start = max(time_windows.earliest[flight], last_end)
+        if start > time_windows.latest[flight]:
+            dropped.append(flight)
+            continue
+        kept.append(flight)
+        last_end = time_windows.get_ready_time(flight, start)
+
+    return kept, dropped
+
+
+def get_start_values(build, problem_data, roster) -> dict:
+    """Values of all the variables of the model for the given roster.
+
+    :param build: dict: The model and the variables created by build_model.
+    :param problem_data: the input of the problem, processed in the ProblemData static class.
+    :param roster: dict: Flights of each pilot.
+
+    """
+    flights = problem_data['flights']
+    time_windows = build['time_windows']
+    flight_pilot_assignment_vars = build['flight_pilot_assignment_vars']
+    start_time_vars = build['start_time_vars']
+    precedence_vars = build['precedence_vars']
+
+    values = {}
+    for pilot, assigned in roster.items():
+        assigned_set = set(assigned)
+        if time_windows is None:
+            # Every pilot sequences all the flights: the assigned ones first, the others after them
+            order = list(assigned) + [f for f in flights if f not in assigned_set]
+            start, last_end = {}, 0.0
+            for flight in order:
+                start[flight] = last_end
+                last_end += flight.duration
+        else:
+            order = list(assigned)
+            start = {f: time_windows.earliest[f] for f in flights}
+            last_end = float('-inf')
+            for flight in order:
+                start[flight] = max(time_windows.earliest[flight], last_end)
+                last_end = time_windows.get_ready_time(flight, start[flight])
+        position = {f: i for i, f in enumerate(order)}
+
+        for flight in flights:
+            values[flight_pilot_assignment_vars[pilot, flight].variable] = float(flight in assigned_set)
+        # Only the start times referenced by the constraints are created (see VariableRegistry)
+        for (_, flight), var in start_time_vars.select_items(pilot, '*'):
+            values[var.variable] = start[flight]
+
+        for (_, flight1, flight2), var in precedence_vars.select_items(pilot, '*', '*'):
+            if time_windows is None:
+                # 'bigm': the variable is 1 when flight2 is flown before flight1
+                value = position[flight2] < position[flight1]
+            else:
+                # 'windows': the variable is 1 when both flights are flown and flight1 is the first one
+                value = flight1 in position and flight2 in position and position[flight1] < position[flight2]
+            values[var.variable] = float(value)
+
+    return values
+
+
+def set_warm_start(build, problem_data, hints: bool = False, roster: dict = None) -> dict:
+    """Seeds the model with the original roster (or with the given roster), as a MIP start (Start) or as hints
+    (VarHintVal).
+
+    :param build: dict: The model and the variables created by build_model.
+    :param problem_data: the input of the problem, processed in the ProblemData static class.
+    :param hints: bool: Use VarHintVal instead of Start.
+    :param roster: dict: Flights of each pilot, feasible in the time windows (e.g. of the RecoveryHeuristic).
+
+    """
+    model = build['model']
+    source = 'original' if roster is None else 'given'
+    if roster is None:
+        roster = get_original_roster(problem_data['pilots'], problem_data['flights'], build['time_windows'])
+    values = get_start_values(build, problem_data, roster)
+
+    model.update()
+    model.setAttr('VarHintVal' if hints else 'Start', list(values.keys()), list(values.values()))
+    print(f'\tWarm start: {sum(len(f) for f in roster.values())} flights of the {source} roster')
+
+    return roster
+
+
+def first_incumbent_callback(model, where) -> None:
+    """Gurobi callback that records the run time of the first incumbent in model._first_incumbent."""
+    if where == GRB.Callback.MIPSOL and model._first_incumbent is None:
+        model._first_incumbent = model.cbGet(GRB.Callback.RUNTIME)
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+"""Instance Generator
+
+This file is used to create synthetic instances of the problem, with the same tables of the instance loader (pilots,
+flights and pairings), so they can be processed by ProblemData.basic_process or written as a CSV instance. The
+instances are seeded, so the same parameters always give the same instance:
+- the flights depart in banks (waves of departures at the same hours of each day), with some jitter around the bank;
+- the durations follow a discrete distribution of short and medium haul flights;
+- pilots and flights belong to bases (a pilot only flies the flights of its base);
+- each pilot gets a legal original pairing, chained greedily from the earliest flights of its base, and the flights
+  that no pilot can take stay unassigned.
+Disruption sets (delays, cancellations and sick pilots) are generated in the format of the scenarios file.
+"""
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+import pyarrow as pa
+
+from preprocessing.instance_loader import TABLES
+
+BANKS = (6, 8, 11, 14, 17, 20)  # hours of the day
+BANK_JITTER = .75  # standard deviation (hours) of the departure around the bank
+DURATIONS = (.75, 1, 1.5, 2, 2.5, 3, 4)
+DURATION_WEIGHTS = (.10, .20, .25, .20, .12, .08, .05)
+AIRLINES = ('AZU', 'TAM', 'GLO', 'DAE', 'QFA')
+BASES = ('GRU', 'BSB', 'SDU', 'CNF', 'POA', 'REC', 'SSA', 'CWB')
+
+
+def get_bases(n_bases: int) -> list:
+    """Names of the bases ([None] when the instance has no bases).
+
+    :param n_bases: int: Number of bases.
+
+    """
+    if n_bases <= 0:
+        return [None]
+    return list(BASES[:n_bases]) + [f'B{i}' for i in range(len(BASES), n_bases)]
+
+
+def generate_instance(n_pilots: int, n_flights: int, n_days: int = 1, n_bases: int = 1, seed: int = 0,
+                      origin: datetime = datetime(2024, 1, 1), min_connection: float = .5, max_duty: float = 12,
+                      max_pairing_flights: int = 4) -> dict[str, pa.Table]:
+    """Creates the tables of a synthetic instance.
+
+    :param n_pilots: int: Number of pilots.
+    :param n_flights: int: Number of flights.
+    :param n_days: int: Number of days of the planning horizon.
+    :param n_bases: int: Number of bases (0 for an instance without bases).
+    :param seed: int: Seed of the random generator.
+    :param origin: datetime: First day of the planning horizon.
+    :param min_connection: float: Minimum connection time of the original pairings, in hours.
+    :param max_duty: float: Maximum duty length of the original pairings, in hours.
+    :param max_pairing_flights: int: Maximum number of flights of an original pairing.
+
+    """
+    rng = np.random.default_rng(seed)
+    bases = get_bases(n_bases)
+
+    '''Flights'''
+    days = rng.integers(0, n_days, size=n_flights)
+    banks = rng.choice(BANKS, size=n_flights)
+    jitter = np.clip(rng.normal(0, BANK_JITTER, size=n_flights), -2, 2)
+    # Departures rounded to 5 minutes
+    departures = np.round((days * 24 + banks + jitter) * 12) / 12
+    durations = rng.choice(DURATIONS, size=n_flights, p=DURATION_WEIGHTS)
+    flight_bases = rng.choice(len(bases), size=n_flights)
+
+    order = np.argsort(departures, kind='stable')
+    departures, durations, flight_bases = departures[order], durations[order], flight_bases[order]
+    flight_names = [f'{AIRLINES[i % len(AIRLINES)]}{1000 + i}' for i in range(n_flights)]
+    starts = [origin + timedelta(hours=float(h)) for h in departures]
+
+    '''Pilots'''
+    pilot_names = [f'P{i:04d}' for i in range(n_pilots)]
+    pilot_bases = [i % len(bases) for i in range(n_pilots)]
+
+    '''Original pairings'''
+    # Flights of each base, sorted by departure, that are not in a pairing yet
+    open_flights = {b: [i for i in range(n_flights) if flight_bases[i] == b] for b in range(len(bases))}
+    rows, n_pairings = [], 0
+    for pilot in rng.permutation(n_pilots):
+        remaining = open_flights[pilot_bases[pilot]]
+        if not remaining:
+            continue
+
+        duty = [remaining[0]]
+        for i in remaining[1:]:
+            if len(duty) == max_pairing_flights:
+                break
+            last = duty[-1]
+            if departures[i] < departures[last] + durations[last] + min_connection:
+                continue
+            if departures[i] + durations[i] - departures[duty[0]] > max_duty:
+                break
+            duty.append(i)
+
+        assigned = set(duty)
+        open_flights[pilot_bases[pilot]] = [i for i in remaining if i not in assigned]
+        pairing = f'D{n_pairings:04d}'
+        n_pairings += 1
+        rows += [(pairing, pilot_names[pilot], flight_names[i]) for i in duty]
+
+    columns = {
+        'pilots': {'Name': pilot_names, 'Base': [bases[b] for b in pilot_bases]},
+        'flights': {'Name': flight_names, 'Start': starts, 'Duration': durations.tolist(),
+                    'Base': [bases[b] for b in flight_bases]},
+        'pairings': {'Pairing': [r[0] for r in rows], 'Pilot': [r[1] for r in rows], 'Flight': [r[2] for r in rows]},
+    }
+    return {table: pa.table(columns[table], schema=pa.schema(schema)) for table, schema in TABLES.items()}
+
+
+def generate_disruptions(tables: dict[str, pa.Table], n_scenarios: int, max_events: int = 3, seed: int = 0,
+                         max_delay: float = 3) -> list[dict]:
+    """Creates disruption scenarios of the instance, in the format of the scenarios file (see read_scenarios).
+
+    :param tables: dict[str, pa.Table]: The tables of the instance.
+    :param n_scenarios: int: Number of scenarios.
+    :param max_events: int: Maximum number of events of a scenario.
+    :param seed: int: Seed of the random generator.
+    :param max_delay: float: Maximum delay of a flight, in hours.
+
+    """
+    rng = np.random.default_rng(seed)
+    flights = tables['flights'].column('Name').to_pylist()
+    pilots = tables['pilots'].column('Name').to_pylist()
+
+    scenarios = []
+    for s in range(n_scenarios):
+        events = []
+        cancelled, sick = set(), set()
+        for _ in range(rng.integers(1, max_events + 1)):
+            kind = rng.choice(['delay', 'cancel', 'sick'], p=[.6, .2, .2])
+            if kind == 'sick' and len(sick) < len(pilots) - 1:
+                pilot = str(rng.choice([p for p in pilots if p not in sick]))
+                sick.add(pilot)
+                events.append({'type': 'sick', 'pilot': pilot})
+                continue
+
+            flight = str(rng.choice([f for f in flights if f not in cancelled]))
+            if kind == 'cancel':
+                cancelled.add(flight)
+                events.append({'type': 'cancel', 'flight': flight})
+            else:
+                hours = float(np.round(rng.uniform(.25, max_delay) * 4) / 4)
+                events.append({'type': 'delay', 'flight': flight, 'hours': hours})
+        scenarios.append({'name': f'scenario-{s}', 'events': events})
+
+    return scenarios
+
+
+def write_instance(tables: dict[str, pa.Table], directory: str) -> str:
+    """Writes the tables as a CSV instance, that can be read by load_instance.
+
+    :param tables: dict[str, pa.Table]: The tables of the instance.
+    :param directory: str: Directory of the CSV files.
+
+    """
+    os.makedirs(directory, exist_ok=True)
+    for table in TABLES:
+        tables[table].to_pandas().to_csv(os.path.join(directory, f'{table}.csv'), index=False,
+                                         date_format='%Y-%m-%d %H:%M:%S')
+    return directory
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""Instance Loader
+
+This file is used to read the instances of the problem from Excel or CSV. An instance has three tables:
+- pilots: Name, Base;
+- flights: Name, Start (departure date and time), Duration (hours), Base;
+- pairings: Pairing, Pilot, Flight (the original pairing of each pilot, one row per flight, in the order of the duty).
+An xlsx instance has one sheet per table, and a CSV instance is a directory with pilots.csv, flights.csv and
+pairings.csv. Parsing xlsx is slow, so the parsed tables are cached as uncompressed Arrow (Feather) files, named by the
+sha256 hash of the content of the instance files. The next runs with the same content memory-map the cache instead of
+parsing the instance again, and any change of the files gives a new hash.
+"""
+import hashlib
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from Instrumentation import Instrumentation
+
+TABLES = {
+    'pilots': {'Name': pa.string(), 'Base': pa.string()},
+    'flights': {'Name': pa.string(), 'Start': pa.timestamp('us'), 'Duration': pa.float64(), 'Base': pa.string()},
+    'pairings': {'Pairing': pa.string(), 'Pilot': pa.string(), 'Flight': pa.string()},
+}
+
+# Changing the tables changes the format of the cache, so the version is part of the hash
+CACHE_VERSION = 1
+
+
+def get_instance_files(path: str) -> list[str]:
+    """Files of the instance: the xlsx file itself, or the CSV files of the directory.
+
+    :param path: str: The xlsx file or the directory of the CSV files.
+
+    """
+    if os.path.isdir(path):
+        return [os.path.join(path, f'{table}.csv') for table in TABLES]
+    return [path]
+
+
+def get_fingerprint(path: str) -> str:
+    """sha256 hash of the content of the instance files.
+
+    :param path: str: The xlsx file or the directory of the CSV files.
+
+    """
+    digest = hashlib.sha256(f'instance-cache-v{CACHE_VERSION}'.encode())
+    for filename in get_instance_files(path):
+        digest.update(os.path.basename(filename).encode())
+        with open(filename, 'rb') as file:
+            for chunk in iter(lambda: file.read(1 << 20), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse_instance(path: str) -> dict[str, pa.Table]:
+    """Parses the Excel or CSV instance into Arrow tables with the types of TABLES.
+
+    :param path: str: The xlsx file or the directory of the CSV files.
+
+    """
+    if os.path.isdir(path):
+        frames = {table: pd.read_csv(filename, dtype=str, keep_default_na=False)
+                  for table, filename in zip(TABLES, get_instance_files(path))}
+    else:
+        frames = pd.read_excel(path, sheet_name=list(TABLES), dtype=str, keep_default_na=False)
+
+    tables = {}
+    for table, columns in TABLES.items():
+        df = frames[table]
+        missing = set(columns) - set(df.columns)
+        if missing:
+            raise ValueError(f'Missing columns in the {table} table of {path}: {sorted(missing)}')
+
+        df = df[list(columns)].replace('', None)
+        for column, column_type in columns.items():
+            if column_type == pa.float64():
+                df[column] = df[column].astype(float)
+            elif column_type == pa.timestamp('us'):
+                df[column] = pd.to_datetime(df[column])
+        tables[table] = pa.Table.from_pandas(df, schema=pa.schema(columns), preserve_index=False)
+
+    return tables
+
+
+def load_instance(path: str, cache_dir: str = 'output/cache', use_cache: bool = True) -> dict[str, pa.Table]:
+    """Loads the tables of the instance, from the cache when the content of the instance was already parsed.
+
+    :param path: str: The xlsx file or the directory of the CSV files.
+    :param cache_dir: str: Directory of the cached tables.
+    :param use_cache: bool: Read and write the cache.
+
+    """
+    with Instrumentation.span('load', path=path) as span:
+        fingerprint = get_fingerprint(path) if use_cache else None
+        cache_files = {table: os.path.join(cache_dir, f'{fingerprint}-{table}.arrow') for table in TABLES}
+
+        if use_cache and all(os.path.exists(f) for f in cache_files.values()):
+            tables = {table: feather.read_table(f, memory_map=True) for table, f in cache_files.items()}
+            source = f'loaded from the cache {fingerprint[:12]}'
+        else:
+            tables = parse_instance(path)
+            source = 'parsed'
+        if use_cache and source == 'parsed':
+            os.makedirs(cache_dir, exist_ok=True)
+            for table, f in cache_files.items():
+                # Uncompressed, so the cache can be memory-mapped without decoding. The file is renamed only when it
+                # is complete, so an interrupted run never leaves a partial cache
+                feather.write_feather(tables[table], f'{f}.tmp', compression='uncompressed')
+                os.replace(f'{f}.tmp', f)
+            source = f'parsed and cached as {fingerprint[:12]}'
+        span.counts.update({table: tables[table].num_rows for table in TABLES})
+    print(f'\tInstance {path} {source} in {span.duration} seconds')
+
+    return tables
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""Flight Interval Index
+
+This file is used to answer the interval queries of the flights without nested loops over all the flights: which
+flights overlap a period (or another flight), which flights can follow a flight in a duty, and which flights are
+affected when a flight is delayed. The intervals [start, end + padding) of the flights are kept sorted by start, in
+int64 minutes (see FlightTable), so a query is a binary search followed by a slice:
+- the flights departing in a period are a contiguous slice of the sorted starts;
+- a flight that overlaps a period departs at most max_length minutes before it, so the overlap candidates are also a
+  slice, filtered by the end of the intervals.
+The queries cost O(log n + k), where k is the number of flights departing in the slice. The padding extends the end of
+the intervals, e.g. with the maximum delay, so the intervals are the busy windows of the time windows formulation.
+A moved flight is taken out of the sorted arrays and inserted again in its new position (move), with no rebuild.
+"""
+from datetime import datetime
+from typing import Iterator, List
+
+import numpy as np
+
+from Domain import NO_TIME, to_minutes
+
+
+def get_times(flights) -> tuple[np.ndarray, np.ndarray]:
+    """Start and end of the flights, in minutes. The columns are read at once when the flights share a table.
+
+    :param flights: list[Flight]: Flights with the start time already defined.
+
+    """
+    tables = {f.table for f in flights}
+    if len(tables) == 1:
+        table = tables.pop()
+        ids = np.fromiter((f.id for f in flights), dtype=np.int64, count=len(flights))
+        start, end = table.start[ids], table.end[ids]
+    else:
+        start = np.fromiter((f.table.start[f.id] for f in flights), dtype=np.int64, count=len(flights))
+        end = np.fromiter((f.table.end[f.id] for f in flights), dtype=np.int64, count=len(flights))
+    if np.any(start == NO_TIME):
+        raise ValueError('All the flights of the interval index must have a start time')
+    return start, end
+
+
+class FlightIntervalIndex:
+    """Flights sorted by start, with the end of each interval."""
+
+    def __init__(self, flights, padding: float = 0):
+        """
+        :param flights: list[Flight]: Flights with the start time already defined.
+        :param padding: float: Hours added to the end of each interval (e.g. the maximum delay of a flight).
+
+        """
+        self.flights = list(flights)
+        self.padding = round(padding * 60)
+        self.position = {f: i for i, f in enumerate(self.flights)}
+
+        self.start, self.end = get_times(self.flights)
+        self.end = self.end + self.padding
+        self.max_length = int((self.end - self.start).max(initial=0))
+
+        # Positions of the flights sorted by start (ties in the order of the flights), and their starts
+        self.order = np.argsort(self.start, kind='stable')
+        self.sorted_start = self.start[self.order]
+
+    def __len__(self):
+        return len(self.flights)
+
+    def __contains__(self, flight):
+        return flight in self.position
+
+    def departing_order(self) -> List:
+        """All the flights, in the order of the starts."""
+        return self._flights(self.order)
+
+    def _flights(self, positions) -> List:
+        return [self.flights[i] for i in positions.tolist()]
+
+    def _departing(self, start: int, end: int) -> np.ndarray:
+        """Positions of the flights departing in [start, end), in the order of the starts."""
+        first, last = np.searchsorted(self.sorted_start, [start, end], side='left')
+        return self.order[first:last]
+
+    def _overlapping(self, start: int, end: int) -> np.ndarray:
+        """Positions of the flights whose interval intersects [start, end), in the order of the starts."""
+        candidates = self._departing(start - self.max_length, end)
+        return candidates[self.end[candidates] > start]
+
+    def departing(self, start: datetime, end: datetime) -> List:
+        """Flights that depart in [start, end).
+
+        :param start: datetime: Start of the period.
+        :param end: datetime: End of the period.
+
+        """
+        return self._flights(self._departing(to_minutes(start), to_minutes(end)))
+
+    def overlapping(self, start: datetime, end: datetime) -> List:
+        """Flights whose interval intersects [start, end).
+
+        :param start: datetime: Start of the period.
+        :param end: datetime: End of the period.
+
+        """
+        return self._flights(self._overlapping(to_minutes(start), to_minutes(end)))
+
+    def overlaps(self, flight) -> List:
+        """Other flights whose interval intersects the interval of the flight.
+
+        :param flight: Flight: A flight of the index.
+
+        """
+        i = self.position[flight]
+        positions = self._overlapping(self.start[i], self.end[i])
+        return self._flights(positions[positions != i])
+
+    def connectable(self, flight, min_connection: float, max_duty: float = None) -> List:
+        """Flights that can follow the flight in a duty: they depart at least min_connection hours after the flight
+        arrives, and they arrive at most max_duty hours after the flight departs. The padding is not used.
+
+        :param flight: Flight: A flight of the index.
+        :param min_connection: float: Minimum connection time, in hours.
+        :param max_duty: float: Maximum duty length, in hours (None for no limit).
+
+        """
+        i = self.position[flight]
+        earliest = self.end[i] - self.padding + round(min_connection * 60)
+        if max_duty is None:
+            positions = self.order[np.searchsorted(self.sorted_start, earliest, side='left'):]
+        else:
+            # A successor that ends in the duty also departs in the duty
+            latest_end = self.start[i] + round(max_duty * 60)
+            positions = self._departing(earliest, latest_end + 1)
+            positions = positions[self.end[positions] - self.padding <= latest_end]
+        return self._flights(positions)
+
+    def affected_by_delay(self, flight, hours: float) -> List:
+        """Other flights whose relation with the flight can change when it is delayed: the flights that overlap the
+        flight before or after the delay (the interval swept by the delay).
+
+        :param flight: Flight: A flight of the index.
+        :param hours: float: The delay, in hours (negative when the flight departs earlier).
+
+        """
+        i = self.position[flight]
+        delay = round(hours * 60)
+        positions = self._overlapping(self.start[i] + min(delay, 0), self.end[i] + max(delay, 0))
+        return self._flights(positions[positions != i])
+
+    def pairs(self) -> Iterator[tuple]:
+        """Pairs of flights whose intervals overlap, each pair once, with the earliest start first."""
+        for rank, i in enumerate(self.order.tolist()):
+            last = np.searchsorted(self.sorted_start, self.end[i], side='left')
+            for j in self.order[rank + 1:last].tolist():
+                yield self.flights[i], self.flights[j]
+
+    def move(self, flight, start: datetime = None) -> None:
+        """Moves the flight to a new start (the current start of the flight when None) and updates its position in the
+        sorted starts. The move costs a binary search and a shift of the arrays, with no rebuild of the index.
+
+        :param flight: Flight: A flight of the index.
+        :param start: datetime: The new start of the flight.
+
+        """
+        if start is not None:
+            flight.start = start
+        i = self.position[flight]
+        new_start = to_minutes(flight.start)
+        if new_start == NO_TIME:
+            raise ValueError(f'{flight} has no start time')
+
+        # Rank of the flight among the equal starts
+        first, last = np.searchsorted(self.sorted_start, [self.start[i], self.start[i] + 1], side='left')
+        rank = first + int(np.flatnonzero(self.order[first:last] == i)[0])
+        self.order = np.delete(self.order, rank)
+        self.sorted_start = np.delete(self.sorted_start, rank)
+
+        self.end[i] += new_start - self.start[i]
+        self.start[i] = new_start
+        rank = np.searchsorted(self.sorted_start, new_start, side='right')
+        self.order = np.insert(self.order, rank, i)
+        self.sorted_start = np.insert(self.sorted_start, rank, new_start)
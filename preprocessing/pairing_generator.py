@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+"""Pairing Generator
+
+This file is used to generate the legal pairings of the problem. Instead of enumerating every combination of flights,
+the flights are connected in a graph where an arc means that a pilot can operate both flights in sequence (respecting
+the minimum connection time and the maximum duty length). The graph is walked depth-first and each legal path is
+yielded as a Pairing, so the pairing pool grows with the number of legal connections and not with 2^n.
+"""
+from datetime import timedelta
+from itertools import count, islice
+from typing import Dict, Iterator, List
+
+from Domain import Flight, Pairing, PairingTable
+from preprocessing.interval_index import FlightIntervalIndex
+
+
+def build_connection_graph(flights, min_connection: float, max_duty: float,
+                           index: FlightIntervalIndex = None) -> Dict[Flight, List[Flight]]:
+    """Creates the flight connection graph. There is an arc from flight1 to flight2 if flight2 departs at least
+    min_connection hours after flight1 arrives and both flights fit in a single duty.
+
+    :param flights: list[Flight]: Flights with the start time already defined.
+    :param min_connection: float: Minimum connection time, in hours.
+    :param max_duty: float: Maximum duty length, in hours.
+    :param index: FlightIntervalIndex: Index of the flights (created when None).
+
+    """
+    if index is None:
+        index = FlightIntervalIndex(flights)
+
+    # The flights are visited in the order of the starts, and the successors of each one are a slice of the index
+    return {flight: index.connectable(flight, min_connection=min_connection, max_duty=max_duty)
+            for flight in index.departing_order()}
+
+
+def generate_pairings(flights, min_connection: float, max_duty: float, max_flights: int = None,
+                      max_pairings: int = None, min_flights: int = 2, start_index: int = 0,
+                      index: FlightIntervalIndex = None, table: PairingTable = None) -> Iterator[Pairing]:
+    """Lazy stream of the legal pairings. Each path of the connection graph with at least min_flights flights is
+    yielded as a new Pairing. The duty length is always measured from the first flight of the pairing.
+
+    :param flights: list[Flight]: Flights with the start time already defined.
+    :param min_connection: float: Minimum connection time, in hours.
+    :param max_duty: float: Maximum duty length, in hours.
+    :param max_flights: int: Maximum number of flights in a pairing (None for no limit).
+    :param max_pairings: int: Maximum number of pairings to be generated (None for no limit).
+    :param min_flights: int: Minimum number of flights in a pairing.
+    :param start_index: int: First name (index) given to the pairings.
+    :param index: FlightIntervalIndex: Index of the flights (created when None).
+    :param table: PairingTable: Table of the generated pairings (the table of the flights when None).
+
+    """
+    graph = build_connection_graph(flights, min_connection=min_connection, max_duty=max_duty, index=index)
+    duty = timedelta(hours=max_duty)
+    names = count(start_index)
+
+    def walk():
+        for first in graph:
+            if min_flights <= 1:
+                yield Pairing(next(names), (first,), table=table)
+            if max_flights is not None and max_flights <= 1:
+                continue
+
+            # Iterative DFS: each stack entry is a path and the successors still to be visited
+            stack = [((first,), iter(graph[first]))]
+            while stack:
+                path, successors = stack[-1]
+                flight = next(successors, None)
+                if flight is None:
+                    stack.pop()
+                    continue
+                if flight.end - first.start > duty:
+                    continue
+
+                extended = path + (flight,)
+                if len(extended) >= min_flights:
+                    yield Pairing(next(names), extended, table=table)
+                if max_flights is None or len(extended) < max_flights:
+                    stack.append((extended, iter(graph[flight])))
+
+    return islice(walk(), max_pairings)
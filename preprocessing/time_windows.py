@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""Time Windows
+
+This file is used to preprocess the time windows of the flights before the model is built. Each flight can start
+between its scheduled departure and the maximum delay allowed, and a pilot needs the minimum connection time between the
+end of a flight and the start of the next one. Comparing the windows of two flights tells if a pilot can fly both, and
+in which order:
+- FREE: the first flight always ends before the second one starts, no variable or constraint is needed;
+- FORCED: only one order is possible, the order is fixed and a single precedence row is needed;
+- DISJUNCTIVE: both orders are possible, the precedence variables and the big-M rows are needed;
+- INCOMPATIBLE: no order is possible, the pilot cannot fly both flights.
+The big-M of each row is the largest possible violation of that row, computed from the windows of the pair.
+A pair is FREE exactly when the busy windows of the flights (from the earliest start to the latest end, plus the
+connection) do not overlap, so the pairs that are not FREE are found with a FlightIntervalIndex padded by the maximum
+delay and the minimum connection.
+UniformTimeWindows is the reference of the comparison of the formulations: the same windows, with every pair DISJUNCTIVE
+and a single big-M for all the rows.
+"""
+import itertools
+from datetime import datetime
+from typing import Iterator
+
+from preprocessing.interval_index import FlightIntervalIndex
+
+FREE = 'free'
+FORCED = 'forced'
+DISJUNCTIVE = 'disjunctive'
+INCOMPATIBLE = 'incompatible'
+# Decimals of the comparisons of the windows: the times are whole minutes, in hours, so a pair that only touches is not
+# split by the rounding errors of the sums
+PRECISION = 9
+
+
+class TimeWindows:
+    """Earliest and latest start of each flight, in hours after the origin date."""
+
+    def __init__(self, flights, origin: datetime, max_delay: float, min_connection: float = 0.0):
+        """
+        :param flights: list[Flight]: Flights with the start time already defined.
+        :param origin: datetime: Date of the time zero of the model.
+        :param max_delay: float: Maximum delay of a flight, in hours.
+        :param min_connection: float: Minimum connection time between two flights of a pilot, in hours.
+
+        """
+        self.flights = list(flights)
+        self.origin = origin
+        self.max_delay = max_delay
+        self.min_connection = min_connection
+        self.earliest = {}
+        self.latest = {}
+        for flight in self.flights:
+            self._compute_window(flight)
+        # The busy window of a flight ends after the maximum delay and the minimum connection
+        self.padding = max_delay + min_connection
+        self.index = FlightIntervalIndex(self.flights, padding=self.padding)
+
+    def _compute_window(self, flight) -> None:
+        """ """
+        self.earliest[flight] = (flight.start - self.origin).total_seconds() / 3600
+        self.latest[flight] = self.earliest[flight] + self.max_delay
+
+    def set_window(self, flight) -> None:
+        """Computes the window of the flight from its current start, and moves the flight in the index.
+
+        :param flight: Flight: The flight.
+
+        """
+        self._compute_window(flight)
+        if flight in self.index:
+            self.index.move(flight)
+
+    def get_ready_time(self, flight, start: float) -> float:
+        """Time (hours) when the pilot of the flight can start the next flight: the end of the flight plus the minimum
+        connection.
+
+        :param flight: Flight: The flight.
+        :param start: float: Start of the flight, in hours.
+
+        """
+        return start + flight.duration + self.min_connection
+
+    def can_precede(self, flight1, flight2) -> bool:
+        """True if flight1 can end, with the minimum connection, before flight2 starts.
+
+        :param flight1: Flight: First flight.
+        :param flight2: Flight: Second flight.
+
+        """
+        return round(self.get_ready_time(flight1, self.earliest[flight1]) - self.latest[flight2], PRECISION) <= 0
+
+    def big_m(self, flight1, flight2) -> float:
+        """Largest violation of start[flight1] + duration[flight1] + min_connection <= start[flight2] inside the
+        windows.
+
+        :param flight1: Flight: First flight.
+        :param flight2: Flight: Second flight.
+
+        """
+        return max(round(self.get_ready_time(flight1, self.latest[flight1]) - self.earliest[flight2], PRECISION), 0)
+
+    def classify(self, flight1, flight2) -> tuple[str, object, object]:
+        """Classification of the pair. The flights are returned in the order they must be flown when it is fixed.
+
+        :param flight1: Flight: First flight.
+        :param flight2: Flight: Second flight.
+
+        """
+        forward = self.can_precede(flight1, flight2)
+        backward = self.can_precede(flight2, flight1)
+        if forward and backward:
+            return DISJUNCTIVE, flight1, flight2
+        if not forward and not backward:
+            return INCOMPATIBLE, flight1, flight2
+        if backward:
+            flight1, flight2 = flight2, flight1
+        if self.big_m(flight1, flight2) == 0:
+            return FREE, flight1, flight2
+        return FORCED, flight1, flight2
+
+    def pairs(self, flights=None) -> Iterator[tuple[str, object, object]]:
+        """Classification of all the pairs that are not FREE (the pairs with overlapping busy windows).
+
+        :param flights: list[Flight]: Flights to be paired (all flights when None).
+
+        """
+        index = self.index if flights is None else FlightIntervalIndex(flights, padding=self.padding)
+        for flight1, flight2 in index.pairs():
+            kind, first, second = self.classify(flight1, flight2)
+            if kind != FREE:
+                yield kind, first, second
+
+    def pairs_of(self, flight) -> Iterator[tuple[str, object, object]]:
+        """Classification of all the pairs of the flight that are not FREE.
+
+        :param flight: Flight: The flight.
+
+        """
+        for other in self.index.overlaps(flight):
+            kind, first, second = self.classify(flight, other)
+            if kind != FREE:
+                yield kind, first, second
+
+
+class UniformTimeWindows(TimeWindows):
+    """Time windows of the 'bigm-windows' formulation: the same windows and start time bounds of TimeWindows, but the
+    pairs are not classified. Every pair of flights is DISJUNCTIVE (an INCOMPATIBLE pair becomes infeasible for a pilot
+    through its rows), and all the rows have the same big-M, the largest one of the instance."""
+
+    def __init__(self, flights, origin: datetime, max_delay: float, min_connection: float = 0.0):
+        """
+        :param flights: list[Flight]: Flights with the start time already defined.
+        :param origin: datetime: Date of the time zero of the model.
+        :param max_delay: float: Maximum delay of a flight, in hours.
+        :param min_connection: float: Minimum connection time between two flights of a pilot, in hours.
+
+        """
+        super().__init__(flights, origin=origin, max_delay=max_delay, min_connection=min_connection)
+        self.uniform_big_m = max((self.get_ready_time(f, self.latest[f]) for f in self.flights), default=0.0)
+        self.uniform_big_m -= min(self.earliest.values(), default=0.0)
+
+    def big_m(self, flight1, flight2) -> float:
+        """The same big-M for all the pairs.
+
+        :param flight1: Flight: First flight.
+        :param flight2: Flight: Second flight.
+
+        """
+        return self.uniform_big_m
+
+    def classify(self, flight1, flight2) -> tuple[str, object, object]:
+        """Every pair is DISJUNCTIVE.
+
+        :param flight1: Flight: First flight.
+        :param flight2: Flight: Second flight.
+
+        """
+        return DISJUNCTIVE, flight1, flight2
+
+    def pairs(self, flights=None) -> Iterator[tuple[str, object, object]]:
+        """All the pairs of flights.
+
+        :param flights: list[Flight]: Flights to be paired (all flights when None).
+
+        """
+        for flight1, flight2 in itertools.combinations(self.flights if flights is None else flights, 2):
+            yield DISJUNCTIVE, flight1, flight2
+
+    def pairs_of(self, flight) -> Iterator[tuple[str, object, object]]:
+        """All the pairs of the flight.
+
+        :param flight: Flight: The flight.
+
+        """
+        for other in self.flights:
+            if other is not flight:
+                yield DISJUNCTIVE, flight, other
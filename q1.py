@@ -1,8 +1,10 @@
 import os
-from timeit import default_timer as timer
+import sys
 
+from Instrumentation import Instrumentation
 from ProblemData import ProblemData
 from milp_model.milp_model import get_optimization
+from preprocessing.instance_loader import load_instance
 
 if not os.path.exists('output/'):
     os.mkdir('output/')
@@ -10,17 +12,24 @@ if not os.path.exists('output/'):
 
 def main():
     """ """
-    file_path = 'instances/instance1.xlsx'
-    # input_data = read_excel(file_path)
-    input_data = ''
+    # python q1.py --instrument writes the spans and the solver progress to output/events.jsonl
+    if '--instrument' in sys.argv:
+        Instrumentation.enable()
+    # python q1.py --cpsat optimizes with the OR-Tools CP-SAT backend instead of Gurobi, and python q1.py --colgen
+    # solves the pilot-pairing model by column generation
+    backend = 'cpsat' if '--cpsat' in sys.argv else 'colgen' if '--colgen' in sys.argv else 'gurobi'
+    # python q1.py --heuristic seeds Gurobi with the roster of the recovery heuristic (see RecoveryHeuristic)
+    heuristic = '--heuristic' in sys.argv
+
+    file_path = 'instances/instance1'
+    input_data = load_instance(file_path)
     problem_data = ProblemData.basic_process(input_data)
 
-    start = timer()
+    with Instrumentation.span('optimization') as span:
+        get_optimization(problem_data, backend=backend, heuristic=heuristic)
 
-    get_optimization(problem_data)
-
-    end = timer()
-    print(f'\tOptimization time: {end - start} seconds')
+    print(f'\tOptimization time: {span.duration} seconds')
+    Instrumentation.disable()
 
 
 if __name__ == '__main__':
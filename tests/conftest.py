@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+"""Test configuration
+
+This file is used to make the modules of the repository (they are not a package) importable by the tests, and to
+create the random flights and the instances shared by the tests.
+"""
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from Domain import Flight, FlightTable  # noqa: E402
+from ProblemData import ProblemData  # noqa: E402
+from preprocessing.instance_generator import generate_instance  # noqa: E402
+from preprocessing.instance_loader import load_instance  # noqa: E402
+
+
+def create_flights(n: int, seed: int = 0, days: int = 2) -> list:
+    """Random flights of a new table, with starts on a 5 minutes grid, so there are ties and touching intervals.
+
+    :param n: int: Number of flights.
+    :param seed: int: Seed of the random generator.
+    :param days: int: Days of the departures.
+
+    """
+    rng = random.Random(seed)
+    table = FlightTable()
+    origin = datetime(2024, 1, 1)
+    flights = []
+    for i in range(n):
+        flight = Flight(f'F{i}', rng.choice([.5, 1, 1.5, 2, 3, 4.5]), base=rng.choice(['A', 'B', None]), table=table)
+        flight.start = origin + timedelta(minutes=5 * rng.randrange(days * 24 * 12))
+        flights.append(flight)
+    return flights
+
+
+@pytest.fixture(params=[0, 1, 2])
+def flights(request) -> list:
+    """ """
+    return create_flights(60, seed=request.param)
+
+
+def load_sample():
+    """The sample instance of the repository (instances/instance1), processed, without the Arrow cache."""
+    return ProblemData.basic_process(load_instance(os.path.join(ROOT, 'instances', 'instance1'), use_cache=False))
+
+
+def generate(n_pilots: int, n_flights: int, n_days: int = 1, n_bases: int = 1, seed: int = 0):
+    """A generated instance (see generate_instance), processed.
+
+    :param n_pilots: int: Number of pilots.
+    :param n_flights: int: Number of flights.
+    :param n_days: int: Days of the departures.
+    :param n_bases: int: Number of bases.
+    :param seed: int: Seed of the generator.
+
+    """
+    return ProblemData.basic_process(generate_instance(n_pilots, n_flights, n_days=n_days, n_bases=n_bases, seed=seed))
+
+
+@pytest.fixture
+def output_dir(tmp_path, monkeypatch):
+    """Runs the test in a temporary directory with an output/ folder, where the solver logs and files are written."""
+    os.makedirs(tmp_path / 'output')
+    monkeypatch.chdir(tmp_path)
+    return tmp_path / 'output'
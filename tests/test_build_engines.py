@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+"""Build Engines Tests
+
+This file is used to check that the 'object' and the 'matrix' engines of build_model create the same model: the same
+variables (bounds, types and objective coefficients) and the same rows, compared by the keys of the variables instead of
+the Gurobi names.
+"""
+import pytest
+
+pytest.importorskip('gurobipy')
+
+from ProblemData import ProblemData  # noqa: E402
+from milp_model.milp_model import build_model  # noqa: E402
+from preprocessing.instance_generator import generate_instance  # noqa: E402
+
+FAMILIES = ('flight_pilot_assignment_vars', 'start_time_vars', 'precedence_vars')
+
+
+def get_keys(build: dict) -> dict:
+    """Key of each Gurobi variable: (family, pilot, flight) or (family, pilot, flight1, flight2), with the names of the
+    entities."""
+    keys = {}
+    for family in FAMILIES:
+        for key, var in build[family].items():
+            keys[var.variable] = (family, *(entity.name for entity in key))
+    return keys
+
+
+def get_variables(build: dict) -> dict:
+    """LB, UB, Obj and VType of each variable, by key."""
+    model, keys = build['model'], get_keys(build)
+    variables = list(keys)
+    attributes = zip(*(model.getAttr(attr, variables) for attr in ('LB', 'UB', 'Obj', 'VType')))
+    return {keys[var]: values for var, values in zip(variables, attributes)}
+
+
+def get_rows(build: dict) -> set:
+    """Rows of the model as (coefficients by key, sense, rhs). The object engine adds the integrity row of each pair of
+    flights twice, so the rows are compared as a set."""
+    model, keys = build['model'], get_keys(build)
+    rows = set()
+    for constr in model.getConstrs():
+        row = model.getRow(constr)
+        coefficients = {}
+        for k in range(row.size()):
+            key = keys[row.getVar(k)]
+            coefficients[key] = coefficients.get(key, 0.0) + row.getCoeff(k)
+        coefficients = frozenset((key, round(value, 9)) for key, value in coefficients.items() if value != 0)
+        rows.add((coefficients, constr.Sense, round(constr.RHS, 9)))
+    return rows
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_same_model(seed, tmp_path):
+    problem_data = ProblemData.basic_process(generate_instance(3, 6, n_days=1, n_bases=2, seed=seed))
+    log_file = str(tmp_path / 'model-gurobi.log')
+    builds = {engine: build_model(problem_data, engine=engine, log_file=log_file) for engine in ('object', 'matrix')}
+
+    assert get_variables(builds['object']) == get_variables(builds['matrix'])
+    assert get_rows(builds['object']) == get_rows(builds['matrix'])
+
+    for build in builds.values():
+        build['model'].setParam('OutputFlag', 0)
+        build['model'].optimize()
+    assert builds['object']['model'].ObjVal == pytest.approx(builds['matrix']['model'].ObjVal)
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+"""Column Generation Tests
+
+This file is used to compare the column generation with the monolithic MIP of the pilot-pairing model (all the legal
+pairings) on small generated instances: the roster is a partition of the flights and the optimum of the monolithic MIP
+is between the objective of the column generation and its LP bound.
+"""
+import pytest
+
+pytest.importorskip('gurobipy')
+
+from conftest import generate, load_sample  # noqa: E402
+from ProblemData import ProblemData  # noqa: E402
+from milp_model.column_generation import ColumnGenerationBackend, can_fly_pairing  # noqa: E402
+from milp_model.column_generation import get_pairing_assignment  # noqa: E402
+
+INSTANCES = {
+    'sample': load_sample,
+    'two bases': lambda: generate(5, 14, n_days=2, n_bases=2, seed=1),
+    'one base': lambda: generate(8, 24, n_days=2, n_bases=1, seed=3),
+}
+
+
+@pytest.mark.parametrize('instance', list(INSTANCES))
+def test_column_generation(instance):
+    problem_data = INSTANCES[instance]()
+    backend = ColumnGenerationBackend(problem_data, verbose=False)
+    backend.build()
+    backend.optimize()
+    assert backend.objective is not None
+
+    # Each flight is flown by one pilot or it is uncovered
+    flown = [f for pairing in backend.roster.values() if pairing is not None for f in pairing.flights]
+    assert len(flown) == len(set(flown))
+    assert set(flown).isdisjoint(backend.uncovered)
+    assert set(flown) | set(backend.uncovered) == set(problem_data['flights'])
+    for pilot, pairing in backend.roster.items():
+        if pairing is not None and pairing is not pilot.original_pairing:
+            assert can_fly_pairing(pilot, pairing)
+            for flight1, flight2 in zip(pairing.flights, pairing.flights[1:]):
+                assert (flight2.start - flight1.end).total_seconds() >= ProblemData.MIN_CONNECTION_TIME * 3600
+
+    # The column generation is within its reported gap of the monolithic optimum
+    monolithic = get_pairing_assignment(problem_data)
+    assert backend.bound is not None
+    assert backend.objective - 1e-6 <= monolithic['objective'] <= backend.bound + 1e-6
+    assert len(backend.get_solution()) == len(flown)
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""CP-SAT Model Tests
+
+This file is used to check that the CP-SAT backend optimizes the same Objective Function of the 'windows' formulation of
+the MILP model, delay penalty included.
+"""
+import pytest
+
+pytest.importorskip('gurobipy')
+pytest.importorskip('ortools')
+
+from conftest import generate, load_sample  # noqa: E402
+from milp_model.solver_backend import create_backend  # noqa: E402
+
+pytestmark = pytest.mark.usefixtures('output_dir')
+
+
+@pytest.mark.parametrize('instance', ['sample', 'generated'])
+def test_same_objective_as_windows(instance):
+    problem_data = load_sample() if instance == 'sample' else generate(5, 14, n_days=2, n_bases=2, seed=1)
+    objectives = {}
+    for backend, options in (('gurobi', dict(formulation='windows', write_model_files=False)), ('cpsat', {})):
+        solver = create_backend(backend, problem_data, time_limit=60, verbose=False, **options)
+        solver.build()
+        solver.optimize()
+        objectives[backend] = solver.objective
+    # Gurobi stops at its relative MIP gap
+    assert objectives['cpsat'] == pytest.approx(objectives['gurobi'], rel=1e-4)
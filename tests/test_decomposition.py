@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+"""Decomposition Tests
+
+This file is used to compare the merged solution of the independent components, solved in the process pool, with the
+monolithic solve of the same formulation.
+"""
+import pytest
+
+pytest.importorskip('gurobipy')
+
+from conftest import generate  # noqa: E402
+from milp_model.decomposition import get_components, get_decomposition  # noqa: E402
+from milp_model.milp_model import build_model  # noqa: E402
+from milp_model.solution import SolutionValues  # noqa: E402
+
+pytestmark = pytest.mark.usefixtures('output_dir')
+
+
+def get_monolithic(problem_data, formulation: str) -> float:
+    """Objective of the monolithic model, computed from its roster."""
+    build = build_model(problem_data, formulation=formulation)
+    build['model'].setParam('LogToConsole', 0)
+    build['model'].optimize()
+    return SolutionValues(build).get_objective()
+
+
+def test_components():
+    problem_data = generate(6, 18, n_days=2, n_bases=3, seed=0)
+    components = get_components(problem_data['pilots'], problem_data['flights'])
+    assert len(components) == 3
+    for pilots, flights in components:
+        assert all(pilot.can_fly(flight) == (pilot.base == flight.base) for pilot in pilots for flight in flights)
+    names = sorted(f.name for _, flights in components for f in flights)
+    assert names == sorted(f.name for f in problem_data['flights'])
+
+
+# The 'bigm' monolithic model has a precedence variable for every pilot x pair of flights, so its instance is smaller
+@pytest.mark.parametrize('n_flights, n_bases, formulation', [(18, 3, 'windows'), (9, 3, 'bigm'), (18, 1, 'windows')])
+def test_same_objective_as_monolithic(n_flights, n_bases, formulation):
+    problem_data = generate(6, n_flights, n_days=2, n_bases=n_bases, seed=1)
+    result = get_decomposition(problem_data, formulation=formulation, max_workers=2, write_output=False)
+    assert result['components'] == n_bases
+
+    flown = [flight for flights in result['roster'].values() for _, flight in flights]
+    assert len(flown) == len(set(flown))
+    # Each component stops at the relative MIP gap of Gurobi
+    monolithic = get_monolithic(problem_data, formulation)
+    assert result['objective'] == pytest.approx(monolithic, rel=1e-4)
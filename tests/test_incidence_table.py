@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""Incidence Table Tests
+
+This file is used to compare the CSR and CSC arrays of the IncidenceTable, and of its relabeled copies, with the members
+of each row.
+"""
+import random
+
+import numpy as np
+import pytest
+
+from Domain import IncidenceTable
+
+
+def create_table(seed: int) -> tuple[IncidenceTable, list, list, list]:
+    """ """
+    rng = random.Random(seed)
+    rows = [f'R{i}' for i in range(25)]
+    columns = [f'C{j}' for j in range(15)]
+    # Empty rows and columns are included
+    members = [rng.sample(columns, rng.randint(0, 5)) for _ in rows]
+    return IncidenceTable(rows, columns, members), rows, columns, members
+
+
+def check_table(table: IncidenceTable, rows: list, columns: list, members: list) -> None:
+    """ """
+    assert table.shape == (len(rows), len(columns))
+    assert table.nnz == sum(len(m) for m in members)
+
+    dense = np.zeros(table.shape, dtype=int)
+    for i, member in enumerate(members):
+        for column in member:
+            dense[i, columns.index(column)] = 1
+
+    for i, row in enumerate(rows):
+        # The CSR keeps the order of the members
+        assert table.row(row) == list(members[i])
+        assert table.row_columns(i).tolist() == [columns.index(c) for c in members[i]]
+    for j, column in enumerate(columns):
+        assert table.column(column) == [rows[i] for i in np.flatnonzero(dense[:, j])]
+        assert table.column_rows(j).tolist() == np.flatnonzero(dense[:, j]).tolist()
+
+    for i, row in enumerate(rows):
+        for j, column in enumerate(columns):
+            assert table.get(row, column) == dense[i, j]
+            assert table.data[row][column] == dense[i, j]
+    assert list(table.data) == rows
+
+
+@pytest.mark.parametrize('seed', [0, 1, 2])
+def test_arrays(seed):
+    table, rows, columns, members = create_table(seed)
+    check_table(table, rows, columns, members)
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_relabel(seed):
+    table, rows, columns, members = create_table(seed)
+    new_rows = [f'{r}*' for r in rows]
+    new_columns = [f'{c}*' for c in columns]
+    relabeled = table.relabel(new_rows, new_columns)
+
+    check_table(relabeled, new_rows, new_columns, [[f'{c}*' for c in m] for m in members])
+    # The arrays are shared, and the original table keeps its entities
+    assert relabeled.indices is table.indices and relabeled.row_indices is table.row_indices
+    check_table(table, rows, columns, members)
+
+    with pytest.raises(ValueError):
+        table.relabel(new_rows[:-1], new_columns)
+
+
+def test_missing_row():
+    table, rows, columns, members = create_table(0)
+    with pytest.raises(KeyError):
+        _ = table.data['missing']
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+"""Interval Index Tests
+
+This file is used to compare the queries of the FlightIntervalIndex with a brute force over all the flights, before and
+after the flights are moved.
+"""
+import random
+from datetime import timedelta
+
+import pytest
+
+from preprocessing.interval_index import FlightIntervalIndex
+
+
+def interval(flight, padding: float) -> tuple:
+    """Interval [start, end + padding) of the flight."""
+    return flight.start, flight.end + timedelta(hours=padding)
+
+
+def brute_overlapping(flights, start, end, padding: float) -> set:
+    """ """
+    return {f for f in flights if interval(f, padding)[0] < end and interval(f, padding)[1] > start}
+
+
+def check_queries(index: FlightIntervalIndex, flights, padding: float) -> None:
+    """ """
+    for flight in flights:
+        start, end = interval(flight, padding)
+        assert set(index.overlaps(flight)) == brute_overlapping(flights, start, end, padding) - {flight}
+
+        assert set(index.departing(start, end)) == {f for f in flights if start <= f.start < end}
+        assert set(index.overlapping(start, end)) == brute_overlapping(flights, start, end, padding)
+
+        for hours in (-2, 1.5):
+            delayed = start + timedelta(hours=hours), end + timedelta(hours=hours)
+            swept = min(start, delayed[0]), max(end, delayed[1])
+            expected = brute_overlapping(flights, *swept, padding) - {flight}
+            assert set(index.affected_by_delay(flight, hours)) == expected
+
+        connection, duty = timedelta(minutes=30), timedelta(hours=8)
+        assert set(index.connectable(flight, min_connection=.5)) == {
+            f for f in flights if f.start >= flight.end + connection}
+        assert set(index.connectable(flight, min_connection=.5, max_duty=8)) == {
+            f for f in flights if f.start >= flight.end + connection and f.end <= flight.start + duty}
+
+    pairs = list(index.pairs())
+    assert len(pairs) == len(set(frozenset(p) for p in pairs))
+    expected = {frozenset((f1, f2)) for f1 in flights for f2 in flights
+                if f1 is not f2 and interval(f1, padding)[0] < interval(f2, padding)[1]
+                and interval(f2, padding)[0] < interval(f1, padding)[1]}
+    assert {frozenset(p) for p in pairs} == expected
+    assert all(f1.start <= f2.start for f1, f2 in pairs)
+
+    # A moved flight goes after the flights with the same start, so only the starts are compared
+    order = index.departing_order()
+    assert sorted(order, key=flights.index) == flights
+    assert [f.start for f in order] == sorted(f.start for f in flights)
+
+
+@pytest.mark.parametrize('padding', [0, 3])
+def test_queries(flights, padding):
+    index = FlightIntervalIndex(flights, padding=padding)
+    check_queries(index, flights, padding)
+
+
+@pytest.mark.parametrize('padding', [0, 3])
+def test_move(flights, padding):
+    index = FlightIntervalIndex(flights, padding=padding)
+    rng = random.Random(len(flights))
+    for flight in rng.sample(flights, 20):
+        index.move(flight, flight.start + timedelta(minutes=5 * rng.randint(-72, 72)))
+    # A flight moved through its own setter is moved in the index without a new start
+    flight = flights[0]
+    flight.start = flight.start + timedelta(hours=5)
+    index.move(flight)
+
+    check_queries(index, flights, padding)
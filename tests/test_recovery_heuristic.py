@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+"""Recovery Heuristic Tests
+
+This file is used to check the roster of the recovery heuristic on disrupted instances: each flight is flown once, by a
+pilot that can fly it, inside its time window and with the minimum connection, and the search never ends with a roster
+worse than the repaired original roster it starts from.
+"""
+import os
+
+import pytest
+
+pytest.importorskip('gurobipy')
+
+from conftest import ROOT, load_sample  # noqa: E402
+from ProblemData import ProblemData  # noqa: E402
+from milp_model.recovery_heuristic import RecoveryHeuristic  # noqa: E402
+from milp_model.scenarios import apply_scenario, read_scenarios  # noqa: E402
+from preprocessing.instance_generator import generate_disruptions, generate_instance  # noqa: E402
+
+
+def get_instances() -> list:
+    """Disrupted variants of the sample (the scenarios of the repository) and of a generated instance."""
+    sample = load_sample()
+    instances = [(f'sample {s["name"]}', apply_scenario(sample, s))
+                 for s in read_scenarios(os.path.join(ROOT, 'instances', 'scenarios.json'))]
+
+    tables = generate_instance(8, 30, n_days=2, n_bases=2, seed=4)
+    generated = ProblemData.basic_process(tables)
+    instances += [(f'generated {s["name"]}', apply_scenario(generated, s))
+                  for s in generate_disruptions(tables, 4, max_events=4, seed=4)]
+    return instances
+
+
+INSTANCES = get_instances()
+
+
+def check_schedule(heuristic: RecoveryHeuristic) -> None:
+    """Each flight of the roster is flown once, by a pilot that can fly it, inside its time window and with the
+    minimum connection."""
+    schedule = heuristic.get_schedule()
+    flown = [flight for flights in schedule.values() for _, flight in flights]
+    assert len(flown) == len(set(flown))
+    assert set(flown) == set(heuristic.assigned)
+    for pilot, flights in schedule.items():
+        for start, flight in flights:
+            assert pilot.can_fly(flight)
+            assert heuristic.time_windows.earliest[flight] <= start <= heuristic.time_windows.latest[flight] + 1e-6
+        for (start1, flight1), (start2, _) in zip(flights, flights[1:]):
+            assert start1 + flight1.duration + ProblemData.MIN_CONNECTION_TIME <= start2 + 1e-6
+
+
+@pytest.mark.parametrize('name, problem_data', INSTANCES, ids=[name for name, _ in INSTANCES])
+def test_heuristic(name, problem_data):
+    heuristic = RecoveryHeuristic(problem_data)
+    check_schedule(heuristic)
+    original = heuristic.get_cost()
+
+    heuristic.solve()
+    check_schedule(heuristic)
+    # (uncovered flights, changed pilots, disruption), compared in this order
+    assert heuristic.get_cost() <= original
+    assert heuristic.get_cost()[0] == len(heuristic.get_uncovered())
+
+    # A second run of the same instance finds the same roster
+    again = RecoveryHeuristic(problem_data)
+    again.solve()
+    assert again.roster == heuristic.roster
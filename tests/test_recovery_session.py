@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""Recovery Session Tests
+
+This file is used to check that the recovery session stays usable across a sequence of events, in particular after the
+events that remove variables from the model (the delays), and that the roster of each event is feasible.
+"""
+import pytest
+
+pytest.importorskip('gurobipy')
+
+from conftest import generate, load_sample  # noqa: E402
+from Domain import Pilot  # noqa: E402
+from ProblemData import ProblemData  # noqa: E402
+from milp_model.recovery_session import RecoverySession  # noqa: E402
+
+pytestmark = pytest.mark.usefixtures('output_dir')
+
+
+def check_roster(session: RecoverySession) -> dict:
+    """Checks the roster of the incumbent against the events applied to the session, and returns it."""
+    roster = session.get_roster()
+    covered = [flight for flights in roster.values() for _, flight in flights]
+    assert len(covered) == len(set(covered))
+    assert not session.cancelled.intersection(covered)
+
+    for pilot, flights in roster.items():
+        assert pilot not in session.removed or not flights
+        for start, flight in flights:
+            assert pilot.can_fly(flight)
+            assert session.time_windows.earliest[flight] - 1e-6 <= start <= session.time_windows.latest[flight] + 1e-6
+        for (start1, flight1), (start2, _) in zip(flights, flights[1:]):
+            assert start1 + flight1.duration + ProblemData.MIN_CONNECTION_TIME <= start2 + 1e-6
+    return roster
+
+
+def test_events_on_the_sample():
+    problem_data = load_sample()
+    flights = {f.name: f for f in problem_data['flights']}
+    pilots = {p.name: p for p in problem_data['pilots']}
+
+    departure = flights['DAE123'].start
+    session = RecoverySession(problem_data)
+    assert session.optimize()['objective'] is not None
+    check_roster(session)
+
+    for record in (session.delay_flight(flights['DAE123'], 2),
+                   session.delay_flight(flights['DAE123'], 1),
+                   session.cancel_flight(flights['AZU123']),
+                   session.remove_pilot(pilots['Mary']),
+                   session.add_pilot(Pilot('Reserve', id=len(pilots), base=pilots['Mary'].base))):
+        assert record['objective'] is not None
+        roster = check_roster(session)
+
+    assert (session._get_flight(flights['DAE123']).start - departure).total_seconds() == 3 * 3600
+    assert [p.name for p in roster][-1] == 'Reserve'
+    # The instance of the caller is not changed by the events
+    assert flights['DAE123'].start == departure
+    assert len(problem_data['pilots']) == 4
+
+
+@pytest.mark.parametrize('index', [0, 1, 2, 3, 8, 9, 10])
+def test_delay_then_more_events(index):
+    problem_data = generate(5, 14, n_days=2, n_bases=2, seed=1)
+    flights, pilots = problem_data['flights'], problem_data['pilots']
+
+    session = RecoverySession(problem_data)
+    session.optimize()
+    for record in (session.delay_flight(flights[index], 1),
+                   session.delay_flight(flights[index], .5),
+                   session.cancel_flight(flights[(index + 1) % len(flights)]),
+                   session.remove_pilot(pilots[0]),
+                   session.add_pilot(pilots[0])):
+        assert record['objective'] is not None
+        check_roster(session)
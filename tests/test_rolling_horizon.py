@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+"""Rolling Horizon Tests
+
+This file is used to compare the rolling horizon with the monolithic solve of the 'windows' formulation: the stitched
+roster is feasible, it is never better than the monolithic optimum, and a single window is the monolithic model.
+"""
+import pytest
+
+pytest.importorskip('gurobipy')
+
+from conftest import generate  # noqa: E402
+from ProblemData import ProblemData  # noqa: E402
+from milp_model.rolling_horizon import get_rolling_horizon  # noqa: E402
+
+pytestmark = pytest.mark.usefixtures('output_dir')
+
+
+def check_roster(roster: dict, problem_data) -> None:
+    """Each flight is flown once, inside its time window, by a pilot that can fly it, with the minimum connection."""
+    initial_date = ProblemData.get_initial_date(problem_data)
+    flown = [flight for flights in roster.values() for _, flight in flights]
+    assert len(flown) == len(set(flown))
+    for pilot, flights in roster.items():
+        for start, flight in flights:
+            earliest = (flight.start - initial_date).total_seconds() / 3600
+            assert pilot.can_fly(flight)
+            assert earliest - 1e-6 <= start <= earliest + ProblemData.MAX_FLIGHT_DELAY + 1e-6
+        for (start1, flight1), (start2, _) in zip(flights, flights[1:]):
+            assert start1 + flight1.duration + ProblemData.MIN_CONNECTION_TIME <= start2 + 1e-6
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_rolling_horizon(seed):
+    problem_data = generate(5, 21, n_days=3, n_bases=2, seed=seed)
+    result = get_rolling_horizon(problem_data, window_size=2, overlap=1, compare_monolithic=True)
+    check_roster(result['roster'], problem_data)
+    assert result['windows'] > 1
+    # Gurobi stops at its relative MIP gap
+    tolerance = 1e-4 * abs(result['monolithic_objective'])
+    assert result['objective'] <= result['monolithic_objective'] + tolerance
+
+    single = get_rolling_horizon(problem_data, window_size=4, overlap=0)
+    check_roster(single['roster'], problem_data)
+    assert single['windows'] == 1
+    assert single['objective'] == pytest.approx(result['monolithic_objective'], abs=2 * tolerance)
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+"""Scenarios Tests
+
+This file is used to check the objective reported for the what-if scenarios: without events, the hierarchical model of
+a scenario finds a roster as good as the plain solve of the windows formulation.
+"""
+import pytest
+
+pytest.importorskip('gurobipy')
+
+from conftest import load_sample  # noqa: E402
+from milp_model import scenarios  # noqa: E402
+from milp_model.milp_model import build_model  # noqa: E402
+from milp_model.solution import SolutionValues  # noqa: E402
+
+pytestmark = pytest.mark.usefixtures('output_dir')
+
+
+def test_base_scenario_objective():
+    problem_data = load_sample()
+    build = build_model(problem_data, formulation='windows')
+    build['model'].optimize()
+    objective = build['model'].ObjVal
+    assert SolutionValues(build).get_objective() == pytest.approx(objective, abs=1e-3)
+
+    scenarios._init_worker(problem_data)
+    row = scenarios.solve_scenario({'name': 'base', 'events': []})
+    assert row['Objective'] == pytest.approx(objective, abs=1e-3)
+    assert row['Uncovered Flights'] == 0
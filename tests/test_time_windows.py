@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""Time Windows Tests
+
+This file is used to compare the classified pairs of the TimeWindows with a brute force over all the pairs of flights,
+and the pairs of a subset of the flights with the pairs of the whole instance.
+"""
+import itertools
+import random
+from datetime import datetime
+
+import pytest
+
+from preprocessing.time_windows import FREE, FORCED, TimeWindows
+
+
+def normalize(pairs) -> set:
+    """Pairs with a fixed order (FORCED) as tuples and the other pairs as sets, so the order of the index is ignored."""
+    return {(kind, first, second) if kind == FORCED else (kind, frozenset((first, second)))
+            for kind, first, second in pairs}
+
+
+@pytest.mark.parametrize('min_connection', [0.0, .5])
+def test_pairs(flights, min_connection):
+    time_windows = TimeWindows(flights, origin=datetime(2024, 1, 1), max_delay=3, min_connection=min_connection)
+    expected = [time_windows.classify(f1, f2) for f1, f2 in itertools.combinations(flights, 2)]
+    assert normalize(time_windows.pairs()) == normalize(p for p in expected if p[0] != FREE)
+
+
+@pytest.mark.parametrize('min_connection', [0.0, .5])
+def test_pairs_of_subset(flights, min_connection):
+    time_windows = TimeWindows(flights, origin=datetime(2024, 1, 1), max_delay=3, min_connection=min_connection)
+    assert normalize(time_windows.pairs(flights)) == normalize(time_windows.pairs())
+
+    subset = set(random.Random(0).sample(flights, len(flights) // 2))
+    expected = [p for p in time_windows.pairs() if p[1] in subset and p[2] in subset]
+    assert normalize(time_windows.pairs(list(subset))) == normalize(expected)
@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+"""Tuple Dictionary Tests
+
+This file is used to compare the wildcard select of the TupleDictionary with a brute force over the keys, while keys
+are inserted and deleted after the secondary indexes are cached.
+"""
+import itertools
+import random
+
+import pytest
+
+from Domain import TupleDictionary, WILDCARD
+
+
+def brute_select(data: dict, pattern: tuple) -> list:
+    """ """
+    return [value for key, value in data.items()
+            if all(p == WILDCARD or p == k for p, k in zip(pattern, key))]
+
+
+def get_patterns(key: tuple) -> list:
+    """All the patterns of the key, with each position fixed or a wildcard."""
+    return [tuple(WILDCARD if wildcard else k for wildcard, k in zip(mask, key))
+            for mask in itertools.product([False, True], repeat=len(key))]
+
+
+def check_select(dictionary: TupleDictionary, reference: dict, keys: list) -> None:
+    """ """
+    assert list(dictionary.items()) == list(reference.items())
+    for key in keys:
+        for pattern in get_patterns(key):
+            assert dictionary.select(*pattern) == brute_select(reference, pattern)
+            assert dictionary.select_items(*pattern) == [(k, reference[k]) for k in reference
+                                                         if all(p == WILDCARD or p == x for p, x in zip(pattern, k))]
+
+
+@pytest.mark.parametrize('seed', [0, 1])
+def test_select(seed):
+    rng = random.Random(seed)
+    pilots, flights = ['P0', 'P1', 'P2'], [f'F{i}' for i in range(6)]
+    keys = [(p, f1, f2) for p in pilots for f1 in flights for f2 in flights if f1 != f2]
+    rng.shuffle(keys)
+
+    dictionary, reference = TupleDictionary(), {}
+    for i, key in enumerate(keys[:40]):
+        dictionary[key] = reference[key] = i
+    # The first selects cache the indexes of all the patterns
+    check_select(dictionary, reference, keys)
+
+    # The cached indexes follow the insertions, the deletions and the new values of existing keys
+    for i, key in enumerate(keys[40:80]):
+        dictionary[key] = reference[key] = 100 + i
+    for key in rng.sample(list(reference), 30):
+        if rng.random() < .5:
+            del dictionary[key]
+            del reference[key]
+        else:
+            assert dictionary.pop(key) == reference.pop(key)
+    for key in rng.sample(list(reference), 10):
+        dictionary[key] = reference[key] = -1
+    check_select(dictionary, reference, keys)
+
+
+def test_missing_keys():
+    dictionary = TupleDictionary([(('P0', 'F0'), 1)])
+    with pytest.raises(KeyError):
+        _ = dictionary['P0', 'F1']
+    assert ('P0', 'F1') not in dictionary
+    assert dictionary.get(('P0', 'F1')) is None
+    assert dictionary.pop(('P0', 'F1'), 'default') == 'default'
+    assert dictionary.select('P0', 'F1') == []
+    assert len(dictionary) == 1